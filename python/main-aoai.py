@@ -5,6 +5,7 @@ Usage:
   python main-aoai.py tokens mary had a little lamb
   python main-aoai.py generate_embedding
   python main-aoai.py generate_completion
+  python main-aoai.py stream_completion
   python main-aoai.py generate_completion_with_md_prompt
 Options:
   -h --help     Show this screen.
@@ -63,7 +64,25 @@ async def generate_completion():
     system_context = "You are a helpful assistant who knows Major League Baseball."
     user_prompt = "What uniform number did Mickey Mantle wear?"
     completion = await ai_util.generate_completion(system_context, user_prompt)
-    print(completion)
+    if completion is not None:
+        print("=== content ===")
+        print(completion.choices[0].message.content)
+        print("=== model_dump_json ===")
+        print(completion.model_dump_json(indent=2))
+    await ai_util.close()
+
+
+async def stream_completion():
+    # Print the content deltas as they arrive, then the time-to-first-token and usage
+    async with AOAIUtil() as ai_util:
+        system_context = text_summarization_md()
+        user_prompt = gettysburg_address_user_md()
+        stream = ai_util.stream_completion(system_context, user_prompt)
+        async for delta in stream:
+            print(delta, end="", flush=True)
+        print("")
+        print("=== metrics ===")
+        print(stream.metrics())
 
 
 def generate_embedding_original():
@@ -97,9 +116,11 @@ def generate_embedding_original():
     # Length: 1536
 
 async def generate_embedding():
-    ai_util = AOAIUtil()
-    embedding = await ai_util.generate_embeddings("Consulting companies like 3Cloud and Cognizant")
-    print(embedding)
+    async with AOAIUtil() as ai_util:
+        embedding = await ai_util.generate_embeddings(
+            "Consulting companies like 3Cloud and Cognizant"
+        )
+        print(embedding)
 
 
 def generate_completion_original():
@@ -135,35 +156,23 @@ def generate_completion_original():
     print(completion.model_dump_json(indent=2))
 
 
-def generate_completion_with_md_prompt():
-    url = os.getenv("AZURE_OPENAI_COMPLETIONS_URL")
-    key = os.getenv("AZURE_OPENAI_COMPLETIONS_KEY")
-    dep = os.getenv("AZURE_OPENAI_COMPLETIONS_DEP")
-
-    client = AzureOpenAI(azure_endpoint=url, api_key=key, api_version="2024-10-21")
-
-    # <class 'openai.types.chat.chat_completion.ChatCompletion'>
-    completion: ChatCompletion = client.chat.completions.create(
-        model=dep,
-        temperature=0.0,
-        max_tokens=1000,
-        messages=[
-            {"role": "system", "content": text_summarization_md()},
-            {"role": "user", "content": gettysburg_address_user_md()},
-        ],
-    )
-
-    print("=== completion type ===")
-    print(str(type(completion)))
-
-    print("=== message ===")
-    print(completion.choices[0].message)
-
-    print("=== content ===")
-    print(completion.choices[0].message.content)
-
-    print("=== model_dump_json ===")
-    print(completion.model_dump_json(indent=2))
+async def generate_completion_with_md_prompt():
+    # Completions are cached in a file, so re-runs of the same prompts are not re-sent
+    opts = {"completion_cache": True, "completion_cache_file": "tmp/completion_cache.json"}
+    async with AOAIUtil(opts) as ai_util:
+        completion = await ai_util.generate_completion(
+            text_summarization_md(),
+            gettysburg_address_user_md(),
+            temperature=0.0,
+            max_tokens=1000,
+        )
+        if completion is not None:
+            print("=== content ===")
+            print(completion.choices[0].message.content)
+            print("=== model_dump_json ===")
+            print(completion.model_dump_json(indent=2))
+        print("=== completion cache ===")
+        print(ai_util.completion_cache_stats())
 
 
 def text_summarization_md():
@@ -209,8 +218,10 @@ async def main():
             await generate_embedding()
         elif func == "generate_completion":
             await generate_completion()
+        elif func == "stream_completion":
+            await stream_completion()
         elif func == "generate_completion_with_md_prompt":
-            generate_completion_with_md_prompt()
+            await generate_completion_with_md_prompt()
         else:
             print_options("Error: invalid function: {}".format(func))
     except Exception as e:
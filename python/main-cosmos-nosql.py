@@ -10,10 +10,22 @@ Usage:
   python main-cosmos-nosql.py delete_container dev libraries
   python main-cosmos-nosql.py list_containers dev
   python main-cosmos-nosql.py load_python_libraries dev libraries
+  python main-cosmos-nosql.py load_python_libraries dev libraries --trim-floats
+  python main-cosmos-nosql.py load_airports dev airports /pk --load
+  python main-cosmos-nosql.py load_airports dev airports /pk --load --batch
   python main-cosmos-nosql.py test_cosmos_nosql dbname, db_ru, cname, c_ru, pkpath
   python main-cosmos-nosql.py test_cosmos_nosql dev 0 test /pk 1000
+  python main-cosmos-nosql.py scan_container dev libraries
+  python main-cosmos-nosql.py scan_container dev libraries --resume
+  python main-cosmos-nosql.py sync_change_feed dev libraries tmp/libraries_snapshot
+  python main-cosmos-nosql.py sync_change_feed dev libraries tmp/libraries_parquet --parquet
   python main-cosmos-nosql.py vector_search_similar_libs dev libraries fastapi
   python main-cosmos-nosql.py vector_search_similar_words dev libraries async web framework with pydantic and swagger
+  python main-cosmos-nosql.py local_vector_search_similar_libs fastapi
+  python main-cosmos-nosql.py local_ann_benchmark data/cosmosdb tmp/ivfpq
+  python main-cosmos-nosql.py local_quantization_report data/cosmosdb
+  python main-cosmos-nosql.py write_embedding_file data/cosmosdb tmp/libraries.emb
+  python main-cosmos-nosql.py benchmark_loaders 5000 4000
 """
 
 # Chris Joakim, 3Cloud/Cognizant, 2026
@@ -28,6 +40,7 @@ Usage:
 
 import asyncio
 import json
+import os
 import sys
 import time
 import logging
@@ -41,8 +54,15 @@ from faker import Faker
 
 from src.ai.aoai_util import AOAIUtil
 from src.io.fs import FS
+from src.io.payload_encoder import DEFAULT_FLOAT_DIGITS
+from src.db.change_feed_snapshot import ChangeFeedSnapshot
 from src.db.cosmos_nosql_util import CosmosNoSqlUtil
+from src.db.local_cosmos import LocalCosmosClient
 from src.util.data_gen import DataGenerator
+from src.vector.ivf_pq_index import IVFPQIndex
+from src.vector.embedding_matrix_file import EmbeddingMatrixFile
+from src.vector.local_vector_index import LocalVectorIndex
+from src.vector.quantized_vector_store import QuantizedVectorStore
 
 fake = Faker()
 
@@ -121,9 +141,10 @@ async def list_containers(dbname: str):
 
 
 async def load_airports(dbname: str, cname: str, pkpath: str):
-    # See the dotnet-cosmos/ directory in this repo for a faster
-    # implementation based on bulk-loading.
+    # With --batch the documents are grouped by partition key (country)
+    # and loaded as transactional batches of up to 100 operations.
     try:
+        pkattr = pkpath.strip("/")
         infile = "../data/openflights/json/airports.json"
         json_lines = FS.read_lines(infile)
         documents = list()
@@ -138,7 +159,7 @@ async def load_airports(dbname: str, cname: str, pkpath: str):
                         newdoc[newkey] = value
                     newdoc["id"] = str(uuid.uuid4())
                     newdoc["airportid"] = int(newdoc["airportid"])
-                    newdoc[pkpath] = newdoc["country"]
+                    newdoc[pkattr] = newdoc["country"]
                     newdoc["altitude"] = float(newdoc["altitude"])
                     latitude = float(newdoc["latitude"])
                     longitude = float(newdoc["longitude"])
@@ -152,7 +173,7 @@ async def load_airports(dbname: str, cname: str, pkpath: str):
                     geojson["coordinates"] = [longitude, latitude]
                     newdoc["location"] = geojson
 
-                    if newdoc[pkpath] != "\\N":
+                    if newdoc[pkattr] != "\\N":
                         if newdoc["iata"] != "\\N":
                             print(json.dumps(newdoc, sort_keys=False, indent=2))
                             documents.append(newdoc)
@@ -169,22 +190,23 @@ async def load_airports(dbname: str, cname: str, pkpath: str):
         nosql_util = CosmosNoSqlUtil(opts)
         await nosql_util.initialize()
 
-        dbproxy = nosql_util.set_db(dbname)
+        dbproxy = await nosql_util.set_db(dbname)
         print("dbproxy: {}".format(dbproxy))
 
-        ctrproxy = nosql_util.set_container(cname)
+        ctrproxy = await nosql_util.set_container(cname)
         print("ctrproxy: {}".format(ctrproxy))
+        await nosql_util.enable_rate_limiter()
 
         if "--load" in sys.argv:
-            for doc in documents:
-                try:
-                    cdb_doc = await nosql_util.upsert_item(doc)
-                    print("upserted doc: {}".format(json.dumps(cdb_doc, indent=2)))
-                    time.sleep(0.05)
-                except Exception as e:
-                    logging.info("Error upserting doc: {}".format(str(e)))
-                    logging.info(traceback.format_exc())
-                    time.sleep(1.0)
+            if "--batch" in sys.argv:
+                summary = await nosql_util.bulk_batch_upsert(documents, "/" + pkattr)
+                print("{} transactional batches executed".format(summary["batch_count"]))
+            else:
+                summary = await nosql_util.bulk_upsert(documents, concurrency=16)
+            print_bulk_summary(summary)
+            print("rate limiter: {}".format(nosql_util.rate_limiter_stats()))
+            nosql_util.telemetry().write_json("tmp/load_airports_telemetry.json")
+        await nosql_util.close()
     except Exception as e:
         logging.info(str(e))
         logging.info(traceback.format_exc())
@@ -295,23 +317,31 @@ async def load_python_libraries(dbname: str, cname: str):
     """
     logging.info("load_python_libraries, dbname: {}, cname: {}".format(dbname, cname))
     try:
-        cosmos = CosmosNoSqlUtil()
+        opts = dict()
+        if "--trim-floats" in sys.argv:
+            opts["float_digits"] = DEFAULT_FLOAT_DIGITS  # round the embedding values
+        cosmos = CosmosNoSqlUtil(opts)
         await cosmos.initialize()
         await cosmos.set_db(dbname)
         await cosmos.set_container(cname)
+        await cosmos.enable_rate_limiter()
 
         files = FS.list_files_in_dir("data/cosmosdb")
+        documents = list()
         for idx, file in enumerate(sorted(files)):
             if idx < 999999:
                 infile = f"data/cosmosdb/{file}"
                 doc = FS.read_json(infile)
                 if doc is not None:
-                    resp = await cosmos.upsert_item(doc)
-                    print("upsert_item response: {}".format(resp))
-                    asyncio.sleep(0.05)
+                    documents.append(doc)
                 else:
                     logging.info(f"Error: doc is None for file: {infile}")
 
+        summary = await cosmos.bulk_upsert(documents, concurrency=16)
+        print_bulk_summary(summary)
+        print("rate limiter: {}".format(cosmos.rate_limiter_stats()))
+        print("payload: {}".format(cosmos.payload_stats()))
+
         # For DiskANN Vector Search, first enable the Feature as described here:
         # https://learn.microsoft.com/en-us/azure/cosmos-db/nosql/vector-search#enable-the-vector-indexing-and-search-feature
 
@@ -323,22 +353,69 @@ async def load_python_libraries(dbname: str, cname: str):
         logging.info(traceback.format_exc())
 
 
+async def scan_container(dbname: str, cname: str):
+    """
+    Scan all documents in the container page by page, saving the continuation
+    token after each page so that an interrupted scan can be resumed with --resume.
+    """
+    nosql_util = await initialize_cosmos_nosql_util(dbname, cname)
+    state_file = "tmp/scan_{}_{}_continuation.json".format(dbname, cname)
+    try:
+        token = None
+        if "--resume" in sys.argv:
+            state = FS.read_json(state_file)
+            if state is not None:
+                token = state["continuation_token"]
+        sql = "SELECT c.id, c.pk FROM c"
+        page_count, doc_count = 0, 0
+        async for page in nosql_util.query_pages(sql, max_item_count=100, continuation_token=token):
+            page_count = page_count + 1
+            doc_count = doc_count + len(page["items"])
+            for item in page["items"]:
+                print(item)
+            state = {"continuation_token": page["continuation_token"]}
+            FS.write_json(state, state_file, verbose=False)
+        print("scan_container; pages: {}, documents: {}".format(page_count, doc_count))
+    except Exception as e:
+        logging.info(str(e))
+        logging.info(traceback.format_exc())
+    await nosql_util.close()
+
+
+async def sync_change_feed(dbname: str, cname: str, snapshot_dir: str):
+    """
+    Apply the new and updated documents since the previous sync to a local
+    snapshot of the container.  The changed documents are listed in the
+    snapshot's _delta.json file; see main-search.py direct_load_index --delta
+    """
+    nosql_util = await initialize_cosmos_nosql_util(dbname, cname)
+    try:
+        format = "parquet" if "--parquet" in sys.argv else "json"
+        snapshot = ChangeFeedSnapshot(snapshot_dir, format)
+        delta = await snapshot.sync(nosql_util)
+        print(
+            "sync_change_feed; {} changed documents, sync_count: {}".format(
+                len(delta["ids"]), delta["sync_count"]
+            )
+        )
+    except Exception as e:
+        logging.info(str(e))
+        logging.info(traceback.format_exc())
+    await nosql_util.close()
+
+
 async def vector_search_similar_libs(dbname: str, cname: str, libname: str):
     nosql_util = await initialize_cosmos_nosql_util(dbname, cname)
     try:
-        sql = (
-            "SELECT c.id, c.pk, c.name, c.embedding FROM c where c.name = '{}' and c.pk = 'pypi' offset 0 limit 1"
-        ).format(libname)
-        docs = await nosql_util.query_items(sql, cross_partition=False, pk="/pk", max_items=1)
+        sql = "SELECT c.id, c.pk, c.name, c.embedding FROM c where c.name = @name and c.pk = 'pypi' offset 0 limit 1"
+        sql_parameters = [{"name": "@name", "value": libname}]
+        docs = await nosql_util.parameterized_query(sql, sql_parameters, max_items=1)
         if len(docs) == 0:
-            print("No document found with id: {}".format(id))
+            print("No document found with name: {}".format(libname))
         else:
             embedding = docs[0]["embedding"]
             print("embedding length: {}".format(len(embedding)))
-            sql = vector_search_sql(5, embedding)
-            FS.write(sql, "tmp/vector_search_sql.txt")
-            results = await nosql_util.query_items(sql, True)
-            for idx, result in enumerate(results):
+            async for result in nosql_util.vector_search(embedding, top_n=5):
                 print(result)
     except Exception as e:
         logging.info(str(e))
@@ -346,22 +423,87 @@ async def vector_search_similar_libs(dbname: str, cname: str, libname: str):
     await nosql_util.close()
 
 
-def vector_search_sql(top_n: int, embedding: list):
-    return """
-SELECT TOP {} c.id, c.pk, c.name, VectorDistance(c.embedding, {}) AS SimilarityScore
- FROM c
- ORDER BY VectorDistance(c.embedding, {})
-""".format(top_n, embedding, embedding).lstrip()
+def local_vector_search_similar_libs(libname: str):
+    # Like vector_search_similar_libs, but with a local index of the data/cosmosdb/ files
+    t1 = time.perf_counter()
+    index = LocalVectorIndex.from_json_dir("data/cosmosdb")
+    t2 = time.perf_counter()
+    print("loaded {} embeddings in {:.3f}s".format(index.size(), t2 - t1))
+    id = index.find("name", libname)
+    if id is None:
+        print("No document found with name: {}".format(libname))
+        return
+    embedding = index.embedding(id)
+    iterations = 1000
+    t1 = time.perf_counter()
+    for _ in range(iterations):
+        results = index.search(embedding, top_k=5)
+    t2 = time.perf_counter()
+    for result in results:
+        print(result)
+    print("search time: {:.1f}us".format((t2 - t1) * 1000000.0 / iterations))
+
+
+def local_ann_benchmark(dirname: str, index_dir: str):
+    # Build an IVF-PQ index of the embedded documents in the given directory,
+    # save it, and report its recall@10 and latency vs exact search per nprobe
+    exact_index = LocalVectorIndex.from_json_dir(dirname)
+    t1 = time.perf_counter()
+    ann_index = IVFPQIndex.from_local_index(exact_index, m=48, refine_factor=4)
+    print("built the IVF-PQ index in {:.3f}s".format(time.perf_counter() - t1))
+    ann_index.save(index_dir)
+    ann_index = IVFPQIndex.load(index_dir)
+    queries = exact_index.matrix()[::4]
+    for nprobe in [1, 2, 4, 8, 16, 32]:
+        for refine_factor in [0, 4]:
+            print(ann_index.recall_at_k(exact_index, queries, 10, nprobe, refine_factor))
+
+
+def local_quantization_report(dirname: str):
+    # Report the memory and recall@10 of int8 and binary quantized embeddings,
+    # rescored from a memory-mapped embedding file so that only the codes are
+    # resident in memory
+    path = "tmp/quantization_report.emb"
+    matrix_file = EmbeddingMatrixFile.write_from_json_dir(path, dirname)
+    queries = matrix_file.matrix[::4]
+    print("float32 bytes per vector: {}".format(matrix_file.dimensions * 4))
+    for mode in ["int8", "binary"]:
+        store = QuantizedVectorStore.from_matrix_file(path, mode)
+        for data in store.recall_report(queries, 10, [0, 4, 10]):
+            print(data)
+
+
+def write_embedding_file(dirname: str, path: str):
+    # Write the embedded documents in the given directory to a memory-mapped
+    # embedding file, then compare its load time to that of the JSON files
+    t1 = time.perf_counter()
+    matrix_file = EmbeddingMatrixFile.write_from_json_dir(path, dirname)
+    t2 = time.perf_counter()
+    print(
+        "wrote {} x {} embeddings in {:.3f}s".format(
+            matrix_file.rows, matrix_file.dimensions, t2 - t1
+        )
+    )
+    t1 = time.perf_counter()
+    EmbeddingMatrixFile.open(path)
+    t2 = time.perf_counter()
+    print("opened {} in {:.1f}us".format(path, (t2 - t1) * 1000000.0))
+    t1 = time.perf_counter()
+    LocalVectorIndex.from_matrix_file(path)
+    t2 = time.perf_counter()
+    print("loaded the index from {} in {:.3f}s".format(path, t2 - t1))
+    t1 = time.perf_counter()
+    LocalVectorIndex.from_json_dir(dirname)
+    t2 = time.perf_counter()
+    print("loaded the index from {} in {:.3f}s".format(dirname, t2 - t1))
 
 
 async def vector_search_similar_words(dbname: str, cname: str, words: list):
     nosql_util = await initialize_cosmos_nosql_util(dbname, cname)
     try:
-        ai_util = AOAIUtil()
-        embedding = await ai_util.generate_embeddings(" ".join(words))
-        sql = vector_search_sql(5, embedding)
-        results = await nosql_util.query_items(sql, True)
-        for idx, result in enumerate(results):
+        async with AOAIUtil({"embedding_cache_dir": "tmp/embedding_cache"}) as ai_util:
+            embedding = await ai_util.generate_embeddings(" ".join(words))
+        async for result in nosql_util.vector_search(embedding, top_n=5):
             print(result)
     except Exception as e:
         logging.info(str(e))
@@ -369,6 +511,43 @@ async def vector_search_similar_words(dbname: str, cname: str, words: list):
     await nosql_util.close()
 
 
+async def benchmark_loaders(doc_count: int, c_ru: int):
+    # Compare the loader strategies against the local, in-memory Cosmos DB
+    # stand-in, which simulates RU charges and 429s at the given RU/s.
+    # Set AZURE_COSMOSDB_NOSQL_LOCAL_LATENCY_MS to simulate network latency.
+    os.environ["AZURE_COSMOSDB_NOSQL_AUTHTYPE"] = "local"
+    dg = DataGenerator()
+    documents = [dg.random_person_document() for _ in range(doc_count)]
+    strategies = ["bulk_upsert", "bulk_upsert_rate_limited", "bulk_batch_upsert_rate_limited"]
+    for strategy in strategies:
+        LocalCosmosClient.reset()
+        nosql_util = CosmosNoSqlUtil()
+        await nosql_util.initialize()
+        await nosql_util.create_database("benchmark")
+        await nosql_util.set_db("benchmark")
+        await nosql_util.create_container("people", "/pk", c_ru)
+        await nosql_util.set_container("people")
+        if strategy.endswith("rate_limited"):
+            await nosql_util.enable_rate_limiter()
+        if strategy.startswith("bulk_batch_upsert"):
+            summary = await nosql_util.bulk_batch_upsert(documents, "/pk")
+        else:
+            summary = await nosql_util.bulk_upsert(documents)
+        print(
+            "{}; success: {}, failure: {}, total_ru: {:.2f}, elapsed: {:.3f}s, docs/s: {:.1f}".format(
+                strategy,
+                summary["success_count"],
+                summary["failure_count"],
+                summary["total_ru"],
+                summary["elapsed"],
+                summary["success_count"] / summary["elapsed"],
+            )
+        )
+        print("  rate limiter: {}".format(nosql_util.rate_limiter_stats()))
+        nosql_util.telemetry().write_json("tmp/benchmark_{}_telemetry.json".format(strategy))
+        await nosql_util.close()
+
+
 async def initialize_cosmos_nosql_util(dbname: str, cname: str):
     opts = dict()
     opts["enable_diagnostics_logging"] = True
@@ -379,6 +558,20 @@ async def initialize_cosmos_nosql_util(dbname: str, cname: str):
     return nosql_util
 
 
+def print_bulk_summary(summary: dict):
+    for result in summary["results"]:
+        if not result["success"]:
+            print("upsert failed; {}".format(result))
+    print(
+        "bulk upsert; success: {}, failure: {}, total_ru: {:.2f}, elapsed: {:.3f}s".format(
+            summary["success_count"],
+            summary["failure_count"],
+            summary["total_ru"],
+            summary["elapsed"],
+        )
+    )
+
+
 def create_random_document(id, pk):
     dg = DataGenerator()
     return dg.random_person_document(id, pk)
@@ -432,16 +625,33 @@ if __name__ == "__main__":
                 c_ru = int(sys.argv[5])
                 pkpath = sys.argv[6]
                 asyncio.run(test_cosmos_nosql(dbname, db_ru, cname, c_ru, pkpath))
+            elif func == "scan_container":
+                dbname, cname = sys.argv[2], sys.argv[3]
+                asyncio.run(scan_container(dbname, cname))
+            elif func == "sync_change_feed":
+                dbname, cname, snapshot_dir = sys.argv[2], sys.argv[3], sys.argv[4]
+                asyncio.run(sync_change_feed(dbname, cname, snapshot_dir))
             elif func == "vector_search_similar_libs":
                 dbname = sys.argv[2]
                 cname = sys.argv[3]
                 libname = sys.argv[4]
                 asyncio.run(vector_search_similar_libs(dbname, cname, libname))
+            elif func == "local_vector_search_similar_libs":
+                local_vector_search_similar_libs(sys.argv[2])
+            elif func == "local_ann_benchmark":
+                local_ann_benchmark(sys.argv[2], sys.argv[3])
+            elif func == "local_quantization_report":
+                local_quantization_report(sys.argv[2])
+            elif func == "write_embedding_file":
+                write_embedding_file(sys.argv[2], sys.argv[3])
             elif func == "vector_search_similar_words":
                 dbname = sys.argv[2]
                 cname = sys.argv[3]
                 words = sys.argv[4:]
                 asyncio.run(vector_search_similar_words(dbname, cname, words))
+            elif func == "benchmark_loaders":
+                doc_count, c_ru = int(sys.argv[2]), int(sys.argv[3])
+                asyncio.run(benchmark_loaders(doc_count, c_ru))
             else:
                 print_options("Error: invalid function: {}".format(func))
         except Exception as e:
@@ -31,11 +31,18 @@ Usage:
     python main-search.py search_index nosql-libraries m26 aisearch/libraries_searches.json
     python main-search.py search_index nosql-libraries vector_search_fastapi_vector aisearch/libraries_searches.json
     -
+    python main-search.py local_search_index data/cosmosdb m26 aisearch/libraries_searches.json
+    python main-search.py local_search_index data/cosmosdb hybrid_search_fastapi_web_framework aisearch/libraries_searches.json
+    -
     python main-search.py direct_load_index zipcodes ../data/zipcodes/us_zipcodes.json --load
+    python main-search.py direct_load_index nosql-libraries tmp/libraries_snapshot --load --delta
+    python main-search.py direct_load_index nosql-libraries data/cosmosdb --load --trim-floats --gzip
+    python main-search.py payload_encoding_report data/cosmosdb
 """
 
 # Chris Joakim, 3Cloud/Cognizant, 2026
 
+import asyncio
 import json
 import logging
 import os
@@ -47,9 +54,13 @@ import uuid
 from docopt import docopt
 from dotenv import load_dotenv
 
+from src.ai.ai_search_async_util import AISearchAsyncUtil
 from src.ai.ai_search_util import AISearchUtil
+from src.db.change_feed_snapshot import ChangeFeedSnapshot
 from src.io.fs import FS
+from src.io.payload_encoder import DEFAULT_FLOAT_DIGITS, PayloadEncoder
 from src.os.env import Env
+from src.vector.hybrid_search_index import HybridSearchIndex
 
 
 def print_options(msg):
@@ -72,53 +83,109 @@ def direct_load_index(index_name, input_json_file_or_dir):
         docs = FS.read_json(input_json_file_or_dir)
     else:
         # it's a directory, assumed to have one JSON file per document
-        files = FS.list_files_in_dir(input_json_file_or_dir)
-        print("Found {} files in directory {}".format(len(files), input_json_file_or_dir))
-        for file in files:
-            if file.endswith(".json"):
-                fq_filename = "{}/{}".format(input_json_file_or_dir, file)
-                doc = FS.read_json(fq_filename)
-                if isinstance(doc, dict):
-                    if "CosmosAIGraph" in input_json_file_or_dir:
-                        doc = transform_pythonlib_doc(doc)
-                    docs.append(doc)
+        if "--delta" in sys.argv:
+            # only the documents changed in the last change feed sync, in either
+            # snapshot format; see main-cosmos-nosql.py sync_change_feed
+            snapshot = ChangeFeedSnapshot(input_json_file_or_dir)
+            if snapshot.read_delta() is None:
+                print("No change feed delta in directory {}".format(input_json_file_or_dir))
+                sys.exit(1)
+            dir_docs = snapshot.read_delta_documents()
+        else:
+            files = FS.list_files_in_dir(input_json_file_or_dir)
+            print("Found {} files in directory {}".format(len(files), input_json_file_or_dir))
+            dir_docs = list()
+            for file in files:
+                if file.startswith("_"):
+                    pass  # change feed state and delta manifest files
+                elif file.endswith(".json"):
+                    fq_filename = "{}/{}".format(input_json_file_or_dir, file)
+                    dir_docs.append(FS.read_json(fq_filename))
+        for doc in dir_docs:
+            if isinstance(doc, dict):
+                if "CosmosAIGraph" in input_json_file_or_dir:
+                    doc = transform_pythonlib_doc(doc)
+                docs.append(doc)
         print("Read {} documents from directory {}".format(len(docs), input_json_file_or_dir))
     for doc in docs:
-        doc["id"] = str(uuid.uuid4())
+        if "--delta" in sys.argv and "id" in doc.keys():
+            pass  # keep the id so that changed documents replace their previous version
+        else:
+            doc["id"] = str(uuid.uuid4())
         # print(json.dumps(doc, sort_keys=False, indent=2))
 
     if "--load" in sys.argv:
-        client = AISearchUtil()
-        batch, batch_size, batch_num = list(), 100, 0
-        # Azure AI Search has a limit of 1000 documents per batch;
-        # see https://learn.microsoft.com/en-us/azure/search/search-what-is-data-import
-        for idx, doc in enumerate(docs):
-            if idx < 100000:
-                if "location" in doc.keys():
-                    del doc["location"]  # remove the 'location' nested object for now
-                print("Document idx {}: id: {}".format(idx, doc["id"]))
-                batch.append(doc)
-                if len(batch) >= batch_size:
-                    batch_num = batch_num + 1
-                    print("Adding batch {} of {} documents".format(batch_num, len(batch)))
-                    try:
-                        result = client.add_documents_to_index(index_name, batch)
-                        print(json.dumps(result, sort_keys=False, indent=2))
-                    except Exception as e:
-                        print("Error adding batch: {}".format(str(e)))
-                        print(traceback.format_exc())
-                    batch = list()
-                    time.sleep(1.0)  # sleep to avoid possible throttling
-
-        if len(batch) > 0:
-            batch_num = batch_num + 1
-            print("Adding last batch {} of {} documents".format(batch_num, len(batch)))
-            result = client.add_documents_to_index(index_name, batch)
-            print(json.dumps(result, sort_keys=False, indent=2))
-
+        docs = docs[0:100000]
+        for doc in docs:
+            if "location" in doc.keys():
+                del doc["location"]  # remove the 'location' nested object for now
+        stats = asyncio.run(load_index(index_name, docs))
+        for status in stats["failed"][0:10]:
+            print("Failed document: {}".format(json.dumps(status)))
+        stats["failed"] = len(stats["failed"])
+        print(json.dumps(stats, sort_keys=False, indent=2))
         print("{} documents were in the list to load".format(len(docs)))
 
 
+async def load_index(index_name, docs):
+    # Upload the documents in concurrent batches, sized by their serialized bytes
+    # within the Azure AI Search limits of 1000 documents and 16 MB per batch.
+    # Only the documents that fail with a transient status, such as in a 207
+    # or 503 response, are retried, and throttling shrinks the batches.
+    # See https://learn.microsoft.com/en-us/azure/search/search-what-is-data-import
+    # With --trim-floats the embedding floats are rounded, and with --gzip the
+    # request bodies are compressed; the stats report the bytes sent.
+    opts = dict()
+    if "--trim-floats" in sys.argv:
+        opts["float_digits"] = DEFAULT_FLOAT_DIGITS
+    if "--gzip" in sys.argv:
+        opts["gzip"] = True
+    async with AISearchAsyncUtil(opts) as client:
+        return await client.load_documents(index_name, docs)
+
+
+def payload_encoding_report(dirname):
+    # Report the request body bytes and encoding time of the documents in the
+    # given directory, in batches of 100, per JSON encoder and payload option
+    docs = list()
+    for file in sorted(FS.list_files_in_dir(dirname)):
+        if file.endswith(".json"):
+            doc = FS.read_json("{}/{}".format(dirname, file))
+            if isinstance(doc, dict):
+                docs.append(doc)
+    batches = [docs[n : n + 100] for n in range(0, len(docs), 100)]
+    for use_orjson in [False, True]:
+        for float_digits in [None, DEFAULT_FLOAT_DIGITS]:
+            for gzip_body in [False, True]:
+                encoder = PayloadEncoder(
+                    float_digits, gzip_body, use_orjson=use_orjson, measure_json=True
+                )
+                for batch in batches:
+                    encoder.encode_documents(batch)
+                print(json.dumps(encoder.stats()))
+
+
+def local_search_index(dirname, search_name, searches_json_filename):
+    # Execute the named search of the given file with a local hybrid (BM25 and
+    # vector, fused with RRF) index of the documents in the given directory
+    search_params = FS.read_json(searches_json_filename)[search_name]
+    t1 = time.perf_counter()
+    index = HybridSearchIndex.from_json_dir(dirname)
+    t2 = time.perf_counter()
+    print("Indexed {} documents in {:.3f}s".format(index.size(), t2 - t1))
+    iterations = 100
+    t1 = time.perf_counter()
+    for _ in range(iterations):
+        result = index.execute(search_params)
+    t2 = time.perf_counter()
+    for doc in result["value"]:
+        print(json.dumps(doc, sort_keys=False))
+    if "@odata.count" in result:
+        print("Count: {}".format(result["@odata.count"]))
+    print("Search time: {:.3f}ms".format((t2 - t1) * 1000.0 / iterations))
+    FS.write_json(result, "tmp/local_search_result.json", pretty=True, sort_keys=False)
+
+
 def transform_pythonlib_doc(doc):
     newdoc = dict()
     for key in "name,description,summary,kwds,project_url,developers,embedding".split(","):
@@ -229,12 +296,21 @@ if __name__ == "__main__":
                 print(json.dumps(result, sort_keys=False, indent=2))
                 FS.write_json(result, "tmp/search_result.json", pretty=True, sort_keys=False)
 
+            elif func == "local_search_index":
+                dirname, search_name = sys.argv[2], sys.argv[3]
+                searches_json_filename = sys.argv[4]
+                local_search_index(dirname, search_name, searches_json_filename)
+
+            elif func == "payload_encoding_report":
+                payload_encoding_report(sys.argv[2])
+
             elif func == "direct_load_index":
                 index_name = sys.argv[2]
                 input_json_file_or_dir = sys.argv[3]
                 direct_load_index(index_name, input_json_file_or_dir)
             else:
                 print_options("Error: invalid function: {}".format(func))
+            client.close()
     except Exception as e:
         print(str(e))
         print(traceback.format_exc())
@@ -1,4 +1,6 @@
+import asyncio
 import json
+import os
 import random
 import time
 
@@ -7,6 +9,8 @@ import streamlit as st
 
 from faker import Faker
 
+from src.ai.aoai_util import AOAIUtil
+
 # Chris Joakim, 3Cloud/Cognizant, 2026
 
 # Run the app with command: streamlit run app.py
@@ -62,13 +66,24 @@ def as_float(s):
         return 0.0
 
 
+async def stream_aoai_response(prompt, message_placeholder):
+    """Stream the Azure OpenAI completion into the placeholder; return it and its metrics."""
+    full_response = ""
+    async with AOAIUtil() as ai_util:
+        stream = ai_util.stream_completion("You are a helpful assistant.", prompt)
+        async for delta in stream:
+            full_response += delta
+            message_placeholder.markdown(full_response + "▌")
+    return full_response, stream.metrics()
+
+
 # Create the UI, using the st.session_state values.
 # The values in the UI are mutable by user interaction in the browser,
 # but not by changing the st.session_state values directly with code.
 # See 'st.rerun()'below to trigger an update of the UI.
 
-tab_names = "Stock Price Chart,Simulated Chat,Pace Calculator,Run/Walk Calculator,Streamlit Session State".split(
-    ","
+tab_names = (
+    "Stock Price Chart,Chat,Pace Calculator,Run/Walk Calculator,Streamlit Session State".split(",")
 )
 tab1, tab2, tab3, tab4, tab5 = st.tabs(tab_names)
 
@@ -80,7 +95,9 @@ with tab1:
         st.line_chart(data=st.session_state["stock_prices"])
 
 with tab2:
-    st.header("Simulated Chatbot")
+    # The chat is with Azure OpenAI if configured, otherwise it is simulated
+    aoai_configured = os.getenv("AZURE_OPENAI_COMPLETIONS_URL") is not None
+    st.header("Chatbot" if aoai_configured else "Simulated Chatbot")
 
     if "chat_messages" not in st.session_state:
         st.session_state.chat_messages = []
@@ -98,19 +115,31 @@ with tab2:
         with st.chat_message("user"):
             st.markdown(prompt)
 
-        # Simulate an assistant response
         with st.chat_message("assistant"):
             message_placeholder = st.empty()
             full_response = ""
-            # Simulate a streaming response for better user experience
-            # assistant_response = f"You said: {prompt} ...interesting."
-            assistant_response = fake.sentence()
-            for chunk in assistant_response.split():
-                full_response += chunk + " "
-                time.sleep(0.05)
-                # Add a blinking cursor to simulate typing
-                message_placeholder.markdown(full_response + "▌")
-            message_placeholder.markdown(full_response)
+            if aoai_configured:
+                full_response, metrics = asyncio.run(
+                    stream_aoai_response(prompt, message_placeholder)
+                )
+                message_placeholder.markdown(full_response)
+                st.caption(
+                    "time to first token: {:.0f}ms, total: {:.0f}ms, tokens: {}".format(
+                        metrics["ttft_ms"] or 0.0,
+                        metrics["latency_ms"],
+                        metrics["total_tokens"],
+                    )
+                )
+            else:
+                # Simulate a streaming response for better user experience
+                # assistant_response = f"You said: {prompt} ...interesting."
+                assistant_response = fake.sentence()
+                for chunk in assistant_response.split():
+                    full_response += chunk + " "
+                    time.sleep(0.05)
+                    # Add a blinking cursor to simulate typing
+                    message_placeholder.markdown(full_response + "▌")
+                message_placeholder.markdown(full_response)
 
         # Add assistant response to chat history
         st.session_state.chat_messages.append({"role": "assistant", "content": full_response})
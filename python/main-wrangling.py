@@ -467,25 +467,44 @@ def prune_classifiers(classifiers: list) -> list:
 
 
 async def add_embeddings_to_cosmosdb_documents():
-    ai_util = AOAIUtil()
+    # The documents without an embedding are embedded with batched requests,
+    # rather than one request (and a throttling sleep) per document.
+    # Previously generated embeddings are read from the on-disk cache, and the
+    # requests are paced to the AZURE_OPENAI_EMBEDDINGS_TPM quota, if set.
+    ai_util = AOAIUtil({"embedding_cache_dir": "tmp/embedding_cache"})
     files = FS.list_files_in_dir("data/cosmosdb")
-    for idx, file in enumerate(sorted(files)):
+    infiles, texts = list(), list()
+    for file in sorted(files):
+        infile = f"data/cosmosdb/{file}"
         try:
-            if idx < 999999:
-                infile = f"data/cosmosdb/{file}"
-                doc = FS.read_json(infile)
-                if "embedding" not in doc.keys():
-                    print(f"Generating embedding for {infile}")
-                    id = doc["id"]
-                    doc["id"] = ""  # not appropriate for semantic search
-                    jstr = json.dumps(doc, sort_keys=False)
-                    doc["embedding"] = await ai_util.generate_embeddings(jstr)
-                    doc["id"] = id
-                    FS.write_json(doc, infile, sort_keys=False)
-                    asyncio.sleep(4.0)  # to avoid LLM throttling and 429 errors
+            doc = FS.read_json(infile)
+            if "embedding" not in doc.keys():
+                doc["id"] = ""  # not appropriate for semantic search
+                infiles.append(infile)
+                texts.append(json.dumps(doc, sort_keys=False))
         except Exception as e:
             print(f"Error: {e} on infile: {infile}")
             print(traceback.format_exc())
+    print(f"Generating embeddings for {len(texts)} documents")
+    results = await ai_util.generate_embeddings_batch(texts, truncate=True)
+    await ai_util.close()
+    for infile, embedding, error in zip(infiles, results["embeddings"], results["errors"]):
+        if embedding is None:
+            print(f"Error: {error} on infile: {infile}")
+        else:
+            doc = FS.read_json(infile)
+            doc["embedding"] = embedding
+            FS.write_json(doc, infile, sort_keys=False, verbose=False)
+    print(
+        "embeddings; success: {}, failure: {}, requests: {}, tokens: {}, elapsed: {:.3f}s".format(
+            results["success_count"],
+            results["failure_count"],
+            results["request_count"],
+            results["total_tokens"],
+            results["elapsed"],
+        )
+    )
+    print("rate limiter: {}".format(ai_util.rate_limiter_stats("embeddings")))
 
 
 def truncate_cosmosdb_document(doc: dict, max_length: int) -> dict:
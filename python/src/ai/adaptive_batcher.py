@@ -0,0 +1,98 @@
+import json
+import logging
+
+# This class splits documents into upload batches for Azure AI Search by
+# both their count and their serialized size, rather than by a fixed count,
+# since a batch of documents with 1536-dimension embeddings is orders of
+# magnitude larger than one of postal code records.  A batch is filled
+# until the next document would exceed the byte or the document limit.
+# The limits adapt to the service, additive-increase/multiplicative-decrease
+# style: they are halved when a request is throttled or times out, and
+# regrow toward the configured maximums with each successful request.
+# Chris Joakim, 3Cloud/Cognizant, 2026
+
+MAX_DOCUMENTS = 1000  # the Azure AI Search limit per batch
+MAX_REQUEST_BYTES = 16 * 1024 * 1024  # the Azure AI Search limit per request
+DEFAULT_MAX_BYTES = MAX_REQUEST_BYTES // 2  # smaller requests are less likely to time out
+
+MIN_SCALE = 1.0 / 64.0
+SCALE_INCREASE = 0.1
+
+BATCH_OVERHEAD_BYTES = len('{"value":[]}')
+
+
+class AdaptiveBatcher:
+    def __init__(
+        self,
+        max_bytes: int = DEFAULT_MAX_BYTES,
+        max_documents: int = MAX_DOCUMENTS,
+        size_func=None,
+    ):
+        """The optional size_func returns the bytes of a document as sent; see document_size."""
+        self.max_bytes = int(min(max_bytes, MAX_REQUEST_BYTES))
+        self.max_documents = int(min(max_documents, MAX_DOCUMENTS))
+        self.size_func = self.document_size if size_func is None else size_func
+        self.scale = 1.0  # the fraction of the maximums currently used
+        self.throttled_count = 0
+        self.oversized_count = 0
+
+    @classmethod
+    def document_size(cls, doc: dict) -> int:
+        """Return the bytes of the given document as httpx serializes it, in compact UTF-8 JSON."""
+        return len(json.dumps(doc, ensure_ascii=False, separators=(",", ":")).encode("utf-8"))
+
+    def bytes_limit(self) -> int:
+        return max(1, round(self.max_bytes * self.scale))
+
+    def documents_limit(self) -> int:
+        return max(1, round(self.max_documents * self.scale))
+
+    def batches(self, documents):
+        """
+        Yield lists of the given documents, in order, within the current limits.  The
+        limits are read as each batch is filled, so a generator consumed while uploading
+        picks up the adjustments of record_throttle() and record_success().
+        """
+        batch, batch_bytes = list(), BATCH_OVERHEAD_BYTES
+        for doc in documents:
+            size = self.size_func(doc) + 1  # plus the separating comma
+            if len(batch) > 0 and (
+                batch_bytes + size > self.bytes_limit() or len(batch) >= self.documents_limit()
+            ):
+                yield batch
+                batch, batch_bytes = list(), BATCH_OVERHEAD_BYTES
+            if size + BATCH_OVERHEAD_BYTES > self.max_bytes:
+                self.oversized_count = self.oversized_count + 1
+                logging.warning(
+                    "AdaptiveBatcher - document of {} bytes exceeds max_bytes {}".format(
+                        size, self.max_bytes
+                    )
+                )
+            batch.append(doc)
+            batch_bytes = batch_bytes + size
+        if len(batch) > 0:
+            yield batch
+
+    def record_throttle(self) -> None:
+        """Halve the limits, after a throttled (429, 503) or timed out request."""
+        self.throttled_count = self.throttled_count + 1
+        self.scale = max(MIN_SCALE, self.scale / 2.0)
+        logging.info(
+            "AdaptiveBatcher - throttled, limits now {} documents, {} bytes".format(
+                self.documents_limit(), self.bytes_limit()
+            )
+        )
+
+    def record_success(self) -> None:
+        """Grow the limits back toward the maximums, after a successful request."""
+        self.scale = min(1.0, self.scale + SCALE_INCREASE)
+
+    def stats(self) -> dict:
+        data = dict()
+        data["max_bytes"] = self.max_bytes
+        data["max_documents"] = self.max_documents
+        data["bytes_limit"] = self.bytes_limit()
+        data["documents_limit"] = self.documents_limit()
+        data["throttled_count"] = self.throttled_count
+        data["oversized_count"] = self.oversized_count
+        return data
@@ -0,0 +1,260 @@
+import asyncio
+import logging
+import os
+import random
+import time
+
+import httpx
+
+from src.ai.adaptive_batcher import DEFAULT_MAX_BYTES, MAX_DOCUMENTS, AdaptiveBatcher
+from src.ai.ai_search_util import (
+    DEFAULT_CONNECT_TIMEOUT_SECONDS,
+    DEFAULT_KEEPALIVE_EXPIRY_SECONDS,
+    DEFAULT_TIMEOUT_SECONDS,
+    HTTP2_AVAILABLE,
+)
+from src.io.payload_encoder import PayloadEncoder
+
+# This class is the async counterpart of AISearchUtil, built on one pooled
+# httpx.AsyncClient, for bulk loading documents into an Azure AI Search
+# index.  load_documents() splits the documents into batches sized by both
+# count and bytes with an AdaptiveBatcher, and uploads up to max_concurrency
+# of them at once.  The per-document statuses of each response are parsed,
+# and only the documents that failed with a transient status (such as in a
+# 207 partial success response, or the whole batch of a 429 or 503 response)
+# are re-queued, after an exponential backoff or the Retry-After header
+# value.  Loads are thus paced by the service's throughput rather than by
+# fixed sleeps between batches, and throttling shrinks the batches.
+# Request bodies are encoded with a PayloadEncoder, as in AISearchUtil.
+# Chris Joakim, 3Cloud/Cognizant, 2026
+
+DEFAULT_MAX_CONCURRENCY = 4  # concurrent batch uploads
+DEFAULT_MAX_RETRIES = 5
+DEFAULT_BACKOFF_SECONDS = 1.0
+MAX_BACKOFF_SECONDS = 60.0
+
+# request and per-document status codes that may succeed if retried; see
+# https://learn.microsoft.com/en-us/rest/api/searchservice/addupdate-or-delete-documents
+RETRYABLE_REQUEST_STATUS_CODES = (429, 502, 503, 504)
+RETRYABLE_DOCUMENT_STATUS_CODES = (409, 422, 429, 503)
+
+
+class AISearchAsyncUtil:
+    def __init__(self, opts: dict = {}):
+        self.api_version = os.getenv("AZURE_AI_SEARCH_VERSION")
+        self.base_url = os.getenv("AZURE_AI_SEARCH_URL")
+        self.service_key = os.getenv("AZURE_AI_SEARCH_KEY")
+        self.headers = {"Content-Type": "application/json", "api-key": self.service_key}
+        self._opts = opts
+        self._http_client = None
+        self._semaphore = asyncio.Semaphore(opts.get("max_concurrency", DEFAULT_MAX_CONCURRENCY))
+        self.request_count = 0
+        self.retry_count = 0
+        self.encoder = PayloadEncoder.from_opts(opts)
+        self.batcher = AdaptiveBatcher(size_func=self.encoder.document_size)
+
+    async def close(self) -> None:
+        """Close the pooled connections."""
+        if self._http_client is not None:
+            await self._http_client.aclose()
+            self._http_client = None
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, exc_type, exc_value, exc_traceback):
+        await self.close()
+
+    def get_http_client(self) -> httpx.AsyncClient:
+        """Return the keep-alive connection pool, configured by the opts as in AISearchUtil."""
+        if self._http_client is None:
+            max_connections = self._opts.get("max_connections", DEFAULT_MAX_CONCURRENCY * 2)
+            limits = httpx.Limits(
+                max_connections=max_connections,
+                max_keepalive_connections=max_connections,
+                keepalive_expiry=self._opts.get(
+                    "keepalive_expiry", DEFAULT_KEEPALIVE_EXPIRY_SECONDS
+                ),
+            )
+            timeout = httpx.Timeout(
+                self._opts.get("timeout", DEFAULT_TIMEOUT_SECONDS),
+                connect=self._opts.get("connect_timeout", DEFAULT_CONNECT_TIMEOUT_SECONDS),
+            )
+            http2 = self._opts.get("http2", True) and HTTP2_AVAILABLE
+            self._http_client = httpx.AsyncClient(limits=limits, timeout=timeout, http2=http2)
+        return self._http_client
+
+    async def add_documents_to_index(self, index_name: str, documents: list) -> httpx.Response:
+        """Upload one batch of documents, under the concurrency limit; return the response."""
+        url = f"{self.base_url}/indexes/{index_name}/docs/index?api-version={self.api_version}"
+        async with self._semaphore:
+            self.request_count = self.request_count + 1
+            return await self._post(url, self.encoder.encode_documents(documents), True)
+
+    async def search_index(self, idx_name: str, search_params: dict) -> dict | None:
+        """Return the response content of the given search parameters, or None on error."""
+        url = f"{self.base_url}/indexes/{idx_name}/docs/search?api-version={self.api_version}"
+        async with self._semaphore:
+            self.request_count = self.request_count + 1
+            response = await self._post(url, self.encoder.encode(search_params, False), False)
+        if response.status_code != 200:
+            logging.error(
+                "AISearchAsyncUtil - search_index status: {} {}".format(
+                    response.status_code, response.text
+                )
+            )
+            return None
+        return response.json()
+
+    async def load_documents(
+        self,
+        index_name: str,
+        documents: list,
+        batch_size: int = None,
+        max_bytes: int = None,
+        key_attr: str = "id",
+    ) -> dict:
+        """
+        Upload the given documents in concurrent batches of up to batch_size documents
+        and max_bytes of JSON, re-queuing the documents that failed with a transient
+        status up to max_retries times.  Return a dict of the counts, elapsed seconds,
+        and the statuses of the failed documents.
+        """
+        if batch_size is None:
+            batch_size = self._opts.get("batch_size", MAX_DOCUMENTS)
+        if max_bytes is None:
+            max_bytes = self._opts.get("batch_max_bytes", DEFAULT_MAX_BYTES)
+        self.batcher = AdaptiveBatcher(max_bytes, batch_size, self.encoder.document_size)
+        t1 = time.perf_counter()
+        stats = dict()
+        stats["documents"] = len(documents)
+        stats["batches"] = 0
+        stats["requests"] = 0
+        stats["succeeded"] = 0
+        stats["retried"] = 0
+        stats["failed"] = list()
+
+        async def upload_batches(batches):
+            for batch in batches:
+                stats["batches"] = stats["batches"] + 1
+                batch_stats = await self._load_batch(index_name, batch, key_attr)
+                for name in ("requests", "succeeded", "retried", "failed"):
+                    stats[name] = stats[name] + batch_stats[name]
+
+        # the workers share one generator, so each batch is sized with the current limits
+        batches = self.batcher.batches(documents)
+        workers = self._opts.get("max_concurrency", DEFAULT_MAX_CONCURRENCY)
+        try:
+            await asyncio.gather(*[upload_batches(batches) for _ in range(workers)])
+        finally:
+            self.encoder.clear_documents()
+        stats["elapsed_seconds"] = time.perf_counter() - t1
+        stats["docs_per_second"] = len(documents) / max(stats["elapsed_seconds"], 1e-9)
+        stats["batcher"] = self.batcher.stats()
+        stats["payload"] = self.encoder.stats()
+        if len(stats["failed"]) > 0:
+            logging.warning(
+                "AISearchAsyncUtil - {} of {} documents failed".format(
+                    len(stats["failed"]), len(documents)
+                )
+            )
+        return stats
+
+    async def _load_batch(self, index_name: str, batch: list, key_attr: str) -> dict:
+        """
+        Upload the given batch, then re-upload its transient failures until none remain,
+        re-batched with the batcher's limits, which shrink on throttling and timeouts.
+        """
+        max_retries = self._opts.get("max_retries", DEFAULT_MAX_RETRIES)
+        stats = {"requests": 0, "succeeded": 0, "retried": 0, "failed": list()}
+        attempt, pending = 0, [batch]
+        while len(pending) > 0:
+            batch = pending.pop(0)
+            stats["requests"] = stats["requests"] + 1
+            retry, retry_after = list(), None  # retry is a list of (document, status) pairs
+            try:
+                response = await self.add_documents_to_index(index_name, batch)
+            except httpx.TransportError as e:
+                logging.warning("AISearchAsyncUtil - upload error: {}".format(str(e)))
+                response = None
+                retry = [(doc, self._failed_status(doc, key_attr, None, str(e))) for doc in batch]
+                if isinstance(e, httpx.TimeoutException):
+                    self.batcher.record_throttle()
+            if response is None:
+                pass
+            elif response.status_code in (200, 201, 207):
+                docs_by_key = {str(doc.get(key_attr)): doc for doc in batch}
+                for status in response.json().get("value", list()):
+                    if status.get("status") is True:
+                        stats["succeeded"] = stats["succeeded"] + 1
+                    elif status.get("statusCode") in RETRYABLE_DOCUMENT_STATUS_CODES:
+                        doc = docs_by_key.get(str(status.get("key")))
+                        if doc is None:
+                            # such as a document without the key_attr; it cannot be re-queued
+                            logging.warning(
+                                "AISearchAsyncUtil - no document with key: {}".format(
+                                    status.get("key")
+                                )
+                            )
+                            stats["failed"].append(status)
+                        else:
+                            retry.append((doc, status))
+                    else:
+                        stats["failed"].append(status)
+                if len(retry) > 0:
+                    self.batcher.record_throttle()
+                else:
+                    self.batcher.record_success()
+            else:
+                code, message = response.status_code, response.text[:500]
+                statuses = [self._failed_status(doc, key_attr, code, message) for doc in batch]
+                if code in RETRYABLE_REQUEST_STATUS_CODES:
+                    retry = list(zip(batch, statuses))
+                    retry_after = self.retry_after_seconds(response.headers)
+                    self.batcher.record_throttle()
+                else:
+                    stats["failed"].extend(statuses)
+            if len(retry) > 0 and attempt >= max_retries:
+                stats["failed"].extend([status for _, status in retry])
+                retry = list()
+            if len(retry) > 0:
+                attempt = attempt + 1
+                self.retry_count = self.retry_count + 1
+                stats["retried"] = stats["retried"] + len(retry)
+                seconds = self.backoff_seconds(attempt) if retry_after is None else retry_after
+                logging.info(
+                    "AISearchAsyncUtil - retry {} of {} documents after {:.2f}s".format(
+                        attempt, len(retry), seconds
+                    )
+                )
+                await asyncio.sleep(seconds)
+                pending.extend(self.batcher.batches([doc for doc, _ in retry]))
+        return stats
+
+    async def _post(self, url: str, body: bytes, compressed: bool) -> httpx.Response:
+        headers = {**self.headers, **self.encoder.headers(compressed)}
+        return await self.get_http_client().post(url, headers=headers, content=body)
+
+    def backoff_seconds(self, attempt: int) -> float:
+        """Return the exponential backoff, with jitter, before the given retry attempt."""
+        base = self._opts.get("backoff_seconds", DEFAULT_BACKOFF_SECONDS)
+        seconds = min(MAX_BACKOFF_SECONDS, base * (2 ** (attempt - 1)))
+        return seconds * random.uniform(0.5, 1.0)
+
+    def retry_after_seconds(self, headers) -> float | None:
+        try:
+            return float(headers.get("retry-after-ms")) / 1000.0
+        except:
+            pass
+        try:
+            return float(headers.get("retry-after"))
+        except:
+            return None
+
+    def _failed_status(self, doc: dict, key_attr: str, status_code: int, message: str) -> dict:
+        status = dict()
+        status["key"] = doc.get(key_attr)
+        status["status"] = False
+        status["errorMessage"] = message
+        status["statusCode"] = status_code
+        return status
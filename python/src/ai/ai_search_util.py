@@ -1,3 +1,4 @@
+import importlib.util
 import json
 import os
 import logging
@@ -5,14 +6,33 @@ import traceback
 
 import httpx
 
+from src.io.payload_encoder import PayloadEncoder
 from src.os.env import Env
 
 # This class is used to invoke Azure AI Search via HTTP.
+# All requests share one long-lived httpx.Client, a keep-alive connection
+# pool, so that only the first request to the service pays for the TCP and
+# TLS handshakes.  HTTP/2 is used if the optional h2 package is installed;
+# see "pip install httpx[http2]".  Use the class as a context manager, or
+# call close(), to close the pooled connections.  Request bodies are encoded
+# with a PayloadEncoder, configured by the float_digits, gzip, and orjson opts;
+# see payload_stats() for the bytes sent.  Only the document upload requests
+# are gzip-compressed; see COMPRESSED_REQUEST_FUNCTIONS.
 # Chris Joakim, 3Cloud/Cognizant, 2026
 
+DEFAULT_MAX_CONNECTIONS = 20
+DEFAULT_KEEPALIVE_EXPIRY_SECONDS = 60.0
+DEFAULT_TIMEOUT_SECONDS = 60.0
+DEFAULT_CONNECT_TIMEOUT_SECONDS = 10.0
+
+HTTP2_AVAILABLE = importlib.util.find_spec("h2") is not None
+
+# the _http_request function names whose bodies are compressed with the gzip opt
+COMPRESSED_REQUEST_FUNCTIONS = ("add_document_to_index",)
+
 
 class AISearchUtil:
-    def __init__(self, verbose: bool = False):
+    def __init__(self, verbose: bool = False, opts: dict = {}):
         self.service_name = os.getenv("AZURE_AI_SEARCH_NAME")
         self.service_key = os.getenv("AZURE_AI_SEARCH_KEY")
         self.api_version = os.getenv("AZURE_AI_SEARCH_VERSION")
@@ -22,6 +42,10 @@ class AISearchUtil:
         self.cosmos_conn_str = os.getenv("AZURE_COSMOSDB_NOSQL_RO_CONN_STR")
 
         self.headers = {"Content-Type": "application/json", "api-key": self.service_key}
+        self._opts = opts
+        self._http_client = None
+        self.request_count = 0
+        self.encoder = PayloadEncoder.from_opts(opts)
 
         if True:
             print(f"AISearchUtil initialized; service_name: {self.service_name}")
@@ -30,6 +54,45 @@ class AISearchUtil:
             print(f"AISearchUtil initialized; base_url:     {self.base_url}")
             print(f"AISearchUtil initialized; headers:      {self.headers}")
 
+    def close(self) -> None:
+        """Close the pooled connections; a later request opens a new pool."""
+        if self._http_client is not None:
+            self._http_client.close()
+            self._http_client = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, exc_traceback):
+        self.close()
+
+    def payload_stats(self) -> dict:
+        """Return the bytes of the request bodies before trimming and compression, and as sent."""
+        return self.encoder.stats()
+
+    def get_http_client(self) -> httpx.Client:
+        """
+        Return the keep-alive connection pool shared by all requests, creating it on
+        first use.  The opts max_connections, keepalive_expiry, timeout, connect_timeout,
+        and http2 (default True, if h2 is installed) configure it.
+        """
+        if self._http_client is None:
+            max_connections = self._opts.get("max_connections", DEFAULT_MAX_CONNECTIONS)
+            limits = httpx.Limits(
+                max_connections=max_connections,
+                max_keepalive_connections=max_connections,
+                keepalive_expiry=self._opts.get(
+                    "keepalive_expiry", DEFAULT_KEEPALIVE_EXPIRY_SECONDS
+                ),
+            )
+            timeout = httpx.Timeout(
+                self._opts.get("timeout", DEFAULT_TIMEOUT_SECONDS),
+                connect=self._opts.get("connect_timeout", DEFAULT_CONNECT_TIMEOUT_SECONDS),
+            )
+            http2 = self._opts.get("http2", True) and HTTP2_AVAILABLE
+            self._http_client = httpx.Client(limits=limits, timeout=timeout, http2=http2)
+        return self._http_client
+
     def add_document_to_index(self, index_name: str, document: dict) -> dict | None:
         try:
             url = f"{self.base_url}/indexes/{index_name}/docs/index?api-version={self.api_version}"
@@ -270,23 +333,31 @@ class AISearchUtil:
 
     def _http_request(self, function_name: str, method: str, url: str, headers={}, json_body={}):
         try:
-            with httpx.Client() as client:
-                if headers is None:
-                    headers = self.headers
-                if headers == {}:
-                    headers = self.headers
+            client = self.get_http_client()
+            if headers is None:
+                headers = self.headers
+            if headers == {}:
+                headers = self.headers
+            if json_body is None or json_body == {}:
                 response = client.request(method, url, headers=headers, json=json_body)
-                print(f"response.status_code: {response.status_code}")
-                data = dict()
-                data["url"] = url
-                data["method"] = method
-                data["headers"] = headers
-                data["status_code"] = response.status_code
-                data["content"] = None
-                if response.content is not None:
-                    if len(response.content) > 0:
-                        data["content"] = response.json()
-                return data
+            else:
+                compress = function_name in COMPRESSED_REQUEST_FUNCTIONS
+                headers = {**headers, **self.encoder.headers(compress)}
+                body = self.encoder.encode(json_body, compress)
+                response = client.request(method, url, headers=headers, content=body)
+            self.request_count = self.request_count + 1
+            print(f"response.status_code: {response.status_code}")
+            data = dict()
+            data["url"] = url
+            data["method"] = method
+            data["headers"] = headers
+            data["status_code"] = response.status_code
+            data["http_version"] = response.http_version
+            data["content"] = None
+            if response.content is not None:
+                if len(response.content) > 0:
+                    data["content"] = response.json()
+            return data
         except Exception as e:
             logging.error(f"Exception in {function_name}: {str(e)}")
             traceback.print_stack()
@@ -0,0 +1,116 @@
+import logging
+
+import openai
+
+from src.util.token_bucket import TokenBucket
+
+# This class paces Azure OpenAI requests to the tokens-per-minute (TPM)
+# and requests-per-minute (RPM) quota of a deployment.  Each request first
+# acquires its estimated token count, such as from TokenCounter, and one
+# request from a pair of token buckets.  The token bucket is then corrected
+# with the actual usage of the response, and 429 (rate limited) responses
+# are retried after the retry-after-ms or retry-after header value.
+# One instance is shared by all of the concurrent tasks of a deployment.
+# Chris Joakim, 3Cloud/Cognizant, 2026
+
+RETRY_AFTER_MS_HEADER = "retry-after-ms"
+RETRY_AFTER_HEADER = "retry-after"
+
+# Azure OpenAI enforces the quota over short intervals, not whole minutes,
+# so the buckets hold at most this many seconds of the per-minute rates.
+BURST_SECONDS = 10.0
+
+# Azure OpenAI assigns 6 RPM per 1000 TPM of quota
+RPM_PER_1000_TPM = 6.0
+
+
+class AOAIRateLimiter:
+    def __init__(
+        self, tokens_per_minute: float, requests_per_minute: float = None, max_retries: int = 9
+    ):
+        self.tokens_per_minute = float(tokens_per_minute)
+        if requests_per_minute is None:
+            requests_per_minute = self.tokens_per_minute * RPM_PER_1000_TPM / 1000.0
+        self.requests_per_minute = float(requests_per_minute)
+        self.max_retries = int(max_retries)
+        tps, rps = self.tokens_per_minute / 60.0, self.requests_per_minute / 60.0
+        self.token_bucket = TokenBucket(tps, capacity=tps * BURST_SECONDS)
+        self.request_bucket = TokenBucket(rps, capacity=max(1.0, rps * BURST_SECONDS))
+        self.request_count = 0
+        self.throttled_count = 0
+        self.estimated_tokens = 0
+        self.total_tokens = 0
+        logging.info(
+            "AOAIRateLimiter - constructor, tpm: {}, rpm: {}".format(
+                self.tokens_per_minute, self.requests_per_minute
+            )
+        )
+
+    async def execute(self, func, estimated_tokens: int, **kwargs):
+        """
+        Invoke the given async client method, such as embeddings.create, with
+        the given keyword args under the TPM and RPM budgets.  Rate limited
+        requests are retried up to max_retries times; other errors are raised
+        to the caller.
+        """
+        attempt = 0
+        while True:
+            await self.request_bucket.acquire(1)
+            await self.token_bucket.acquire(estimated_tokens)
+            self.request_count = self.request_count + 1
+            self.estimated_tokens = self.estimated_tokens + estimated_tokens
+            try:
+                result = await func(**kwargs)
+                self.record(estimated_tokens, result)
+                return result
+            except openai.RateLimitError as e:
+                # a rate limited request consumes no tokens
+                self.token_bucket.debit(-estimated_tokens)
+                if attempt >= self.max_retries:
+                    raise
+                attempt = attempt + 1
+                self.throttled_count = self.throttled_count + 1
+                seconds = self.retry_after_seconds(e.response.headers)
+                self.token_bucket.pause(seconds)
+                self.request_bucket.pause(seconds)
+                logging.info(
+                    "AOAIRateLimiter - throttled, retry {} after {}s".format(attempt, seconds)
+                )
+
+    def record(self, estimated_tokens: int, result) -> None:
+        """Correct the token bucket with the actual usage of the response, if present."""
+        usage = getattr(result, "usage", None)
+        if usage is None or getattr(usage, "total_tokens", None) is None:
+            self.total_tokens = self.total_tokens + estimated_tokens
+            return
+        self.token_bucket.debit(usage.total_tokens - estimated_tokens)
+        self.total_tokens = self.total_tokens + usage.total_tokens
+
+    def record_usage(self, estimated_tokens: int, total_tokens: int) -> None:
+        """
+        Correct the token bucket with usage that arrives after the response,
+        such as in the final chunk of a streamed completion.
+        """
+        self.token_bucket.debit(total_tokens - estimated_tokens)
+        self.total_tokens = self.total_tokens + (total_tokens - estimated_tokens)
+
+    def retry_after_seconds(self, headers) -> float:
+        try:
+            return float(headers.get(RETRY_AFTER_MS_HEADER)) / 1000.0
+        except:
+            pass
+        try:
+            return float(headers.get(RETRY_AFTER_HEADER))
+        except:
+            return 1.0
+
+    def stats(self) -> dict:
+        data = dict()
+        data["tokens_per_minute"] = self.tokens_per_minute
+        data["requests_per_minute"] = self.requests_per_minute
+        data["request_count"] = self.request_count
+        data["throttled_count"] = self.throttled_count
+        data["estimated_tokens"] = self.estimated_tokens
+        data["total_tokens"] = self.total_tokens
+        data["wait_seconds"] = self.token_bucket.wait_seconds + self.request_bucket.wait_seconds
+        return data
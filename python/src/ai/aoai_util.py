@@ -1,6 +1,7 @@
 import asyncio
 import sys
 import os
+import time
 import traceback
 
 from pprint import pprint
@@ -8,100 +9,405 @@ from pprint import pprint
 from docopt import docopt
 from dotenv import load_dotenv
 
+import httpx
 import openai
 from openai import OpenAI
 from openai import AzureOpenAI
+from openai import AsyncAzureOpenAI
 from openai.types import CreateEmbeddingResponse
 from openai.types.chat.chat_completion import ChatCompletion
 
+from src.ai.aoai_rate_limiter import AOAIRateLimiter
+from src.ai.completion_cache import CompletionCache
+from src.ai.completion_stream import CompletionStream
+from src.ai.embedding_cache import EmbeddingCache
+from src.ai.token_counter import TokenCounter
 from src.io.fs import FS
+from src.os.env import Env
 
 # This Python module defines a class `AOAIUtil` that encapsulates operations
 # on the Azure OpenAI service.
 # Chris Joakim, 3Cloud/Cognizant, 2026
 
+# Azure OpenAI embeddings request limits
+EMBEDDINGS_MAX_INPUTS = 2048  # inputs per request
+EMBEDDINGS_MAX_REQUEST_TOKENS = 300000  # total tokens per request
+EMBEDDINGS_MAX_INPUT_TOKENS = 8191  # tokens per input
+
+DEFAULT_MAX_CONCURRENCY = 16  # concurrent requests per AOAIUtil instance
+DEFAULT_MAX_CONNECTIONS = 64
+DEFAULT_TIMEOUT_SECONDS = 60.0
+
+# the output tokens assumed by the rate limiter before a completion's usage is known
+DEFAULT_COMPLETION_TOKENS_ESTIMATE = 1000
+
 
 class AOAIUtil:
-    def __init__(self):
+    def __init__(self, opts={}):
+        """
+        The clients are the async AsyncAzureOpenAI clients, which share one
+        httpx connection pool.  Optional opts: max_concurrency (the number of
+        requests in flight), max_connections, and timeout (seconds).
+        With opts embedding_cache_dir, embeddings are cached on disk; see
+        EmbeddingCache and the embedding_cache_size and embedding_dimensions opts.
+        With opts completion_cache True, completions are cached; see CompletionCache
+        and the completion_cache_size, completion_cache_ttl, completion_cache_similarity,
+        and completion_cache_file (loaded here, saved by close()) opts.
+        The deployments whose AZURE_OPENAI_EMBEDDINGS_TPM or AZURE_OPENAI_COMPLETIONS_TPM
+        environment variable is set are rate limited; see enable_rate_limiter().
+        """
+        self._opts = opts
         self.embeddings_client = None
         self.completions_client = None
+        self._http_client = None
+        self._semaphore = asyncio.Semaphore(opts.get("max_concurrency", DEFAULT_MAX_CONCURRENCY))
+        self._limiters = dict()  # "embeddings" or "completions" -> AOAIRateLimiter
+        tpm_quotas = dict()
+        tpm_quotas["embeddings"] = Env.azure_openai_embeddings_tpm()
+        tpm_quotas["completions"] = Env.azure_openai_completions_tpm()
+        for deployment_type, tokens_per_minute in tpm_quotas.items():
+            if tokens_per_minute is not None:
+                self.enable_rate_limiter(deployment_type, float(tokens_per_minute))
+        self._embedding_cache = None
+        if "embedding_cache_dir" in opts:
+            self._embedding_cache = EmbeddingCache(
+                opts["embedding_cache_dir"],
+                opts.get("embedding_dimensions", 1536),
+                opts.get("embedding_cache_size", 100000),
+            )
+        self._completion_cache = None
+        if opts.get("completion_cache", False):
+            self._completion_cache = CompletionCache(
+                opts.get("completion_cache_size", 1000),
+                opts.get("completion_cache_ttl", 86400.0),
+                opts.get("completion_cache_similarity", None),
+            )
+            if "completion_cache_file" in opts:
+                self._completion_cache.load(opts["completion_cache_file"])
 
-    async def generate_completion(self, system_context: str, user_prompt: str) -> object | None:
-        try:
-            await asyncio.sleep(0.01)
+    async def close(self):
+        """Close the clients and their shared connection pool."""
+        for client in (self.embeddings_client, self.completions_client):
+            if client is not None and hasattr(client, "close"):
+                await client.close()
+        if self._http_client is not None:
+            await self._http_client.aclose()
+        self.embeddings_client, self.completions_client, self._http_client = None, None, None
+        if self._embedding_cache is not None:
+            self._embedding_cache.flush()
+        if self._completion_cache is not None and "completion_cache_file" in self._opts:
+            self._completion_cache.save(self._opts["completion_cache_file"])
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, exc_type, exc_value, exc_traceback):
+        await self.close()
+
+    def enable_rate_limiter(
+        self,
+        deployment_type: str,
+        tokens_per_minute: float,
+        requests_per_minute: float = None,
+        max_retries: int = 9,
+    ) -> AOAIRateLimiter:
+        """
+        Pace the requests to the "embeddings" or "completions" deployment to
+        its TPM and RPM quota; the RPM defaults to 6 per 1000 TPM.  Rate
+        limited (429) requests are retried after the retry-after header value,
+        rather than by the openai client.  Call this before the first request.
+        """
+        limiter = AOAIRateLimiter(tokens_per_minute, requests_per_minute, max_retries)
+        self._limiters[deployment_type] = limiter
+        return limiter
+
+    def rate_limiter_stats(self, deployment_type: str) -> dict | None:
+        if deployment_type not in self._limiters:
+            return None
+        return self._limiters[deployment_type].stats()
+
+    async def _request(
+        self, deployment_type: str, func, estimated_tokens: int, use_semaphore=True, **kwargs
+    ):
+        """Invoke the given client method within max_concurrency and the rate limiter, if any."""
+
+        async def call(**kw):
+            if not use_semaphore:
+                return await func(**kw)
+            async with self._semaphore:
+                return await func(**kw)
+
+        limiter = self._limiters.get(deployment_type)
+        if limiter is None:
+            return await call(**kwargs)
+        return await limiter.execute(call, estimated_tokens, **kwargs)
+
+    def _client_max_retries(self, deployment_type: str) -> int:
+        # the rate limiter, if any, retries throttled requests; openai's default is 2
+        return 0 if deployment_type in self._limiters else openai.DEFAULT_MAX_RETRIES
+
+    def get_http_client(self) -> httpx.AsyncClient:
+        """Return the keep-alive connection pool shared by the embeddings and completions clients."""
+        if self._http_client is None:
+            max_connections = self._opts.get("max_connections", DEFAULT_MAX_CONNECTIONS)
+            limits = httpx.Limits(
+                max_connections=max_connections, max_keepalive_connections=max_connections
+            )
+            timeout = httpx.Timeout(self._opts.get("timeout", DEFAULT_TIMEOUT_SECONDS))
+            self._http_client = httpx.AsyncClient(limits=limits, timeout=timeout)
+        return self._http_client
+
+    def get_completions_client(self):
+        """Return the completions client, creating it on first use."""
+        if self.completions_client is None:
             url = os.getenv("AZURE_OPENAI_COMPLETIONS_URL")
             key = os.getenv("AZURE_OPENAI_COMPLETIONS_KEY")
             dep = os.getenv("AZURE_OPENAI_COMPLETIONS_DEP")
             vers = os.getenv("AZURE_OPENAI_COMPLETIONS_VERSION")
+            print("Lazy-initializing the completions client")
+            print(f"url: {url}")
+            #print(f"key: {key}")
+            print(f"version: {vers}")
+            print(f"deployment: {dep}")
+            self.completions_client = AsyncAzureOpenAI(
+                api_key=key,
+                api_version=vers,
+                azure_endpoint=url,
+                http_client=self.get_http_client(),
+                max_retries=self._client_max_retries("completions"),
+            )
+        return self.completions_client
 
-            if self.completions_client is None:
-                print("Lazy-initializing the completions client")
-                print(f"url: {url}")
-                #print(f"key: {key}")
-                print(f"version: {vers}")
-                print(f"deployment: {dep}")
-                self.completions_client = AzureOpenAI(
-                    api_key=key, api_version=vers, azure_endpoint=url
-                )
-
-            # response = self.completions_client.chat.completions.create(
-            #     messages=[
-            #         {
-            #             "role": "system",
-            #             "content": "You are a helpful assistant.",
-            #         },
-            #         {
-            #             "role": "user",
-            #             "content": "I am going to Paris, what should I see?",
-            #         }
-            #     ],
-            #     max_completion_tokens=16384,
-            #     model=dep
-            # )
-
-            completion = self.completions_client.chat.completions.create(
+    async def generate_completion(
+        self, system_context: str, user_prompt: str, **params
+    ) -> ChatCompletion | None:
+        """
+        Return the ChatCompletion for the given system context and user prompt, or
+        None.  The optional params, such as temperature, are passed to the request.
+        Completions are read from, and added to, the completion cache if enabled.
+        """
+        try:
+            dep = os.getenv("AZURE_OPENAI_COMPLETIONS_DEP")
+            cache, embedding = self._completion_cache, None
+            if cache is not None:
+                completion = cache.lookup_exact(dep, system_context, user_prompt, params)
+                if completion is not None:
+                    return completion
+                if cache.semantic():
+                    # embed the prompt only on an exact miss; put() reuses the embedding
+                    embedding = await self.generate_embeddings(user_prompt)
+                completion = cache.lookup(dep, system_context, user_prompt, params, embedding)
+                if completion is not None:
+                    return completion
+            client = self.get_completions_client()
+            completion = await self._request(
+                "completions",
+                client.chat.completions.create,
+                self._estimate_completion_tokens(system_context, user_prompt),
                 model=dep,  # MUST be the deployment name, not necessarily the model name
-                messages=[
-                    {"role": "system", "content": system_context},
-                    {"role": "user", "content": user_prompt},
-                ],
+                messages=self._completion_messages(system_context, user_prompt),
+                **params,
             )
+            if cache is not None:
+                cache.put(dep, system_context, user_prompt, params, completion, embedding)
+            return completion
+        except Exception as e:
+            print(f"Error generate_completion: {e}")
+            return None
 
-            print("=== completion type ===")
-            print(str(type(completion)))
+    def completion_cache_stats(self) -> dict | None:
+        if self._completion_cache is None:
+            return None
+        return self._completion_cache.stats()
 
-            print("=== message ===")
-            print(completion.choices[0].message)
+    def stream_completion(self, system_context: str, user_prompt: str) -> CompletionStream:
+        """
+        Return a CompletionStream of the completion for the given system context
+        and user prompt.  Iterate it with 'async for' to receive the content deltas;
+        then its 'completion' attribute is the assembled ChatCompletion, and its
+        metrics() are the time-to-first-token, latency, and token usage.
+        """
+        return CompletionStream(self._completion_chunks(system_context, user_prompt))
 
-            print("=== content ===")
-            print(completion.choices[0].message.content)
-            # Mickey Mantle wore the uniform number 7 for the New York Yankees throughout his Hall of Fame career.
+    async def _completion_chunks(self, system_context: str, user_prompt: str):
+        dep = os.getenv("AZURE_OPENAI_COMPLETIONS_DEP")
+        client = self.get_completions_client()
+        estimated_tokens = self._estimate_completion_tokens(system_context, user_prompt)
+        # the semaphore is held until the stream is consumed, not only while it is opened
+        async with self._semaphore:
+            stream = await self._request(
+                "completions",
+                client.chat.completions.create,
+                estimated_tokens,
+                False,
+                model=dep,
+                messages=self._completion_messages(system_context, user_prompt),
+                stream=True,
+                stream_options={"include_usage": True},  # a final chunk with the usage
+            )
+            async for chunk in stream:
+                if chunk.usage is not None and "completions" in self._limiters:
+                    self._limiters["completions"].record_usage(
+                        estimated_tokens, chunk.usage.total_tokens
+                    )
+                yield chunk
 
-            print("=== model_dump_json ===")
-            print(completion.model_dump_json(indent=2))
+    def _completion_messages(self, system_context: str, user_prompt: str) -> list:
+        return [
+            {"role": "system", "content": system_context},
+            {"role": "user", "content": user_prompt},
+        ]
 
-        except Exception as e:
-            print(f"Error generate_completion: {e}")
-            return None
+    def _estimate_completion_tokens(self, system_context: str, user_prompt: str) -> int:
+        tokens = TokenCounter.count(system_context) + TokenCounter.count(user_prompt)
+        return tokens + DEFAULT_COMPLETION_TOKENS_ESTIMATE
 
     async def generate_embeddings(self, text: str) -> list[float] | None:
         try:
-            await asyncio.sleep(0.01)
-            url = os.getenv("AZURE_OPENAI_EMBEDDINGS_URL")
-            key = os.getenv("AZURE_OPENAI_EMBEDDINGS_KEY")
             dep = os.getenv("AZURE_OPENAI_EMBEDDINGS_DEP")
-            vers = os.getenv("AZURE_OPENAI_EMBEDDINGS_VERSION")
-
-            if self.embeddings_client is None:
-                print("Lazy-initializing the embeddings client")
-                print(f"url: {url}")
-                #print(f"key: {key}")
-                print(f"version: {vers}")
-                print(f"deployment: {dep}")
-                self.embeddings_client = AzureOpenAI(
-                    api_key=key, api_version=vers, azure_endpoint=url
-                )
-            return self.embeddings_client.embeddings.create(input=text, model=dep).data[0].embedding
+            if self._embedding_cache is not None:
+                embedding = self._embedding_cache.get(dep, text)
+                if embedding is not None:
+                    return embedding
+            client = self.get_embeddings_client()
+            response = await self._request(
+                "embeddings",
+                client.embeddings.create,
+                TokenCounter.count(text),
+                input=text,
+                model=dep,
+            )
+            embedding = response.data[0].embedding
+            if self._embedding_cache is not None:
+                self._embedding_cache.put(dep, text, embedding)
+            return embedding
         except Exception as e:
             print(f"Error generate_embeddings: {e}")
             return None
+
+    async def generate_embeddings_batch(
+        self,
+        texts: list,
+        max_inputs: int = EMBEDDINGS_MAX_INPUTS,
+        max_tokens: int = EMBEDDINGS_MAX_REQUEST_TOKENS,
+        truncate: bool = False,
+    ) -> dict:
+        """
+        Generate the embeddings of the given list of texts, packing as many
+        texts into each request as the max_inputs and max_tokens limits allow.
+        Return a dict with the 'embeddings' and the 'errors' in input order
+        (None for a failed input, or for a successful one, respectively),
+        the success and failure counts, request count, total tokens, and
+        elapsed seconds.  Texts over the per-input token limit fail, or are
+        truncated if truncate is True.  Cached embeddings are not requested.
+        """
+        start = time.perf_counter()
+        dep = os.getenv("AZURE_OPENAI_EMBEDDINGS_DEP")
+        embeddings, errors = [None] * len(texts), [None] * len(texts)
+        stats = {"request_count": 0, "total_tokens": 0, "cache_hits": 0}
+        chunks, chunk, chunk_tokens = list(), list(), 0
+        for idx, text in enumerate(texts):
+            if not isinstance(text, str) or len(text.strip()) == 0:
+                errors[idx] = "empty input"
+                continue
+            if self._embedding_cache is not None:
+                embeddings[idx] = self._embedding_cache.get(dep, text)
+                if embeddings[idx] is not None:
+                    stats["cache_hits"] = stats["cache_hits"] + 1
+                    continue
+            tokens = TokenCounter.count(text)
+            if tokens > EMBEDDINGS_MAX_INPUT_TOKENS:
+                if not truncate:
+                    errors[idx] = "input has {} tokens; the limit is {}".format(
+                        tokens, EMBEDDINGS_MAX_INPUT_TOKENS
+                    )
+                    continue
+                text = TokenCounter.truncate(text, EMBEDDINGS_MAX_INPUT_TOKENS)
+                tokens = EMBEDDINGS_MAX_INPUT_TOKENS
+            if len(chunk) > 0:
+                if len(chunk) >= max_inputs or chunk_tokens + tokens > max_tokens:
+                    chunks.append(chunk)
+                    chunk, chunk_tokens = list(), 0
+            chunk.append((idx, text, tokens))
+            chunk_tokens = chunk_tokens + tokens
+        if len(chunk) > 0:
+            chunks.append(chunk)
+
+        # the chunks are embedded concurrently, up to the max_concurrency of this instance
+        await asyncio.gather(
+            *[self._embed_chunk(chunk, embeddings, errors, stats) for chunk in chunks]
+        )
+        if self._embedding_cache is not None:
+            # cached by the original, rather than the truncated, text
+            for chunk in chunks:
+                for idx, _, _ in chunk:
+                    if embeddings[idx] is not None:
+                        self._embedding_cache.put(dep, texts[idx], embeddings[idx])
+
+        results = dict()
+        results["embeddings"] = embeddings
+        results["errors"] = errors
+        results["success_count"] = len([e for e in embeddings if e is not None])
+        results["failure_count"] = len(texts) - results["success_count"]
+        results["request_count"] = stats["request_count"]
+        results["total_tokens"] = stats["total_tokens"]
+        results["cache_hits"] = stats["cache_hits"]
+        results["elapsed"] = time.perf_counter() - start
+        return results
+
+    async def _embed_chunk(self, chunk: list, embeddings: list, errors: list, stats: dict):
+        """
+        Embed one chunk of (input index, text, tokens) tuples in one request.  If the
+        request is rejected as invalid, the chunk is split in halves and
+        retried, to isolate the failing inputs from the valid ones.
+        """
+        dep = os.getenv("AZURE_OPENAI_EMBEDDINGS_DEP")
+        try:
+            client = self.get_embeddings_client()
+            stats["request_count"] = stats["request_count"] + 1
+            response = await self._request(
+                "embeddings",
+                client.embeddings.create,
+                sum([tokens for _, _, tokens in chunk]),
+                input=[text for _, text, _ in chunk],
+                model=dep,
+            )
+            for item in response.data:
+                embeddings[chunk[item.index][0]] = item.embedding
+            if response.usage is not None:
+                stats["total_tokens"] = stats["total_tokens"] + response.usage.total_tokens
+        except openai.BadRequestError as e:
+            if len(chunk) == 1:
+                errors[chunk[0][0]] = str(e)
+            else:
+                half = len(chunk) // 2
+                await self._embed_chunk(chunk[:half], embeddings, errors, stats)
+                await self._embed_chunk(chunk[half:], embeddings, errors, stats)
+        except Exception as e:
+            print(f"Error generate_embeddings_batch: {e}")
+            for idx, _, _ in chunk:
+                errors[idx] = str(e)
+
+    def embedding_cache_stats(self) -> dict | None:
+        if self._embedding_cache is None:
+            return None
+        return self._embedding_cache.stats()
+
+    def get_embeddings_client(self):
+        """Return the embeddings client, creating it on first use."""
+        if self.embeddings_client is None:
+            url = os.getenv("AZURE_OPENAI_EMBEDDINGS_URL")
+            key = os.getenv("AZURE_OPENAI_EMBEDDINGS_KEY")
+            vers = os.getenv("AZURE_OPENAI_EMBEDDINGS_VERSION")
+            print("Lazy-initializing the embeddings client")
+            print(f"url: {url}")
+            print(f"version: {vers}")
+            print(f"deployment: {os.getenv('AZURE_OPENAI_EMBEDDINGS_DEP')}")
+            self.embeddings_client = AsyncAzureOpenAI(
+                api_key=key,
+                api_version=vers,
+                azure_endpoint=url,
+                http_client=self.get_http_client(),
+                max_retries=self._client_max_retries("embeddings"),
+            )
+        return self.embeddings_client
@@ -0,0 +1,209 @@
+import hashlib
+import json
+import os
+import time
+
+from collections import OrderedDict
+
+import numpy as np
+
+from openai.types.chat import ChatCompletion
+
+from src.io.fs import FS
+
+# This class implements a size-bounded LRU cache of chat completions, keyed
+# by the sha256 hash of (deployment, system_context, user_prompt, params).
+# Entries expire after ttl_seconds.  With a similarity_threshold, a lookup
+# that misses the exact key falls back to a nearest-neighbor search of the
+# cached user prompt embeddings with the same deployment, system_context,
+# and params, and returns the completion of the most similar prompt if its
+# cosine similarity is at least the threshold.  The cache can be saved to,
+# and loaded from, a JSON file so that it survives re-runs.
+# Chris Joakim, 3Cloud/Cognizant, 2026
+
+
+class CompletionCache:
+    def __init__(
+        self,
+        max_entries: int = 1000,
+        ttl_seconds: float = 86400.0,
+        similarity_threshold: float = None,
+    ):
+        self.max_entries = int(max_entries)
+        self.ttl_seconds = float(ttl_seconds)
+        self.similarity_threshold = similarity_threshold
+        self._entries = OrderedDict()  # key -> dict with completion, scope, embedding, expires
+        self.hits = 0
+        self.semantic_hits = 0
+        self.misses = 0
+        self.expired = 0
+        self.evictions = 0
+        self.tokens_saved = 0
+
+    @classmethod
+    def key(cls, deployment: str, system_context: str, user_prompt: str, params: dict) -> str:
+        content = json.dumps([deployment, system_context, user_prompt, params], sort_keys=True)
+        return hashlib.sha256(content.encode("utf-8")).hexdigest()
+
+    @classmethod
+    def scope(cls, deployment: str, system_context: str, params: dict) -> str:
+        """Return the key of the entries that semantic lookups may match; all but the user prompt."""
+        return cls.key(deployment, system_context, None, params)
+
+    def semantic(self) -> bool:
+        return self.similarity_threshold is not None
+
+    def lookup(
+        self,
+        deployment: str,
+        system_context: str,
+        user_prompt: str,
+        params: dict,
+        embedding: list = None,
+    ) -> ChatCompletion | None:
+        """
+        Return the cached completion of the given request, or None.  If an embedding
+        of the user prompt is given, and a similarity_threshold set, the completion
+        of the most similar cached prompt is returned if the exact key misses.
+        """
+        key = self.key(deployment, system_context, user_prompt, params)
+        entry = self._fresh_entry(key)
+        if entry is None and embedding is not None and self.semantic():
+            entry = self._nearest_entry(self.scope(deployment, system_context, params), embedding)
+            if entry is not None:
+                self.semantic_hits = self.semantic_hits + 1
+        if entry is None:
+            self.misses = self.misses + 1
+            return None
+        return self._hit(entry)
+
+    def lookup_exact(
+        self, deployment: str, system_context: str, user_prompt: str, params: dict
+    ) -> ChatCompletion | None:
+        """
+        Return the cached completion of the exact request, or None without counting
+        a miss; a semantic lookup() with the prompt embedding may follow a None.
+        """
+        entry = self._fresh_entry(self.key(deployment, system_context, user_prompt, params))
+        if entry is None:
+            return None
+        return self._hit(entry)
+
+    def put(
+        self,
+        deployment: str,
+        system_context: str,
+        user_prompt: str,
+        params: dict,
+        completion: ChatCompletion,
+        embedding: list = None,
+    ) -> None:
+        """Add or replace the given completion, evicting the least recently used if full."""
+        key = self.key(deployment, system_context, user_prompt, params)
+        entry = dict()
+        entry["completion"] = completion
+        entry["scope"] = self.scope(deployment, system_context, params)
+        entry["embedding"] = None if embedding is None else self._normalized(embedding)
+        entry["expires"] = time.time() + self.ttl_seconds
+        self._entries[key] = entry
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self.evictions = self.evictions + 1
+
+    def clear(self) -> None:
+        self._entries.clear()
+
+    def size(self) -> int:
+        return len(self._entries)
+
+    def save(self, outfile: str) -> None:
+        entries = list()
+        for key, entry in self._entries.items():
+            if entry["expires"] > time.time():
+                data = dict()
+                data["key"] = key
+                data["scope"] = entry["scope"]
+                data["expires"] = entry["expires"]
+                data["completion"] = entry["completion"].model_dump(mode="json")
+                embedding = entry["embedding"]
+                data["embedding"] = None if embedding is None else embedding.tolist()
+                entries.append(data)
+        FS.write_json(entries, outfile, pretty=False, verbose=False)
+
+    def load(self, infile: str) -> None:
+        """Load the unexpired entries of the given file, if it exists."""
+        if not os.path.isfile(infile):
+            return
+        for data in FS.read_json(infile) or list():
+            if data["expires"] > time.time():
+                entry = dict()
+                entry["completion"] = ChatCompletion.model_validate(data["completion"])
+                entry["scope"] = data["scope"]
+                entry["expires"] = data["expires"]
+                embedding = data["embedding"]
+                entry["embedding"] = None if embedding is None else self._normalized(embedding)
+                self._entries[data["key"]] = entry
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def stats(self) -> dict:
+        data = dict()
+        data["size"] = self.size()
+        data["max_entries"] = self.max_entries
+        data["ttl_seconds"] = self.ttl_seconds
+        data["similarity_threshold"] = self.similarity_threshold
+        data["hits"] = self.hits
+        data["semantic_hits"] = self.semantic_hits
+        data["misses"] = self.misses
+        data["expired"] = self.expired
+        data["evictions"] = self.evictions
+        data["tokens_saved"] = self.tokens_saved
+        lookups = self.hits + self.misses
+        data["hit_rate"] = 0.0 if lookups == 0 else self.hits / lookups
+        return data
+
+    def _hit(self, entry: dict) -> ChatCompletion:
+        self.hits = self.hits + 1
+        completion = entry["completion"]
+        if completion.usage is not None:
+            self.tokens_saved = self.tokens_saved + completion.usage.total_tokens
+        return completion
+
+    def _fresh_entry(self, key: str) -> dict | None:
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        if entry["expires"] <= time.time():
+            del self._entries[key]
+            self.expired = self.expired + 1
+            return None
+        self._entries.move_to_end(key)
+        return entry
+
+    def _nearest_entry(self, scope: str, embedding: list) -> dict | None:
+        """Return the fresh entry in scope most similar to the embedding, if above the threshold."""
+        keys, vectors, expired_keys, now = list(), list(), list(), time.time()
+        for key, entry in self._entries.items():
+            if entry["scope"] != scope or entry["embedding"] is None:
+                continue
+            if entry["expires"] <= now:
+                expired_keys.append(key)  # not a candidate, so a fresh match is not missed
+            else:
+                keys.append(key)
+                vectors.append(entry["embedding"])
+        for key in expired_keys:
+            del self._entries[key]
+            self.expired = self.expired + 1
+        if len(keys) == 0:
+            return None
+        similarities = np.vstack(vectors) @ self._normalized(embedding)
+        best = int(np.argmax(similarities))
+        if float(similarities[best]) < self.similarity_threshold:
+            return None
+        return self._fresh_entry(keys[best])
+
+    def _normalized(self, embedding: list) -> np.ndarray:
+        vector = np.asarray(embedding, dtype=np.float32)
+        norm = np.linalg.norm(vector)
+        return vector if norm == 0 else vector / norm
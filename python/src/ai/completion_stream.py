@@ -0,0 +1,87 @@
+import time
+
+from openai.types.chat import ChatCompletion
+from openai.types.chat.chat_completion import Choice
+from openai.types.chat.chat_completion_message import ChatCompletionMessage
+
+# This class wraps a streamed chat completion.  Iterate it with 'async for'
+# to receive the content deltas as they arrive; afterwards, the assembled
+# ChatCompletion is in the 'completion' attribute and the time-to-first-token,
+# total latency, and token usage are returned by metrics().
+# See AOAIUtil.stream_completion().
+# Chris Joakim, 3Cloud/Cognizant, 2026
+
+
+class CompletionStream:
+    def __init__(self, chunks):
+        """The given chunks is an async iterable of ChatCompletionChunk objects."""
+        self._chunks = chunks
+        self.completion = None
+        self.ttft_ms = None  # milliseconds to the first content delta
+        self.latency_ms = None
+        self.chunk_count = 0
+        self._id, self._model, self._created, self._usage = None, None, None, None
+        self._contents = dict()  # choice index -> list of content deltas
+        self._finish_reasons = dict()  # choice index -> finish_reason
+
+    def __aiter__(self):
+        return self._deltas()
+
+    async def _deltas(self):
+        start = time.perf_counter()
+        async for chunk in self._chunks:
+            self.chunk_count = self.chunk_count + 1
+            self._id = chunk.id or self._id
+            self._model = chunk.model or self._model
+            self._created = chunk.created or self._created
+            if chunk.usage is not None:
+                self._usage = chunk.usage
+            for choice in chunk.choices:
+                if choice.finish_reason is not None:
+                    self._finish_reasons[choice.index] = choice.finish_reason
+                content = choice.delta.content if choice.delta is not None else None
+                if content:
+                    if self.ttft_ms is None:
+                        self.ttft_ms = (time.perf_counter() - start) * 1000.0
+                    self._contents.setdefault(choice.index, list()).append(content)
+                    if choice.index == 0:
+                        yield content
+        self.latency_ms = (time.perf_counter() - start) * 1000.0
+        self.completion = self._assemble()
+
+    def _assemble(self) -> ChatCompletion:
+        choices = list()
+        for index in sorted(set(self._contents.keys()) | set(self._finish_reasons.keys())):
+            message = ChatCompletionMessage(
+                role="assistant", content="".join(self._contents.get(index, list()))
+            )
+            choices.append(
+                Choice(
+                    index=index,
+                    message=message,
+                    finish_reason=self._finish_reasons.get(index, "stop"),
+                )
+            )
+        return ChatCompletion(
+            id=self._id or "",
+            choices=choices,
+            created=self._created or int(time.time()),
+            model=self._model or "",
+            object="chat.completion",
+            usage=self._usage,
+        )
+
+    def content(self) -> str | None:
+        if self.completion is None or len(self.completion.choices) == 0:
+            return None
+        return self.completion.choices[0].message.content
+
+    def metrics(self) -> dict:
+        data = dict()
+        data["ttft_ms"] = self.ttft_ms
+        data["latency_ms"] = self.latency_ms
+        data["chunk_count"] = self.chunk_count
+        data["prompt_tokens"] = None if self._usage is None else self._usage.prompt_tokens
+        data["completion_tokens"] = None if self._usage is None else self._usage.completion_tokens
+        data["total_tokens"] = None if self._usage is None else self._usage.total_tokens
+        return data
@@ -0,0 +1,197 @@
+import hashlib
+import logging
+import os
+import re
+import unicodedata
+
+from collections import OrderedDict
+
+import numpy as np
+
+from src.io.fs import FS
+
+# This class is a persistent, content-addressed cache of embeddings.  The
+# key is the sha256 hash of the deployment name and the normalized text.
+# The vectors are stored as float32 rows of a memory-mapped matrix file,
+# and a JSON index maps each key to its row (slot), in LRU order.  When
+# max_entries is reached the least recently used entry is evicted and
+# its slot reused.  Call flush() or close() to persist the index.  Each
+# row's key is also tagged in a parallel memory-mapped file, and checked
+# on get(), so that an index left stale by a crash, which may map an
+# evicted key to a since reused row, yields a miss rather than the
+# embedding of another text.
+# Chris Joakim, 3Cloud/Cognizant, 2026
+
+MATRIX_FILENAME = "embeddings.f32"
+KEY_TAGS_FILENAME = "embeddings.keys"
+INDEX_FILENAME = "embeddings_index.json"
+
+INITIAL_SLOTS = 1024
+
+
+class EmbeddingCache:
+    def __init__(self, cache_dir: str, dimensions: int = 1536, max_entries: int = 100000):
+        self.cache_dir = cache_dir
+        self.dimensions = int(dimensions)
+        self.max_entries = int(max_entries)
+        self.matrix_file = "{}/{}".format(cache_dir, MATRIX_FILENAME)
+        self.index_file = "{}/{}".format(cache_dir, INDEX_FILENAME)
+        self.key_tags_file = "{}/{}".format(cache_dir, KEY_TAGS_FILENAME)
+        self.entries = OrderedDict()  # key -> slot, least recently used first
+        self.free_slots = list()  # the unused slots of the matrix
+        self.hits = 0
+        self.misses = 0
+        self.puts = 0
+        self.evictions = 0
+        self.stale = 0
+        self._matrix = None
+        self._key_tags = None
+        os.makedirs(cache_dir, exist_ok=True)
+        self._load()
+
+    @classmethod
+    def normalize(cls, text: str) -> str:
+        """Return the text in Unicode NFC form, with whitespace runs collapsed and trimmed."""
+        return re.sub(r"\s+", " ", unicodedata.normalize("NFC", text)).strip()
+
+    @classmethod
+    def key(cls, deployment: str, text: str) -> str:
+        content = "{}\n{}".format(deployment or "", cls.normalize(text))
+        return hashlib.sha256(content.encode("utf-8")).hexdigest()
+
+    @classmethod
+    def key_tag(cls, key: str) -> int:
+        """Return the nonzero 64-bit tag of the given key, stored with its row."""
+        return int(key[:16], 16) or 1
+
+    def get(self, deployment: str, text: str) -> list[float] | None:
+        """Return the cached embedding of the given text, or None."""
+        key = self.key(deployment, text)
+        slot = self.entries.get(key)
+        if slot is None:
+            self.misses = self.misses + 1
+            return None
+        if int(self._key_tags[slot]) != self.key_tag(key):
+            logging.info("EmbeddingCache - stale index entry; the row was reused")
+            del self.entries[key]
+            if slot not in self.entries.values():
+                self.free_slots.append(slot)
+            self.stale = self.stale + 1
+            self.misses = self.misses + 1
+            return None
+        self.hits = self.hits + 1
+        self.entries.move_to_end(key)
+        return self._matrix[slot].tolist()
+
+    def put(self, deployment: str, text: str, embedding: list) -> None:
+        if embedding is None or len(embedding) != self.dimensions:
+            logging.info(
+                "EmbeddingCache - not cached; expected {} dimensions".format(self.dimensions)
+            )
+            return
+        key = self.key(deployment, text)
+        if key not in self.entries:
+            self.entries[key] = self._allocate_slot()
+        self.entries.move_to_end(key)
+        slot = self.entries[key]
+        self._key_tags[slot] = 0  # a row being overwritten matches no key
+        self._matrix[slot] = np.asarray(embedding, dtype=np.float32)
+        self._key_tags[slot] = self.key_tag(key)
+        self.puts = self.puts + 1
+
+    def size(self) -> int:
+        return len(self.entries)
+
+    def stats(self) -> dict:
+        data = dict()
+        data["size"] = self.size()
+        data["max_entries"] = self.max_entries
+        data["dimensions"] = self.dimensions
+        data["slots"] = 0 if self._matrix is None else self._matrix.shape[0]
+        data["hits"] = self.hits
+        data["misses"] = self.misses
+        data["puts"] = self.puts
+        data["evictions"] = self.evictions
+        data["stale"] = self.stale
+        lookups = self.hits + self.misses
+        data["hit_rate"] = 0.0 if lookups == 0 else self.hits / lookups
+        return data
+
+    def flush(self) -> None:
+        """Write the matrix pages and the index to disk."""
+        if self._matrix is not None:
+            self._matrix.flush()
+            self._key_tags.flush()
+        index = dict()
+        index["dimensions"] = self.dimensions
+        index["slots"] = 0 if self._matrix is None else self._matrix.shape[0]
+        index["entries"] = list(self.entries.items())
+        index["free_slots"] = self.free_slots
+        FS.write_json(index, self.index_file, pretty=False, verbose=False)
+
+    def close(self) -> None:
+        self.flush()
+        self._matrix = None
+        self._key_tags = None
+
+    def clear(self) -> None:
+        """Delete all entries; the matrix file keeps its size for reuse."""
+        self.free_slots.extend(self.entries.values())
+        self.entries = OrderedDict()
+
+    def _load(self) -> None:
+        index = FS.read_json(self.index_file)
+        if index is not None and not os.path.isfile(self.matrix_file):
+            index = None
+        if index is not None and not os.path.isfile(self.key_tags_file):
+            logging.info("EmbeddingCache - no key tags file; the cache is reset")
+            index = None
+        if index is None or index.get("dimensions") != self.dimensions:
+            if index is not None:
+                logging.info("EmbeddingCache - dimensions changed; the cache is reset")
+            slots = min(INITIAL_SLOTS, self.max_entries)
+            self._resize(slots, reset=True)
+            self.free_slots = list(range(slots - 1, -1, -1))
+            return
+        self.entries = OrderedDict([(key, slot) for key, slot in index["entries"]])
+        self.free_slots = index["free_slots"]
+        self._resize(index["slots"])
+        while len(self.entries) > self.max_entries:
+            self._evict()
+
+    def _resize(self, slots: int, reset: bool = False) -> None:
+        """
+        (Re)open the matrix and key tags files as memmaps of the given number of rows,
+        growing the files.
+        """
+        if self._matrix is not None:
+            self._matrix.flush()
+            self._key_tags.flush()
+            self._matrix, self._key_tags = None, None
+        self._matrix = self._open_memmap(
+            self.matrix_file, np.float32, (slots, self.dimensions), reset
+        )
+        self._key_tags = self._open_memmap(self.key_tags_file, np.uint64, (slots,), reset)
+
+    def _open_memmap(self, filename: str, dtype, shape: tuple, reset: bool) -> np.memmap:
+        mode = "w+" if reset or not os.path.isfile(filename) else "r+"
+        if mode == "r+":
+            with open(filename, "r+b") as f:
+                f.truncate(int(np.prod(shape)) * np.dtype(dtype).itemsize)
+        return np.memmap(filename, dtype=dtype, mode=mode, shape=shape)
+
+    def _allocate_slot(self) -> int:
+        if len(self.entries) >= self.max_entries:
+            self._evict()
+        elif len(self.free_slots) == 0:
+            slots = self._matrix.shape[0]
+            new_slots = min(self.max_entries, max(slots * 2, INITIAL_SLOTS))
+            self._resize(new_slots)
+            self.free_slots = list(range(new_slots - 1, slots - 1, -1))
+        return self.free_slots.pop()
+
+    def _evict(self) -> None:
+        """Evict the least recently used entry, freeing its slot."""
+        _, slot = self.entries.popitem(last=False)
+        self.free_slots.append(slot)
+        self.evictions = self.evictions + 1
@@ -0,0 +1,52 @@
+import logging
+import math
+
+import tiktoken
+
+# This class counts the tokens of texts with tiktoken, for packing batched
+# embeddings requests and for estimating the token usage of requests
+# before they are sent.  tiktoken downloads its encoding files on first
+# use; if that is not possible, a conservative estimate of one token per
+# three characters is used instead.
+# Chris Joakim, 3Cloud/Cognizant, 2026
+
+DEFAULT_ENCODING = "cl100k_base"  # text-embedding-3-* and text-embedding-ada-002
+
+ESTIMATED_CHARS_PER_TOKEN = 3.0
+
+
+class TokenCounter:
+    _encodings = dict()  # encoding name -> tiktoken.Encoding, or None if unavailable
+
+    @classmethod
+    def encoding(cls, encoding_name: str = DEFAULT_ENCODING):
+        """Return the cached tiktoken encoding, or None if it cannot be loaded."""
+        if encoding_name not in cls._encodings:
+            try:
+                cls._encodings[encoding_name] = tiktoken.get_encoding(encoding_name)
+            except Exception as e:
+                logging.critical(
+                    "TokenCounter - encoding {} unavailable, estimating: {}".format(
+                        encoding_name, str(e)
+                    )
+                )
+                cls._encodings[encoding_name] = None
+        return cls._encodings[encoding_name]
+
+    @classmethod
+    def count(cls, text: str, encoding_name: str = DEFAULT_ENCODING) -> int:
+        encoding = cls.encoding(encoding_name)
+        if encoding is None:
+            return int(math.ceil(len(text) / ESTIMATED_CHARS_PER_TOKEN))
+        return len(encoding.encode(text, disallowed_special=()))
+
+    @classmethod
+    def truncate(cls, text: str, max_tokens: int, encoding_name: str = DEFAULT_ENCODING) -> str:
+        """Return the given text, truncated to at most max_tokens tokens."""
+        encoding = cls.encoding(encoding_name)
+        if encoding is None:
+            return text[: int(max_tokens * ESTIMATED_CHARS_PER_TOKEN)]
+        tokens = encoding.encode(text, disallowed_special=())
+        if len(tokens) <= max_tokens:
+            return text
+        return encoding.decode(tokens[:max_tokens])
@@ -0,0 +1,158 @@
+import logging
+import os
+import time
+
+from urllib.parse import quote
+
+import polars as pl
+
+from src.io.fs import FS
+
+# Instances of this class maintain a local snapshot of a Cosmos DB
+# container, kept current by reading only the new and updated documents
+# from the container's change feed.  The change feed continuation token
+# is saved on disk after each page, so a sync resumes where the previous
+# one stopped.  The snapshot is either one JSON file per document, or a
+# single columnar (Parquet) file.  Documents are keyed by their partition
+# key and id, since an id is unique only within its logical partition.
+# Each sync also writes a delta manifest listing the changed documents, so
+# that downstream steps such as main-search.py direct_load_index can
+# process just the deltas; see read_delta_documents().
+# Chris Joakim, 3Cloud/Cognizant, 2026
+
+STATE_FILENAME = "_change_feed_state.json"
+DELTA_FILENAME = "_delta.json"
+PARQUET_FILENAME = "snapshot.parquet"
+
+# Cosmos DB system properties which are not part of the application document
+SYSTEM_ATTRIBUTES = ["_rid", "_self", "_etag", "_attachments", "_ts", "_lsn"]
+
+
+class ChangeFeedSnapshot:
+    def __init__(self, snapshot_dir: str, format: str = "json", pk_attr: str = "pk"):
+        if format not in ("json", "parquet"):
+            raise ValueError("unsupported snapshot format: {}".format(format))
+        self.snapshot_dir = snapshot_dir
+        self.format = format
+        self.pk_attr = pk_attr
+        self.state_file = "{}/{}".format(snapshot_dir, STATE_FILENAME)
+        self.delta_file = "{}/{}".format(snapshot_dir, DELTA_FILENAME)
+        self.parquet_file = "{}/{}".format(snapshot_dir, PARQUET_FILENAME)
+        os.makedirs(snapshot_dir, exist_ok=True)
+
+    def read_state(self) -> dict:
+        state = FS.read_json(self.state_file)
+        if state is None:
+            state = {"continuation_token": None, "sync_count": 0, "last_sync": None}
+        return state
+
+    def read_delta(self) -> dict | None:
+        """Return the delta manifest of the most recent sync, or None."""
+        return FS.read_json(self.delta_file)
+
+    def read_delta_documents(self) -> list:
+        """Return the documents changed in the most recent sync, in either snapshot format."""
+        delta = self.read_delta()
+        if delta is None:
+            return list()
+        if delta["format"] == "json":
+            docs = list()
+            for file in delta["files"]:
+                doc = FS.read_json("{}/{}".format(self.snapshot_dir, file))
+                if isinstance(doc, dict):
+                    docs.append(doc)
+            return docs
+        keys = set([(pk, id) for pk, id in delta["keys"]])
+        docs = list()
+        for row in pl.read_parquet(self.parquet_file).to_dicts():
+            if self.document_key(row) in keys:
+                # drop the null columns of the other documents' attributes
+                docs.append({k: v for k, v in row.items() if v is not None})
+        return docs
+
+    async def sync(self, cosmos_util, max_item_count: int = 100) -> dict:
+        """
+        Apply the changes since the last sync from the change feed of the
+        current container of the given CosmosNoSqlUtil to this snapshot.
+        Return the delta manifest, which is also written to _delta.json.
+        """
+        start = time.perf_counter()
+        state = self.read_state()
+        token = state["continuation_token"]
+        changed = dict()  # (pk, id) -> document; a later version replaces an earlier one
+        async for page in cosmos_util.change_feed_pages(token, max_item_count=max_item_count):
+            docs = [self.application_document(doc) for doc in page["items"]]
+            for doc in docs:
+                changed[self.document_key(doc)] = doc
+            if self.format == "json":
+                # apply each page before saving its token, so a crash loses nothing
+                for doc in docs:
+                    FS.write_json(
+                        doc,
+                        self.document_filename(doc["id"], doc.get(self.pk_attr)),
+                        sort_keys=False,
+                        verbose=False,
+                    )
+                state["continuation_token"] = page["continuation_token"] or token
+                FS.write_json(state, self.state_file, verbose=False)
+            else:
+                token = page["continuation_token"] or token
+
+        if self.format == "parquet":
+            # the parquet file is rewritten once per sync, then the token is saved
+            self.merge_parquet(list(changed.values()))
+            state["continuation_token"] = token
+
+        state["sync_count"] = state["sync_count"] + 1
+        state["last_sync"] = time.time()
+        FS.write_json(state, self.state_file, verbose=False)
+
+        delta = dict()
+        delta["format"] = self.format
+        delta["sync_count"] = state["sync_count"]
+        delta["keys"] = sorted(changed.keys(), key=lambda k: (str(k[0]), str(k[1])))
+        delta["ids"] = [id for _, id in delta["keys"]]
+        if self.format == "json":
+            delta["files"] = [
+                os.path.basename(self.document_filename(id, pk)) for pk, id in delta["keys"]
+            ]
+        else:
+            delta["files"] = [PARQUET_FILENAME]
+        delta["elapsed"] = time.perf_counter() - start
+        FS.write_json(delta, self.delta_file, verbose=False)
+        logging.info(
+            "ChangeFeedSnapshot - {} changed documents in {}".format(
+                len(delta["keys"]), self.snapshot_dir
+            )
+        )
+        return delta
+
+    def merge_parquet(self, docs: list) -> None:
+        """Replace or add the given documents in the snapshot parquet file."""
+        if len(docs) == 0:
+            return
+        changes = pl.DataFrame(docs, infer_schema_length=None)
+        if os.path.isfile(self.parquet_file):
+            existing = pl.read_parquet(self.parquet_file)
+            attrs = [a for a in (self.pk_attr, "id") if a in existing.columns and a in changes]
+            keys = [pl.col(attr).cast(pl.String) for attr in attrs]
+            existing = existing.join(
+                changes, left_on=keys, right_on=keys, how="anti", nulls_equal=True
+            )
+            changes = pl.concat([existing, changes], how="diagonal_relaxed")
+        changes.write_parquet(self.parquet_file)
+
+    def document_key(self, doc: dict) -> tuple:
+        """Return the (pk, id) of the given document."""
+        return (doc.get(self.pk_attr), doc["id"])
+
+    def document_filename(self, id: str, pk: str = None) -> str:
+        """Return the snapshot filename of the given document, such as pypi@fastapi.json."""
+        safe_id = quote(str(id), safe="")
+        if pk is not None:
+            safe_id = "{}@{}".format(quote(str(pk), safe=""), safe_id)
+        return "{}/{}.json".format(self.snapshot_dir, safe_id)
+
+    def application_document(self, doc: dict) -> dict:
+        """Return the given change feed document without the Cosmos DB system properties."""
+        return {k: v for k, v in doc.items() if k not in SYSTEM_ATTRIBUTES}
@@ -0,0 +1,132 @@
+import logging
+import os
+
+from contextlib import asynccontextmanager
+
+from azure.cosmos.aio import CosmosClient
+from azure.identity import DefaultAzureCredential
+
+from src.db.local_cosmos import LocalCosmosClient
+from src.os.env import Env
+
+# This class is a process-wide registry of Azure Cosmos DB NoSQL API
+# clients, keyed by account URI and credential mode (authtype), so that
+# long-running processes create each CosmosClient, its credential (and
+# token fetch), and its database and container proxies only once.
+# Container proxies are worth reusing, as each one reads the container
+# properties on its first operation.
+# Chris Joakim, 3Cloud/Cognizant, 2026
+
+
+class CosmosClientRegistry:
+    _clients = dict()  # (uri, authtype) -> CosmosClient
+    _credentials = dict()  # (uri, authtype) -> credential
+    _db_proxies = dict()  # (uri, authtype, dbname) -> DatabaseProxy
+    _ctr_proxies = dict()  # (uri, authtype, dbname, cname) -> ContainerProxy
+
+    @classmethod
+    def authtype(cls) -> str:
+        """Return the AZURE_COSMOSDB_NOSQL_AUTHTYPE, such as 'key' or 'local'."""
+        return os.getenv("AZURE_COSMOSDB_NOSQL_AUTHTYPE")
+
+    @classmethod
+    def uri(cls, authtype: str) -> str:
+        if authtype == "local":
+            return "local"
+        if authtype == "key":
+            return os.getenv("AZURE_COSMOSDB_NOSQL_URI")
+        return Env.azure_cosmosdb_nosql_uri()
+
+    @classmethod
+    def create_client(cls, authtype: str):
+        """Return a new (client, credential) tuple for the given authtype; not registered."""
+        if authtype == "local":
+            # in-memory stand-in for offline development and benchmarking
+            return LocalCosmosClient(), None
+        uri = cls.uri(authtype)
+        if authtype == "key":
+            key = os.getenv("AZURE_COSMOSDB_NOSQL_KEY")
+            logging.debug("CosmosClientRegistry#uri: {}".format(uri))
+            return CosmosClient(uri, key), None
+        credential = DefaultAzureCredential()
+        # credential info is injected into the runtime environment
+        return CosmosClient(uri, credential=credential), credential
+
+    @classmethod
+    def get_client(cls, authtype: str = None):
+        """
+        Return the shared client for the given (or current) authtype, creating it once.
+        There is no await between the lookup and the creation, so concurrent
+        tasks on the event loop cannot create duplicate clients.
+        """
+        if authtype is None:
+            authtype = cls.authtype()
+        registry_key = (cls.uri(authtype), authtype)
+        if registry_key not in cls._clients:
+            client, credential = cls.create_client(authtype)
+            cls._clients[registry_key] = client
+            cls._credentials[registry_key] = credential
+            logging.info("CosmosClientRegistry - client created: {}".format(registry_key))
+        return cls._clients[registry_key]
+
+    @classmethod
+    def get_database_proxy(cls, client, dbname: str):
+        """Return the shared DatabaseProxy of the given registered client."""
+        proxy_key = cls._client_key(client) + (dbname,)
+        if proxy_key not in cls._db_proxies:
+            cls._db_proxies[proxy_key] = client.get_database_client(dbname)
+        return cls._db_proxies[proxy_key]
+
+    @classmethod
+    def get_container_proxy(cls, client, dbname: str, cname: str):
+        """Return the shared ContainerProxy of the given registered client."""
+        proxy_key = cls._client_key(client) + (dbname, cname)
+        if proxy_key not in cls._ctr_proxies:
+            dbproxy = cls.get_database_proxy(client, dbname)
+            cls._ctr_proxies[proxy_key] = dbproxy.get_container_client(cname)
+        return cls._ctr_proxies[proxy_key]
+
+    @classmethod
+    def is_registered(cls, client) -> bool:
+        return client in cls._clients.values()
+
+    @classmethod
+    def size(cls) -> int:
+        return len(cls._clients)
+
+    @classmethod
+    async def close_all(cls) -> None:
+        """Close all registered clients and credentials, and clear the registry."""
+        clients, credentials = dict(cls._clients), dict(cls._credentials)
+        cls._clients.clear()
+        cls._credentials.clear()
+        cls._db_proxies.clear()
+        cls._ctr_proxies.clear()
+        for registry_key, client in clients.items():
+            try:
+                await client.close()
+                credential = credentials.get(registry_key)
+                if credential is not None and hasattr(credential, "close"):
+                    credential.close()
+                logging.info("CosmosClientRegistry - client closed: {}".format(registry_key))
+            except Exception as e:
+                logging.critical(str(e))
+
+    @classmethod
+    @asynccontextmanager
+    async def session(cls):
+        """
+        Async context manager for the lifecycle of the shared clients:
+        async with CosmosClientRegistry.session(): ... closes them all on exit.
+        """
+        try:
+            yield cls
+        finally:
+            await cls.close_all()
+
+    @classmethod
+    def _client_key(cls, client) -> tuple:
+        for registry_key, registered in cls._clients.items():
+            if registered is client:
+                return registry_key
+        raise ValueError("client is not registered")
@@ -1,15 +1,19 @@
 import asyncio
 import logging
 import os
+import time
 import traceback
 
 from azure.cosmos import ThroughputProperties
-from azure.cosmos.aio import CosmosClient
+from azure.cosmos.exceptions import CosmosHttpResponseError
 from azure.cosmos.partition_key import PartitionKey
-from azure.identity import DefaultAzureCredential
 
+from src.db.cosmos_client_registry import CosmosClientRegistry
+from src.db.cosmos_telemetry import CosmosTelemetry
+from src.db.point_read_cache import PointReadCache
+from src.db.ru_rate_limiter import RURateLimiter
 from src.io.fs import FS
-from src.os.env import Env
+from src.io.payload_encoder import PayloadEncoder
 
 # This class is used to access a Azure Cosmos DB NoSQL API account
 # via the asynchronous SDK methods.
@@ -21,6 +25,12 @@ azure_logger.setLevel(logging.WARNING)
 
 LAST_REQUEST_CHARGE_HEADER = "x-ms-request-charge"
 
+# a transactional batch may contain at most 100 operations
+MAX_BATCH_OPERATIONS = 100
+
+# the HTTP status code of a successful operation, for the telemetry
+SUCCESS_STATUS_CODES = {"create_item": 201, "delete_item": 204}
+
 
 class CosmosNoSqlUtil:
     def __init__(self, opts={}):
@@ -30,34 +40,62 @@ class CosmosNoSqlUtil:
         self._ctrproxy = None
         self._cname = None
         self._client = None
+        self._credential = None
+        self._shared_client = False
+        self._limiter = None
+        self._last_headers = dict()
+        # per-operation RU and latency telemetry; may be shared by several instances
+        self._telemetry = opts.get("telemetry") or CosmosTelemetry()
+        self._point_read_cache = None
+        if "point_read_cache_size" in opts:
+            # optional LRU cache of point_read results; see point_read_cache_stats()
+            self._point_read_cache = PointReadCache(
+                opts["point_read_cache_size"], opts.get("point_read_cache_ttl", 60.0)
+            )
+        self._payload_encoder = None
+        if "float_digits" in opts:
+            # optional float trimming of the bulk loaded documents; see payload_stats()
+            self._payload_encoder = PayloadEncoder(
+                float_digits=opts["float_digits"], measure_json=opts.get("payload_stats", False)
+            )
         self._default_indexing_policy_filename = "cosmos/default_index.json"
         logging.info("CosmosNoSqlUtil - constructor")
 
     async def initialize(self):
-        """This method should be called after the above constructor."""
-        authtype = os.getenv("AZURE_COSMOSDB_NOSQL_AUTHTYPE")
+        """
+        This method should be called after the above constructor.
+        With opts["shared_client"] True, the process-wide client of the
+        CosmosClientRegistry is used instead of creating a new client.
+        """
+        authtype = CosmosClientRegistry.authtype()
         logging.info("CosmosNoSqlUtil#authtype: {}".format(authtype))
 
-        if authtype == "key":
-            logging.info("CosmosNoSqlUtil#initialize with key")
-            uri = os.getenv("AZURE_COSMOSDB_NOSQL_URI")
-            key = os.getenv("AZURE_COSMOSDB_NOSQL_KEY")
-            logging.debug("CosmosNoSqlUtil#uri: {}".format(uri))
-            logging.debug("CosmosNoSqlUtil#key: {}".format(key))
-            self._client = CosmosClient(uri, key)
-            logging.info("CosmosNoSqlUtil - initialize() with key completed")
+        if self._opts.get("shared_client", False):
+            self._client = CosmosClientRegistry.get_client(authtype)
+            self._shared_client = True
+            logging.info("CosmosNoSqlUtil - initialize() with shared client completed")
         else:
-            logging.info("CosmosNoSqlUtil#initialize with DefaultAzureCredential")
-            uri = Env.azure_cosmosdb_nosql_uri()
-            credential = DefaultAzureCredential()
-            # credential ino is injected into the runtime environment
-            self._client = CosmosClient(uri, credential=credential)
-            logging.info("CosmosNoSqlUtil - initialize() with DefaultAzureCredential completed")
+            self._client, self._credential = CosmosClientRegistry.create_client(authtype)
+            logging.info(
+                "CosmosNoSqlUtil - initialize() with authtype {} completed".format(authtype)
+            )
 
     async def close(self):
+        """Close the client; a shared client stays open until CosmosClientRegistry.close_all()."""
         if self._client is not None:
-            await self._client.close()
-            logging.info("CosmosNoSqlUtil - client closed")
+            if self._shared_client is False:
+                await self._client.close()
+                if self._credential is not None:
+                    self._credential.close()
+                logging.info("CosmosNoSqlUtil - client closed")
+            self._client = None
+
+    async def __aenter__(self):
+        await self.initialize()
+        return self
+
+    async def __aexit__(self, exc_type, exc_value, exc_traceback):
+        await self.close()
 
     async def create_database(self, dbname, db_level_throughput=0):
         created = False
@@ -77,7 +115,7 @@ class CosmosNoSqlUtil:
                 else:
                     await self._client.create_database(id=dbname)
                 logging.info("CosmosNoSqlUtil - database created: {}".format(dbname))
-                self.set_db(dbname)
+                await self.set_db(dbname)
                 created = True
         return created
 
@@ -175,7 +213,10 @@ class CosmosNoSqlUtil:
         """Set the current database to the given dbname."""
         await asyncio.sleep(0.01)
         self._dbname = dbname
-        self._dbproxy = self._client.get_database_client(dbname)
+        if self._shared_client:
+            self._dbproxy = CosmosClientRegistry.get_database_proxy(self._client, dbname)
+        else:
+            self._dbproxy = self._client.get_database_client(dbname)
         return self._dbproxy  # <class 'azure.cosmos.aio._database.DatabaseProxy'>
 
     async def get_current_dbname(self):
@@ -190,7 +231,13 @@ class CosmosNoSqlUtil:
         """Set the current container in the current database to the given cname."""
         await asyncio.sleep(0.01)
         self._cname = cname
-        self._ctrproxy = self._dbproxy.get_container_client(cname)
+        if self._shared_client:
+            self._ctrproxy = CosmosClientRegistry.get_container_proxy(
+                self._client, self._dbname, cname
+            )
+        else:
+            self._ctrproxy = self._dbproxy.get_container_client(cname)
+        self._limiter = None  # the RU budget is per-container; see enable_rate_limiter()
         return self._ctrproxy  # <class 'azure.cosmos.aio._container.ContainerProxy'>
 
     async def get_database_link(self):
@@ -227,22 +274,353 @@ class CosmosNoSqlUtil:
             container_list.append(container["id"])
         return container_list
 
+    async def enable_rate_limiter(self, ru_per_second: float = None, max_retries: int = 9):
+        """
+        Pace all operations on the current container to the given RU/s budget,
+        which defaults to the provisioned throughput of the container (or of
+        its database, if the throughput is shared).  Throttled (429) requests
+        are retried after the x-ms-retry-after-ms response header value.
+        """
+        if ru_per_second is None:
+            ru_per_second = await self.provisioned_throughput()
+        if ru_per_second is None or float(ru_per_second) <= 0:
+            logging.info("CosmosNoSqlUtil - rate limiter not enabled; unknown RU/s")
+            self._limiter = None
+        else:
+            self._limiter = RURateLimiter(ru_per_second, max_retries=max_retries)
+        return self._limiter
+
+    async def provisioned_throughput(self) -> int | None:
+        """Return the container or shared database RU/s, the autoscale max if autoscale."""
+        throughput = await self.get_container_throughput()
+        if throughput is None:
+            try:
+                throughput = await self.get_database_throughput()
+            except Exception as e:
+                logging.info("CosmosNoSqlUtil - no database throughput: {}".format(str(e)))
+        if throughput is not None:
+            if throughput.auto_scale_max_throughput:
+                return throughput.auto_scale_max_throughput
+            return throughput.offer_throughput
+        return None
+
+    def rate_limiter_stats(self) -> dict | None:
+        if self._limiter is None:
+            return None
+        return self._limiter.stats()
+
     async def point_read(self, id, pk):
-        return await self._ctrproxy.read_item(item=id, partition_key=pk)
+        if self._point_read_cache is not None:
+            return await self._cached_point_read(id, pk)
+        return await self._execute(
+            "point_read", self._ctrproxy.read_item, item=id, partition_key=pk
+        )
 
     async def create_item(self, doc):
-        return await self._ctrproxy.create_item(body=doc)
+        self._invalidate_cached_id(doc)
+        return await self._execute("create_item", self._ctrproxy.create_item, body=doc)
 
     async def upsert_item(self, doc):
-        return await self._ctrproxy.upsert_item(body=doc)
+        self._invalidate_cached_id(doc)
+        return await self._execute("upsert_item", self._ctrproxy.upsert_item, body=doc)
 
     async def delete_item(self, id, pk):
-        return await self._ctrproxy.delete_item(item=id, partition_key=pk)
+        cache = self._point_read_cache
+        if cache is not None:
+            cache.invalidate(cache.key(self._dbname, self._cname, pk, id))
+        return await self._execute(
+            "delete_item", self._ctrproxy.delete_item, item=id, partition_key=pk
+        )
+
+    def point_read_cache_stats(self) -> dict | None:
+        """Return the hit, miss, revalidation, and RU-saved counters of the point_read cache."""
+        if self._point_read_cache is None:
+            return None
+        return self._point_read_cache.stats()
+
+    async def _cached_point_read(self, id, pk):
+        """
+        Return a fresh cached document without a request.  A stale cached document
+        is revalidated with an If-None-Match conditional read, which returns an
+        empty 304 Not Modified response if the document is unchanged.
+        """
+        cache = self._point_read_cache
+        key = cache.key(self._dbname, self._cname, pk, id)
+        entry = cache.lookup(key)
+        if entry is not None and entry["fresh"]:
+            return entry["doc"]
+        headers = dict()
+        kwargs = dict()
+        kwargs["item"] = id
+        kwargs["partition_key"] = pk
+        kwargs["response_hook"] = lambda h, _: headers.update(h)
+        if entry is not None and entry["etag"] is not None:
+            kwargs["initial_headers"] = {"If-None-Match": entry["etag"]}
+        doc = await self._execute("point_read", self._ctrproxy.read_item, **kwargs)
+        if entry is not None and (doc is None or "id" not in doc):
+            return cache.revalidated(key, self._request_charge(headers))
+        cache.put(key, doc, self._request_charge(headers))
+        return doc
+
+    def _invalidate_cached_id(self, doc) -> None:
+        if self._point_read_cache is not None and isinstance(doc, dict):
+            self._point_read_cache.invalidate_id(self._dbname, self._cname, doc.get("id"))
+
+    async def bulk_upsert(self, docs, concurrency: int = 16) -> dict:
+        """
+        Upsert the given iterable of documents into the current container,
+        keeping up to 'concurrency' requests in flight at any time.
+        Return a dict with the per-document results (in input order),
+        the success and failure counts, the total RU charge, and the
+        elapsed seconds.
+        """
+        start = time.perf_counter()
+        doc_iterator = enumerate(self._trimmed_docs(docs))
+        results = list()
+
+        async def worker():
+            # the iterator is shared by all workers; next() never awaits
+            # so each document is taken by exactly one worker
+            for idx, doc in doc_iterator:
+                results.append(await self._upsert_with_result(idx, doc))
+
+        workers = [worker() for _ in range(max(1, int(concurrency)))]
+        await asyncio.gather(*workers)
+        results.sort(key=lambda r: r["idx"])
+
+        summary = dict()
+        summary["results"] = results
+        summary["success_count"] = len([r for r in results if r["success"]])
+        summary["failure_count"] = len(results) - summary["success_count"]
+        summary["total_ru"] = sum([r["ru"] for r in results])
+        summary["elapsed"] = time.perf_counter() - start
+        if self._payload_encoder is not None:
+            summary["payload"] = self.payload_stats()
+        return summary
+
+    async def bulk_batch_upsert(
+        self,
+        docs,
+        pkpath: str,
+        batch_size: int = MAX_BATCH_OPERATIONS,
+        concurrency: int = 8,
+    ) -> dict:
+        """
+        Group the given iterable of documents by their partition key value,
+        per the given pkpath such as '/pk' or '/country', split each group
+        into chunks of up to batch_size (max 100) operations, and execute
+        the chunks as transactional batches with up to 'concurrency' batches
+        in flight.  Return a dict with the per-batch results, the document
+        success and failure counts, the total RU charge, and elapsed seconds.
+        """
+        start = time.perf_counter()
+        batch_size = max(1, min(int(batch_size), MAX_BATCH_OPERATIONS))
+        batches = list()
+        for pk, group in self.group_by_partition_key(self._trimmed_docs(docs), pkpath).items():
+            for offset in range(0, len(group), batch_size):
+                batches.append((pk, group[offset : offset + batch_size]))
+
+        batch_iterator = enumerate(batches)
+        results = list()
+
+        async def worker():
+            for idx, (pk, chunk) in batch_iterator:
+                results.append(await self._execute_batch_with_result(idx, pk, chunk))
+
+        workers = [worker() for _ in range(max(1, int(concurrency)))]
+        await asyncio.gather(*workers)
+        results.sort(key=lambda r: r["idx"])
+
+        summary = dict()
+        summary["results"] = results
+        summary["batch_count"] = len(results)
+        summary["success_count"] = sum([r["count"] for r in results if r["success"]])
+        summary["failure_count"] = sum([r["count"] for r in results if not r["success"]])
+        summary["total_ru"] = sum([r["ru"] for r in results])
+        summary["elapsed"] = time.perf_counter() - start
+        if self._payload_encoder is not None:
+            summary["payload"] = self.payload_stats()
+        return summary
+
+    def payload_stats(self) -> dict | None:
+        """
+        Return the count of float trimmed bulk loaded documents, and with opts["payload_stats"]
+        their compact JSON bytes before and after trimming; the SDK's own encoding differs.
+        """
+        if self._payload_encoder is None:
+            return None
+        return self._payload_encoder.stats()
+
+    def _trimmed_docs(self, docs):
+        """Return the given documents, lazily float trimmed if opts["float_digits"] is set."""
+        if self._payload_encoder is None:
+            return docs
+        return map(self._payload_encoder.trim_document, docs)
+
+    @classmethod
+    def group_by_partition_key(cls, docs, pkpath: str) -> dict:
+        """Return a dict of partition key value -> list of documents."""
+        groups = dict()
+        for doc in docs:
+            pk = cls.partition_key_value(doc, pkpath)
+            if pk not in groups:
+                groups[pk] = list()
+            groups[pk].append(doc)
+        return groups
+
+    @classmethod
+    def partition_key_value(cls, doc: dict, pkpath: str):
+        """Return the value at the given pkpath (e.g. '/pk' or '/address/state') in doc."""
+        value = doc
+        for attr in pkpath.strip("/").split("/"):
+            if not isinstance(value, dict):
+                return None
+            value = value.get(attr)
+        return value
+
+    async def _execute_batch_with_result(self, idx: int, pk, docs: list) -> dict:
+        """Execute one transactional batch of upserts; capture its RU charge."""
+        headers = dict()
+        result = dict()
+        result["idx"] = idx
+        result["pk"] = pk
+        result["count"] = len(docs)
+        result["success"] = False
+        result["status_code"] = None
+        result["ru"] = 0.0
+        result["error"] = None
+        result["error_index"] = None
+        operations = [("upsert", (doc,)) for doc in docs]
+        for doc in docs:
+            self._invalidate_cached_id(doc)
+        try:
+            await self._execute(
+                "execute_item_batch",
+                self._ctrproxy.execute_item_batch,
+                batch_operations=operations,
+                partition_key=pk,
+                response_hook=lambda h, _: headers.update(h),
+            )
+            result["success"] = True
+        except Exception as e:
+            result["status_code"] = getattr(e, "status_code", None)
+            result["error"] = str(e)
+            result["error_index"] = getattr(e, "error_index", None)
+            headers.update(getattr(e, "headers", None) or {})
+        result["ru"] = self._request_charge(headers)
+        return result
+
+    async def _upsert_with_result(self, idx: int, doc: dict) -> dict:
+        """Upsert one document; capture its RU charge via a response_hook."""
+        self._invalidate_cached_id(doc)
+        headers = dict()
+        result = dict()
+        result["idx"] = idx
+        result["id"] = doc.get("id") if isinstance(doc, dict) else None
+        result["success"] = False
+        result["status_code"] = None
+        result["ru"] = 0.0
+        result["error"] = None
+        try:
+            await self._execute(
+                "upsert_item",
+                self._ctrproxy.upsert_item,
+                body=doc,
+                response_hook=lambda h, _: headers.update(h),
+            )
+            result["success"] = True
+        except Exception as e:
+            result["status_code"] = getattr(e, "status_code", None)
+            result["error"] = str(e)
+            headers.update(getattr(e, "headers", None) or {})
+        result["ru"] = self._request_charge(headers)
+        return result
+
+    async def _execute(self, op_name: str, func, **kwargs):
+        """Invoke the given ContainerProxy method, under the RU budget if enabled."""
+
+        async def timed(**call_kwargs):
+            # each attempt, including throttled ones, is recorded in the telemetry
+            return await self._timed_call(op_name, func, **call_kwargs)
+
+        if self._limiter is None:
+            return await timed(**kwargs)
+        return await self._limiter.execute(op_name, timed, **kwargs)
+
+    async def _timed_call(self, op_name: str, func, **kwargs):
+        caller_hook = kwargs.pop("response_hook", None)
+        headers = dict()
+
+        def hook(h, result):
+            headers.update(h)
+            if caller_hook is not None:
+                caller_hook(h, result)
+
+        start = time.perf_counter()
+        status_code = None  # such as when the call is cancelled
+        try:
+            result = await func(response_hook=hook, **kwargs)
+            status_code = SUCCESS_STATUS_CODES.get(op_name, 200)
+            return result
+        except CosmosHttpResponseError as e:
+            headers.update(e.headers or {})
+            status_code = e.status_code
+            raise
+        except Exception as e:
+            headers.update(getattr(e, "headers", None) or {})
+            status_code = getattr(e, "status_code", None)
+            raise
+        finally:
+            latency_ms = (time.perf_counter() - start) * 1000.0
+            self._last_headers = headers
+            self._telemetry.record(op_name, latency_ms, status_code, headers)
+
+    async def _query(self, op_name: str, **kwargs):
+        """
+        Return the AsyncItemPaged for ContainerProxy.query_items.  With the rate
+        limiter enabled the query waits for a positive RU balance, and the
+        charge of each page is debited from the budget as it is fetched.
+        """
+        if self._limiter is not None:
+            await self._limiter.bucket.acquire(1.0)
+        kwargs["response_hook"] = self._paged_hook(op_name, kwargs.get("query"))
+        return self._ctrproxy.query_items(**kwargs)
+
+    def _paged_hook(self, op_name: str, sql: str = None):
+        """
+        Return the response_hook of a paged query or change feed read, which
+        records each page in the telemetry and debits it from the RU budget.
+        The latency of a page is the time since the previous page arrived,
+        or since the query was created, so it includes the caller's
+        processing time between pages.
+        """
+        limiter_hook = None
+        if self._limiter is not None:
+            limiter_hook = self._limiter.paged_hook(op_name)
+        previous = [time.perf_counter()]
+
+        def hook(headers, result):
+            now = time.perf_counter()
+            latency_ms = (now - previous[0]) * 1000.0
+            previous[0] = now
+            self._last_headers = dict(headers)
+            self._telemetry.record(op_name, latency_ms, 200, headers, sql)
+            if limiter_hook is not None:
+                limiter_hook(headers, result)
+
+        return hook
+
+    def _request_charge(self, headers) -> float:
+        """Return the RU charge in the given response headers, or 0.0."""
+        try:
+            return float(headers.get(LAST_REQUEST_CHARGE_HEADER, 0.0))
+        except:
+            return 0.0
 
     async def count_documents(self):
         docs = list()
         sql = "SELECT VALUE COUNT(1) FROM c"
-        items_paged = self._ctrproxy.query_items(query=sql, parameters=[])
+        items_paged = await self._query("count_documents", query=sql, parameters=[])
         async for item in items_paged:
             docs.append(item)
         return docs
@@ -252,8 +630,11 @@ class CosmosNoSqlUtil:
         #   [("create", (get_sales_order("create_item"),)), next op, next op, ...]
         # each operation is a 2-tuple, with the operation name as tup[0]
         # tup[1] is a nested 2-tuple , with the document as tup[0]
-        return await self._ctrproxy.execute_item_batch(
-            batch_operations=item_operations, partition_key=pk
+        return await self._execute(
+            "execute_item_batch",
+            self._ctrproxy.execute_item_batch,
+            batch_operations=item_operations,
+            partition_key=pk,
         )
 
     async def query_items(self, sql, cross_partition=False, pk=None, max_items=100):
@@ -261,7 +642,9 @@ class CosmosNoSqlUtil:
         parameters_list.append({"name": "@enable_cross_partition_query", "value": cross_partition})
         if pk is not None:
             parameters_list.append({"name": "@partition_key", "value": pk})
-        query_results = self._ctrproxy.query_items(query=sql, parameters=parameters_list)
+        query_results = await self._query(
+            "query_items", query=sql, parameters=parameters_list, max_item_count=max_items
+        )
         async for item in query_results:
             results_list.append(item)
         return results_list
@@ -282,32 +665,150 @@ class CosmosNoSqlUtil:
         if sql_parameters is not None:
             for sql_param in sql_parameters:
                 parameters_list.append(sql_param)
-        query_results = self._ctrproxy.query_items(query=sql_template, parameters=parameters_list)
+        query_results = await self._query(
+            "parameterized_query",
+            query=sql_template,
+            parameters=parameters_list,
+            max_item_count=max_items,
+        )
         async for item in query_results:
             results_list.append(item)
         return results_list
 
+    async def query_pages(
+        self,
+        sql: str,
+        sql_parameters: list = None,
+        pk=None,
+        max_item_count: int = 100,
+        continuation_token: str = None,
+    ):
+        """
+        Async generator which executes the given (optionally parameterized) query
+        and yields one page at a time, as a dict with the page 'items' and the
+        'continuation_token' of the next page (None after the last page).
+        A scan can be resumed by passing a saved continuation_token.
+        The query is cross-partition unless a partition key value pk is given.
+        Only one page of up to max_item_count items is held in memory.
+        """
+        kwargs = dict()
+        kwargs["query"] = sql
+        kwargs["parameters"] = sql_parameters or []
+        kwargs["max_item_count"] = max_item_count
+        if pk is not None:
+            kwargs["partition_key"] = pk
+        items_paged = await self._query("query_pages", **kwargs)
+        page_iterator = items_paged.by_page(continuation_token)
+        async for page in page_iterator:
+            items = [item async for item in page]
+            yield {"items": items, "continuation_token": page_iterator.continuation_token}
+
+    async def iter_query_items(
+        self,
+        sql: str,
+        sql_parameters: list = None,
+        pk=None,
+        max_item_count: int = 100,
+        continuation_token: str = None,
+    ):
+        """Async generator which yields the items of query_pages() one at a time."""
+        async for page in self.query_pages(
+            sql, sql_parameters, pk, max_item_count, continuation_token
+        ):
+            for item in page["items"]:
+                yield item
+
+    async def change_feed_pages(
+        self,
+        continuation_token: str = None,
+        start_from_beginning: bool = True,
+        max_item_count: int = 100,
+    ):
+        """
+        Async generator which reads the change feed of the current container
+        and yields one page at a time, as a dict with the page 'items' (the
+        latest version of each new or updated document) and the
+        'continuation_token' to resume from after that page.  Without a
+        continuation_token the feed is read from the beginning, or from now.
+        Iteration ends when there are no more changes.
+        """
+        kwargs = dict()
+        kwargs["max_item_count"] = max_item_count
+        if continuation_token is not None:
+            kwargs["continuation"] = continuation_token
+        elif start_from_beginning:
+            kwargs["start_time"] = "Beginning"
+        if self._limiter is not None:
+            await self._limiter.bucket.acquire(1.0)
+        kwargs["response_hook"] = self._paged_hook("change_feed")
+        items_paged = self._ctrproxy.query_items_change_feed(**kwargs)
+        page_iterator = items_paged.by_page()
+        async for page in page_iterator:
+            items = [item async for item in page]
+            yield {"items": items, "continuation_token": page_iterator.continuation_token}
+
+    async def vector_search(
+        self,
+        embedding: list,
+        top_n: int = 5,
+        projection: str = "c.id, c.pk, c.name",
+        filter: str = None,
+        filter_parameters: list = None,
+        embedding_path: str = "c.embedding",
+        pk=None,
+    ):
+        """
+        Async generator which yields the top_n documents most similar to the
+        given embedding, each with a SimilarityScore attribute.  The embedding
+        is sent once as the @embedding query parameter rather than inlined
+        into the SQL text.  The optional filter is a WHERE clause condition,
+        such as "c.pk = @pk", with its values given in filter_parameters.
+        """
+        where = ""
+        if filter is not None:
+            where = " WHERE {}".format(filter)
+        sql = (
+            "SELECT TOP @top_n {}, VectorDistance({}, @embedding) AS SimilarityScore"
+            " FROM c{} ORDER BY VectorDistance({}, @embedding)"
+        ).format(projection, embedding_path, where, embedding_path)
+        sql_parameters = list()
+        sql_parameters.append({"name": "@top_n", "value": int(top_n)})
+        sql_parameters.append({"name": "@embedding", "value": embedding})
+        if filter_parameters is not None:
+            sql_parameters.extend(filter_parameters)
+        async for item in self.iter_query_items(sql, sql_parameters, pk=pk, max_item_count=top_n):
+            yield item
+
     async def last_response_headers(self) -> dict:
         """
-        The Cosmos DB response headers are an instance of class CIMultiDict,
-        which is not JSON serializable.  Convert these CIMultiDict headers
-        into a simple dict and return that dict.
+        Return the headers of the most recent response to this instance, as a
+        simple JSON serializable dict.  These are captured per request rather
+        than read from the client connection, which is shared by all instances
+        of a shared client.  With concurrent requests, use telemetry_stats().
         """
         await asyncio.sleep(0.01)
-        try:
-            multidict_headers = self._ctrproxy.client_connection.last_response_headers
-            simple_headers = dict()
-            for key, value in multidict_headers.items():
-                simple_headers[key] = value
-            return simple_headers
-        except:
-            return dict()
+        simple_headers = dict()
+        for key, value in self._last_headers.items():
+            simple_headers[key] = value
+        return simple_headers
 
     async def last_request_charge(self):
         try:
             await asyncio.sleep(0.01)
-            return float(
-                self._ctrproxy.client_connection.last_response_headers[LAST_REQUEST_CHARGE_HEADER]
-            )
+            return float(self._last_headers[LAST_REQUEST_CHARGE_HEADER])
         except:
             return -1.0
+
+    def telemetry(self) -> CosmosTelemetry:
+        return self._telemetry
+
+    def telemetry_stats(self) -> dict:
+        """
+        Return the per-operation RU charge and latency histograms, status code
+        and partition key range counts, and the queries with the highest RU.
+        """
+        return self._telemetry.to_dict()
+
+    def enable_otel_metrics(self, meter=None) -> None:
+        """Also export the telemetry as the OpenTelemetry histograms; see CosmosTelemetry."""
+        self._telemetry.enable_otel(meter)
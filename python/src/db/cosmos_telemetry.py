@@ -0,0 +1,131 @@
+import logging
+import time
+
+from opentelemetry import metrics
+
+from src.io.fs import FS
+from src.util.histogram import LATENCY_MS_BUCKETS, RU_BUCKETS, Histogram
+
+# This class collects per-operation telemetry of Cosmos DB requests: RU
+# charge and latency histograms, and counts by status code and partition
+# key range id.  Queries are also totaled by their SQL text, to show which
+# queries consume the RU budget.  The telemetry can be exported as JSON,
+# and/or forwarded to OpenTelemetry histograms as it is recorded.
+# Chris Joakim, 3Cloud/Cognizant, 2026
+
+REQUEST_CHARGE_HEADER = "x-ms-request-charge"
+PK_RANGE_ID_HEADER = "x-ms-documentdb-partitionkeyrangeid"
+
+OTEL_METER_NAME = "zero-to-ai.cosmos"
+
+# the SQL text of each query is truncated to this length for its totals
+MAX_QUERY_TEXT_LENGTH = 200
+
+
+class CosmosTelemetry:
+    def __init__(self):
+        self.operations = dict()  # operation name -> dict of histograms and counts
+        self.queries = dict()  # SQL text -> dict with count and total_ru
+        self.started = time.time()
+        self._otel_ru = None
+        self._otel_latency = None
+
+    def enable_otel(self, meter=None) -> None:
+        """
+        Also record each request to OpenTelemetry histograms, with the operation,
+        status code, and partition key range id as attributes.  The meter
+        defaults to one from the global MeterProvider; configure that with
+        the OpenTelemetry SDK and the exporter of your choice.
+        """
+        if meter is None:
+            meter = metrics.get_meter(OTEL_METER_NAME)
+        self._otel_ru = meter.create_histogram(
+            "cosmos.request_charge",
+            unit="RU",
+            description="Request Units charged per Cosmos DB request",
+            explicit_bucket_boundaries_advisory=RU_BUCKETS,
+        )
+        self._otel_latency = meter.create_histogram(
+            "cosmos.latency",
+            unit="ms",
+            description="Latency of Cosmos DB requests",
+            explicit_bucket_boundaries_advisory=LATENCY_MS_BUCKETS,
+        )
+        logging.info("CosmosTelemetry - OpenTelemetry metrics enabled")
+
+    def record(self, op_name: str, latency_ms: float, status_code: int, headers, sql: str = None):
+        """Record one request (or query page), given its response headers."""
+        ru = self.request_charge(headers)
+        pk_range_id = str(headers.get(PK_RANGE_ID_HEADER, "unknown"))
+        if op_name not in self.operations:
+            op = dict()
+            op["ru"] = Histogram(RU_BUCKETS)
+            op["latency_ms"] = Histogram(LATENCY_MS_BUCKETS)
+            op["status_codes"] = dict()
+            op["pk_range_ids"] = dict()
+            self.operations[op_name] = op
+        op = self.operations[op_name]
+        op["ru"].record(ru)
+        op["latency_ms"].record(latency_ms)
+        status_key = str(status_code)
+        op["status_codes"][status_key] = op["status_codes"].get(status_key, 0) + 1
+        op["pk_range_ids"][pk_range_id] = op["pk_range_ids"].get(pk_range_id, 0) + 1
+        if sql is not None:
+            key = sql[:MAX_QUERY_TEXT_LENGTH]
+            if key not in self.queries:
+                self.queries[key] = {"count": 0, "total_ru": 0.0}
+            self.queries[key]["count"] = self.queries[key]["count"] + 1
+            self.queries[key]["total_ru"] = self.queries[key]["total_ru"] + ru
+
+        if self._otel_ru is not None:
+            attributes = dict()
+            attributes["db.operation.name"] = op_name
+            attributes["db.response.status_code"] = status_key
+            attributes["db.cosmosdb.partition_key_range_id"] = pk_range_id
+            self._otel_ru.record(ru, attributes)
+            self._otel_latency.record(latency_ms, attributes)
+
+    def request_charge(self, headers) -> float:
+        try:
+            return float(headers.get(REQUEST_CHARGE_HEADER, 0.0))
+        except:
+            return 0.0
+
+    def total_ru(self) -> float:
+        return sum([op["ru"].sum for op in self.operations.values()])
+
+    def top_queries(self, n: int = 10) -> list:
+        """Return the n queries with the highest total RU charge."""
+        queries = list()
+        for sql, totals in self.queries.items():
+            query = dict()
+            query["sql"] = sql
+            query["count"] = totals["count"]
+            query["total_ru"] = totals["total_ru"]
+            queries.append(query)
+        queries.sort(key=lambda q: q["total_ru"], reverse=True)
+        return queries[:n]
+
+    def to_dict(self) -> dict:
+        data = dict()
+        data["started"] = self.started
+        data["elapsed"] = time.time() - self.started
+        data["total_ru"] = self.total_ru()
+        data["operations"] = dict()
+        for op_name, op in sorted(self.operations.items()):
+            op_data = dict()
+            op_data["ru"] = op["ru"].to_dict()
+            op_data["latency_ms"] = op["latency_ms"].to_dict()
+            op_data["status_codes"] = dict(op["status_codes"])
+            op_data["pk_range_ids"] = dict(op["pk_range_ids"])
+            data["operations"][op_name] = op_data
+        data["top_queries"] = self.top_queries()
+        return data
+
+    def write_json(self, outfile: str) -> None:
+        FS.write_json(self.to_dict(), outfile)
+
+    def reset(self) -> None:
+        self.operations = dict()
+        self.queries = dict()
+        self.started = time.time()
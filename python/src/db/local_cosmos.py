@@ -0,0 +1,666 @@
+import asyncio
+import copy
+import json
+import math
+import os
+import time
+import uuid
+import zlib
+
+from azure.cosmos import ThroughputProperties
+from azure.cosmos.exceptions import (
+    CosmosAccessConditionFailedError,
+    CosmosBatchOperationError,
+    CosmosHttpResponseError,
+    CosmosResourceExistsError,
+    CosmosResourceNotFoundError,
+)
+
+from src.db.local_cosmos_sql import LocalCosmosSql, LocalSqlError
+from src.util.token_bucket import TokenBucket
+
+# These classes are an in-memory, single-process stand-in for the Azure
+# Cosmos DB NoSQL API, selected with AZURE_COSMOSDB_NOSQL_AUTHTYPE=local.
+# LocalCosmosClient, LocalDatabaseProxy and LocalContainerProxy mimic the
+# subset of the azure.cosmos.aio surface used by CosmosNoSqlUtil: item
+# CRUD, transactional batches, queries (see local_cosmos_sql.py), and the
+# change feed.  Each response carries a simulated x-ms-request-charge, and
+# a container (or database) with provisioned throughput returns 429s with
+# x-ms-retry-after-ms when its RU/s budget is exceeded, so that loaders,
+# batching, and rate limiting can be exercised and benchmarked offline.
+# AZURE_COSMOSDB_NOSQL_LOCAL_LATENCY_MS adds a simulated network latency
+# to each request.  The data lives for the lifetime of the process.
+# Chris Joakim, 3Cloud/Cognizant, 2026
+
+REQUEST_CHARGE_HEADER = "x-ms-request-charge"
+RETRY_AFTER_MS_HEADER = "x-ms-retry-after-ms"
+PK_RANGE_ID_HEADER = "x-ms-documentdb-partitionkeyrangeid"
+CONTINUATION_HEADER = "x-ms-continuation"
+ITEM_COUNT_HEADER = "x-ms-item-count"
+
+# approximate RU charges; real charges also depend on the indexing policy
+READ_RU_PER_KB = 1.0
+WRITE_RU_PER_KB = 5.5
+QUERY_BASE_RU = 2.5
+QUERY_RU_PER_SCANNED_DOC = 0.02
+CONDITIONAL_READ_RU = 1.0
+
+# a physical partition serves up to 10,000 RU/s
+RU_PER_PHYSICAL_PARTITION = 10000
+
+MAX_BATCH_OPERATIONS = 100
+
+
+class _LocalResponse:
+    """The minimal HTTP response needed to construct a CosmosHttpResponseError."""
+
+    def __init__(self, status_code: int, message: str, headers: dict):
+        self.status_code = status_code
+        self.reason = message
+        self.headers = headers
+
+    def text(self):
+        return self.reason
+
+
+def _error(error_class, status_code: int, message: str, headers: dict = None):
+    response = _LocalResponse(status_code, message, headers or {})
+    return error_class(status_code=status_code, message=message, response=response)
+
+
+def _kb(doc) -> float:
+    return len(json.dumps(doc, default=str)) / 1024.0
+
+
+class _LocalConnection:
+    """Mimics CosmosClientConnection.last_response_headers."""
+
+    def __init__(self):
+        self.last_response_headers = dict()
+
+
+class LocalCosmosClient:
+    _databases = dict()  # dbname -> dict; shared by all clients in the process
+
+    def __init__(self, latency_ms: float = None):
+        if latency_ms is None:
+            latency_ms = float(os.getenv("AZURE_COSMOSDB_NOSQL_LOCAL_LATENCY_MS", "0"))
+        self.latency_seconds = float(latency_ms) / 1000.0
+        self.client_connection = _LocalConnection()
+        self.url = "local"
+
+    @classmethod
+    def reset(cls) -> None:
+        """Delete all local databases."""
+        cls._databases.clear()
+
+    async def close(self):
+        pass
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, exc_type, exc_value, exc_traceback):
+        await self.close()
+
+    async def list_databases(self, **kwargs):
+        await self._round_trip()
+        for dbname in list(self._databases.keys()):
+            yield {"id": dbname}
+
+    async def create_database(self, id, offer_throughput=None, **kwargs):
+        await self._round_trip()
+        if id in self._databases:
+            raise _error(CosmosResourceExistsError, 409, "database {} exists".format(id))
+        self._databases[id] = _new_database(id, offer_throughput)
+        return self.get_database_client(id)
+
+    async def create_database_if_not_exists(self, id, offer_throughput=None, **kwargs):
+        await self._round_trip()
+        if id not in self._databases:
+            self._databases[id] = _new_database(id, offer_throughput)
+        return self.get_database_client(id)
+
+    async def delete_database(self, database, **kwargs):
+        await self._round_trip()
+        dbname = database if isinstance(database, str) else database.id
+        if self._databases.pop(dbname, None) is None:
+            raise _error(CosmosResourceNotFoundError, 404, "database {} not found".format(dbname))
+
+    def get_database_client(self, database):
+        dbname = database if isinstance(database, str) else database["id"]
+        return LocalDatabaseProxy(self, dbname)
+
+    def database(self, dbname: str) -> dict:
+        if dbname not in self._databases:
+            raise _error(CosmosResourceNotFoundError, 404, "database {} not found".format(dbname))
+        return self._databases[dbname]
+
+    async def _round_trip(self) -> None:
+        await asyncio.sleep(self.latency_seconds)
+
+    def _respond(self, headers: dict, result, response_hook=None):
+        self.client_connection.last_response_headers = headers
+        if response_hook is not None:
+            response_hook(headers, result)
+        return result
+
+
+def _new_database(dbname: str, offer_throughput) -> dict:
+    db = dict()
+    db["id"] = dbname
+    db["_rid"] = uuid.uuid4().hex[:8]
+    db["_ts"] = int(time.time())
+    db["throughput"] = _ru_per_second(offer_throughput)
+    db["bucket"] = None if db["throughput"] is None else TokenBucket(db["throughput"])
+    db["containers"] = dict()  # cname -> LocalContainer
+    return db
+
+
+def _ru_per_second(offer_throughput) -> int | None:
+    if offer_throughput is None:
+        return None
+    if isinstance(offer_throughput, ThroughputProperties):
+        if offer_throughput.auto_scale_max_throughput:
+            return int(offer_throughput.auto_scale_max_throughput)
+        return offer_throughput.offer_throughput
+    return int(offer_throughput)
+
+
+def _throughput_properties(ru_per_second: int):
+    return ThroughputProperties(auto_scale_max_throughput=ru_per_second)
+
+
+class LocalDatabaseProxy:
+    def __init__(self, client: LocalCosmosClient, dbname: str):
+        self.client = client
+        self.client_connection = client.client_connection
+        self.id = dbname
+        self.database_link = "dbs/{}".format(dbname)
+
+    async def read(self, **kwargs):
+        await self.client._round_trip()
+        db = self.client.database(self.id)
+        return {"id": db["id"], "_rid": db["_rid"], "_ts": db["_ts"]}
+
+    async def get_throughput(self, **kwargs):
+        await self.client._round_trip()
+        db = self.client.database(self.id)
+        if db["throughput"] is None:
+            message = "database {} has no provisioned throughput".format(self.id)
+            raise _error(CosmosResourceNotFoundError, 404, message)
+        return _throughput_properties(db["throughput"])
+
+    async def list_containers(self, **kwargs):
+        await self.client._round_trip()
+        for cname in list(self.client.database(self.id)["containers"].keys()):
+            yield {"id": cname}
+
+    async def create_container(self, id, partition_key, offer_throughput=None, **kwargs):
+        await self.client._round_trip()
+        db = self.client.database(self.id)
+        if id in db["containers"]:
+            raise _error(CosmosResourceExistsError, 409, "container {} exists".format(id))
+        db["containers"][id] = LocalContainer(db, id, partition_key, offer_throughput, **kwargs)
+        return self.get_container_client(id)
+
+    async def create_container_if_not_exists(
+        self, id, partition_key, offer_throughput=None, **kwargs
+    ):
+        await self.client._round_trip()
+        db = self.client.database(self.id)
+        if id not in db["containers"]:
+            db["containers"][id] = LocalContainer(db, id, partition_key, offer_throughput, **kwargs)
+        return self.get_container_client(id)
+
+    async def delete_container(self, container, **kwargs):
+        await self.client._round_trip()
+        cname = container if isinstance(container, str) else container.id
+        if self.client.database(self.id)["containers"].pop(cname, None) is None:
+            raise _error(CosmosResourceNotFoundError, 404, "container {} not found".format(cname))
+
+    def get_container_client(self, container):
+        cname = container if isinstance(container, str) else container["id"]
+        return LocalContainerProxy(self.client, self.id, cname)
+
+
+class LocalContainer:
+    """The documents, change feed sequence, and RU budget of one local container."""
+
+    def __init__(self, db: dict, cname: str, partition_key, offer_throughput=None, **kwargs):
+        self.id = cname
+        self.dbname = db["id"]
+        self.pkpath = partition_key["paths"][0]
+        self.indexing_policy = kwargs.get("indexing_policy")
+        self.vector_embedding_policy = kwargs.get("vector_embedding_policy")
+        self.throughput = _ru_per_second(offer_throughput)
+        if self.throughput is not None:
+            self.bucket = TokenBucket(self.throughput)
+        else:
+            self.bucket = db["bucket"]  # shared database throughput, or unlimited if None
+        ru = self.throughput or db["throughput"] or RU_PER_PHYSICAL_PARTITION
+        self.physical_partitions = max(1, math.ceil(ru / RU_PER_PHYSICAL_PARTITION))
+        self.rid = uuid.uuid4().hex[:12]
+        self.ts = int(time.time())
+        self.partitions = dict()  # partition key json -> dict of id -> document
+        self.lsn = 0
+        self.lsn_by_key = dict()  # (partition key json, id) -> lsn of the latest write
+
+    def properties(self) -> dict:
+        props = dict()
+        props["id"] = self.id
+        props["partitionKey"] = {"paths": [self.pkpath], "kind": "Hash", "version": 2}
+        if self.indexing_policy is not None:
+            props["indexingPolicy"] = self.indexing_policy
+        if self.vector_embedding_policy is not None:
+            props["vectorEmbeddingPolicy"] = self.vector_embedding_policy
+        props["_rid"] = self.rid
+        props["_ts"] = self.ts
+        return props
+
+    def distance_function(self) -> str:
+        try:
+            return self.vector_embedding_policy["vectorEmbeddings"][0]["distanceFunction"]
+        except:
+            return "cosine"
+
+    def pk_key(self, pk) -> str:
+        return json.dumps(pk, sort_keys=True)
+
+    def pk_of(self, doc: dict):
+        value = doc
+        for attr in self.pkpath.strip("/").split("/"):
+            if not isinstance(value, dict):
+                return None
+            value = value.get(attr)
+        return value
+
+    def pk_range_id(self, pk) -> str:
+        return str(zlib.crc32(self.pk_key(pk).encode("utf-8")) % self.physical_partitions)
+
+    def consume(self, charge: float, pk=None) -> None:
+        """Debit the RU budget, or raise a 429 if it is exhausted."""
+        if self.bucket is None:
+            return
+        available = self.bucket.available()
+        if available < min(charge, self.bucket.capacity):
+            shortfall = min(charge, self.bucket.capacity) - available
+            retry_after_ms = math.ceil((shortfall / self.bucket.rate_per_second) * 1000.0)
+            headers = dict()
+            headers[REQUEST_CHARGE_HEADER] = "0.0"
+            headers[RETRY_AFTER_MS_HEADER] = str(max(1, retry_after_ms))
+            headers[PK_RANGE_ID_HEADER] = self.pk_range_id(pk)
+            message = "Request rate is large; retry after {} ms".format(retry_after_ms)
+            raise _error(CosmosHttpResponseError, 429, message, headers)
+        self.bucket.debit(charge)
+
+    def headers(self, charge: float, pk=None) -> dict:
+        headers = dict()
+        headers[REQUEST_CHARGE_HEADER] = str(round(charge, 2))
+        headers["x-ms-activity-id"] = str(uuid.uuid4())
+        headers[PK_RANGE_ID_HEADER] = self.pk_range_id(pk)
+        return headers
+
+    def find(self, id: str, pk):
+        return self.partitions.get(self.pk_key(pk), dict()).get(id)
+
+    def write(self, partitions: dict, doc: dict, pk) -> dict:
+        """Store a copy of doc, with new system properties, in the given partitions dict."""
+        stored = copy.deepcopy(doc)
+        stored["_rid"] = uuid.uuid4().hex[:16]
+        stored["_self"] = "dbs/{}/colls/{}/docs/{}".format(self.dbname, self.id, stored["id"])
+        stored["_etag"] = '"{}"'.format(uuid.uuid4())
+        stored["_attachments"] = "attachments/"
+        stored["_ts"] = int(time.time())
+        partitions.setdefault(self.pk_key(pk), dict())[stored["id"]] = stored
+        return stored
+
+    def commit_lsn(self, doc: dict, pk) -> None:
+        self.lsn = self.lsn + 1
+        self.lsn_by_key[(self.pk_key(pk), doc["id"])] = self.lsn
+
+    def all_documents(self, pk=None) -> list:
+        if pk is not None:
+            return list(self.partitions.get(self.pk_key(pk), dict()).values())
+        docs = list()
+        for partition in self.partitions.values():
+            docs.extend(partition.values())
+        return docs
+
+    def changes_since(self, lsn: int, pk=None) -> list:
+        """Return the latest version of each document written after the given lsn, in order."""
+        changes = list()
+        for (pk_key, id), doc_lsn in self.lsn_by_key.items():
+            if doc_lsn > lsn and (pk is None or pk_key == self.pk_key(pk)):
+                doc = self.partitions.get(pk_key, dict()).get(id)
+                if doc is not None:
+                    changes.append((doc_lsn, doc))
+        changes.sort(key=lambda pair: pair[0])
+        return changes
+
+
+class LocalContainerProxy:
+    def __init__(self, client: LocalCosmosClient, dbname: str, cname: str):
+        self.client = client
+        self.client_connection = client.client_connection
+        self.dbname = dbname
+        self.id = cname
+        self.container_link = "dbs/{}/colls/{}".format(dbname, cname)
+
+    def container(self) -> LocalContainer:
+        containers = self.client.database(self.dbname)["containers"]
+        if self.id not in containers:
+            raise _error(CosmosResourceNotFoundError, 404, "container {} not found".format(self.id))
+        return containers[self.id]
+
+    async def read(self, response_hook=None, **kwargs):
+        await self.client._round_trip()
+        container = self.container()
+        return self.client._respond(container.headers(1.0), container.properties(), response_hook)
+
+    async def get_throughput(self, **kwargs):
+        await self.client._round_trip()
+        container = self.container()
+        if container.throughput is None:
+            message = "container {} has no dedicated throughput".format(self.id)
+            raise _error(CosmosResourceNotFoundError, 404, message)
+        return _throughput_properties(container.throughput)
+
+    async def read_item(self, item, partition_key, response_hook=None, **kwargs):
+        await self.client._round_trip()
+        container = self.container()
+        id = item if isinstance(item, str) else item["id"]
+        doc = container.find(id, partition_key)
+        if doc is None:
+            container.consume(CONDITIONAL_READ_RU, partition_key)
+            raise _error(CosmosResourceNotFoundError, 404, "item {} not found".format(id))
+        if_none_match = (kwargs.get("initial_headers") or {}).get("If-None-Match")
+        if if_none_match is not None and if_none_match == doc["_etag"]:
+            container.consume(CONDITIONAL_READ_RU, partition_key)
+            headers = container.headers(CONDITIONAL_READ_RU, partition_key)
+            return self.client._respond(headers, dict(), response_hook)  # 304 Not Modified
+        charge = max(READ_RU_PER_KB, _kb(doc) * READ_RU_PER_KB)
+        container.consume(charge, partition_key)
+        headers = container.headers(charge, partition_key)
+        headers["etag"] = doc["_etag"]
+        return self.client._respond(headers, copy.deepcopy(doc), response_hook)
+
+    async def create_item(self, body, response_hook=None, **kwargs):
+        return await self._write("create", body, response_hook, **kwargs)
+
+    async def upsert_item(self, body, response_hook=None, **kwargs):
+        return await self._write("upsert", body, response_hook, **kwargs)
+
+    async def replace_item(self, item, body, response_hook=None, **kwargs):
+        id = item if isinstance(item, str) else item["id"]
+        if body.get("id") != id:
+            raise _error(CosmosHttpResponseError, 400, "the body id does not match the item")
+        return await self._write("replace", body, response_hook, **kwargs)
+
+    async def delete_item(self, item, partition_key, response_hook=None, **kwargs):
+        await self.client._round_trip()
+        container = self.container()
+        id = item if isinstance(item, str) else item["id"]
+        doc = container.find(id, partition_key)
+        if doc is None:
+            raise _error(CosmosResourceNotFoundError, 404, "item {} not found".format(id))
+        charge = max(WRITE_RU_PER_KB, _kb(doc) * WRITE_RU_PER_KB)
+        container.consume(charge, partition_key)
+        del container.partitions[container.pk_key(partition_key)][id]
+        container.lsn_by_key.pop((container.pk_key(partition_key), id), None)
+        self.client._respond(container.headers(charge, partition_key), None, response_hook)
+
+    async def _write(self, op: str, body: dict, response_hook=None, **kwargs):
+        await self.client._round_trip()
+        container = self.container()
+        if not isinstance(body, dict) or "id" not in body:
+            raise _error(CosmosHttpResponseError, 400, "the document requires an id")
+        pk = container.pk_of(body)
+        charge = max(WRITE_RU_PER_KB, _kb(body) * WRITE_RU_PER_KB)
+        self._check_write(container, container.partitions, op, body, pk, kwargs)
+        container.consume(charge, pk)
+        stored = container.write(container.partitions, body, pk)
+        container.commit_lsn(stored, pk)
+        headers = container.headers(charge, pk)
+        headers["etag"] = stored["_etag"]
+        return self.client._respond(headers, copy.deepcopy(stored), response_hook)
+
+    def _check_write(self, container, partitions, op, body, pk, kwargs) -> None:
+        existing = partitions.get(container.pk_key(pk), dict()).get(body["id"])
+        if op == "create" and existing is not None:
+            raise _error(CosmosResourceExistsError, 409, "item {} exists".format(body["id"]))
+        if op == "replace" and existing is None:
+            raise _error(CosmosResourceNotFoundError, 404, "item {} not found".format(body["id"]))
+        if_match = kwargs.get("etag") if kwargs.get("match_condition") is not None else None
+        if if_match is not None and (existing is None or existing["_etag"] != if_match):
+            raise _error(CosmosAccessConditionFailedError, 412, "etag precondition failed")
+
+    async def execute_item_batch(
+        self, batch_operations, partition_key, response_hook=None, **kwargs
+    ):
+        """
+        Execute the given operations atomically within one logical partition;
+        either all of them are applied, or none of them are and a
+        CosmosBatchOperationError identifies the failed operation.
+        """
+        await self.client._round_trip()
+        container = self.container()
+        operations = list(batch_operations)
+        if len(operations) > MAX_BATCH_OPERATIONS:
+            message = "a batch may contain at most {} operations".format(MAX_BATCH_OPERATIONS)
+            raise _error(CosmosHttpResponseError, 400, message)
+        # the operations are applied to a copy of the partition, which replaces it on success
+        pk_key = container.pk_key(partition_key)
+        staged = {pk_key: dict(container.partitions.get(pk_key, dict()))}
+        results, written, deleted, charge = list(), list(), list(), 0.0
+        for idx, operation in enumerate(operations):
+            op, args = operation[0].lower(), operation[1]
+            op_kwargs = operation[2] if len(operation) > 2 else dict()
+            try:
+                result, op_charge = self._stage_operation(
+                    container, staged, op, args, op_kwargs, partition_key
+                )
+            except CosmosHttpResponseError as e:
+                headers = container.headers(0.0, partition_key)
+                raise CosmosBatchOperationError(
+                    error_index=idx,
+                    headers=headers,
+                    status_code=e.status_code,
+                    message="batch operation {} ({}) failed: {}".format(idx, op, e.message),
+                    operation_responses=results,
+                )
+            charge = charge + op_charge
+            results.append(result)
+            if op == "delete":
+                deleted.append(args[0])
+            elif op != "read":
+                written.append(result["resourceBody"])
+        container.consume(charge, partition_key)
+        container.partitions[pk_key] = staged[pk_key]
+        for id in deleted:
+            container.lsn_by_key.pop((pk_key, id), None)
+        for doc in written:
+            container.commit_lsn(doc, partition_key)
+        headers = container.headers(charge, partition_key)
+        return self.client._respond(headers, results, response_hook)
+
+    def _stage_operation(self, container, staged, op, args, op_kwargs, partition_key):
+        pk_key = container.pk_key(partition_key)
+        if op in ("create", "upsert", "replace"):
+            body = args[-1]
+            pk = container.pk_of(body)
+            if container.pk_key(pk) != pk_key:
+                raise _error(CosmosHttpResponseError, 400, "partition key mismatch")
+            self._check_write(container, staged, op, body, pk, op_kwargs)
+            status_code = 200 if op != "create" and body["id"] in staged[pk_key] else 201
+            stored = container.write(staged, body, pk)
+            charge = max(WRITE_RU_PER_KB, _kb(body) * WRITE_RU_PER_KB)
+            return _batch_result(status_code, charge, stored), charge
+        if op in ("read", "delete"):
+            doc = staged[pk_key].get(args[0])
+            if doc is None:
+                raise _error(CosmosResourceNotFoundError, 404, "item {} not found".format(args[0]))
+            if op == "read":
+                charge = max(READ_RU_PER_KB, _kb(doc) * READ_RU_PER_KB)
+                return _batch_result(200, charge, copy.deepcopy(doc)), charge
+            del staged[pk_key][args[0]]
+            charge = max(WRITE_RU_PER_KB, _kb(doc) * WRITE_RU_PER_KB)
+            return _batch_result(204, charge, None), charge
+        raise _error(CosmosHttpResponseError, 400, "unsupported batch operation: {}".format(op))
+
+    def query_items(
+        self,
+        query,
+        parameters=None,
+        partition_key=None,
+        max_item_count=None,
+        response_hook=None,
+        **kwargs,
+    ):
+        """Return a LocalItemPaged of the query results; executed when first iterated."""
+        container = self.container()
+        params = dict()
+        for param in parameters or []:
+            params[param["name"]] = param["value"]
+        try:
+            parsed = LocalCosmosSql(query)
+        except LocalSqlError as e:
+            raise _error(CosmosHttpResponseError, 400, str(e)) from None
+
+        def fetch():
+            docs = container.all_documents(partition_key)
+            try:
+                results = parsed.execute(docs, params, container.distance_function())
+            except LocalSqlError as e:
+                raise _error(CosmosHttpResponseError, 400, str(e)) from None
+            return results, QUERY_BASE_RU + (QUERY_RU_PER_SCANNED_DOC * len(docs))
+
+        return LocalItemPaged(self, fetch, max_item_count, response_hook, partition_key)
+
+    def query_items_change_feed(
+        self,
+        max_item_count=None,
+        start_time=None,
+        continuation=None,
+        partition_key=None,
+        response_hook=None,
+        **kwargs,
+    ):
+        """
+        Return a LocalItemPaged of the latest version of each document created
+        or updated since the continuation token (a local sequence number), or
+        since start_time 'Beginning' (the default) or 'Now'.
+        """
+        container = self.container()
+        if continuation is not None:
+            start_lsn = int(continuation)
+        elif isinstance(start_time, str) and start_time.lower() == "now":
+            start_lsn = container.lsn
+        else:
+            start_lsn = 0
+
+        def fetch():
+            changes = container.changes_since(start_lsn, partition_key)
+            docs = list()
+            for lsn, doc in changes:
+                changed = copy.deepcopy(doc)
+                changed["_lsn"] = lsn
+                docs.append(changed)
+            return docs, QUERY_BASE_RU
+
+        paged = LocalItemPaged(self, fetch, max_item_count, response_hook, partition_key)
+        paged.change_feed_start = str(start_lsn)
+        return paged
+
+
+def _batch_result(status_code: int, charge: float, doc) -> dict:
+    result = dict()
+    result["statusCode"] = status_code
+    result["requestCharge"] = round(charge, 2)
+    if doc is not None:
+        result["eTag"] = doc["_etag"]
+        result["resourceBody"] = doc
+    return result
+
+
+class LocalItemPaged:
+    """
+    Mimics AsyncItemPaged; iterate it for the items, or by_page() for the pages.
+    The results are computed on the first page request, and each page is
+    charged to the container's RU budget and reported to the response_hook.
+    Query continuation tokens are the offset of the next page; change feed
+    continuation tokens are the sequence number of the last change read.
+    """
+
+    def __init__(self, proxy, fetch, max_item_count, response_hook, partition_key):
+        self.proxy = proxy
+        self.fetch = fetch
+        self.max_item_count = max(1, int(max_item_count or 100))
+        self.response_hook = response_hook
+        self.partition_key = partition_key
+        self.change_feed_start = None  # set for change feed queries
+
+    def by_page(self, continuation_token=None):
+        return LocalPageIterator(self, continuation_token)
+
+    def __aiter__(self):
+        return self._iterate()
+
+    async def _iterate(self):
+        async for page in self.by_page():
+            async for item in page:
+                yield item
+
+
+class LocalPageIterator:
+    def __init__(self, paged: LocalItemPaged, continuation_token=None):
+        self.paged = paged
+        self.continuation_token = continuation_token
+        if paged.change_feed_start is not None:
+            self.continuation_token = paged.change_feed_start
+        self.results = None
+        self.offset = 0
+        if paged.change_feed_start is None and continuation_token is not None:
+            self.offset = int(continuation_token)
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self):
+        client = self.paged.proxy.client
+        await client._round_trip()
+        container = self.paged.proxy.container()
+        charge = 0.0
+        if self.results is None:
+            self.results, charge = self.paged.fetch()
+        if self.offset >= len(self.results):
+            raise StopAsyncIteration
+        items = self.results[self.offset : self.offset + self.paged.max_item_count]
+        charge = charge + sum([_kb(item) * READ_RU_PER_KB for item in items])
+        container.consume(charge, self.paged.partition_key)  # may raise a 429
+        self.offset = self.offset + len(items)
+        items = copy.deepcopy(items)
+        if self.paged.change_feed_start is not None:
+            self.continuation_token = str(items[-1]["_lsn"])
+        elif self.offset < len(self.results):
+            self.continuation_token = str(self.offset)
+        else:
+            self.continuation_token = None
+        headers = container.headers(charge, self.paged.partition_key)
+        headers[ITEM_COUNT_HEADER] = str(len(items))
+        if self.continuation_token is not None:
+            headers[CONTINUATION_HEADER] = self.continuation_token
+        client._respond(headers, items, self.paged.response_hook)
+        return LocalPage(items)
+
+
+class LocalPage:
+    def __init__(self, items: list):
+        self.items = items
+
+    def __aiter__(self):
+        return self._iterate()
+
+    async def _iterate(self):
+        for item in self.items:
+            yield item
@@ -0,0 +1,630 @@
+import json
+import math
+import re
+
+# This class parses and executes a useful subset of the Cosmos DB NoSQL
+# query language against in-memory documents; it is the query engine of
+# the local Cosmos DB stand-in (see local_cosmos.py).  Supported:
+#   SELECT [DISTINCT] [TOP n] [VALUE] * | expr [AS alias], ...
+#   FROM c [WHERE expr] [ORDER BY expr [ASC|DESC], ...] [OFFSET n LIMIT m]
+# with @parameters, AND/OR/NOT, comparisons, IN, BETWEEN, arithmetic,
+# the aggregates COUNT/SUM/MIN/MAX/AVG, common system functions, and
+# VectorDistance.  JOIN, GROUP BY and subqueries are not supported.
+# As in Cosmos DB, missing attributes are 'undefined', and comparisons
+# between different types are undefined rather than true or false.
+# Chris Joakim, 3Cloud/Cognizant, 2026
+
+
+class LocalSqlError(Exception):
+    pass
+
+
+class _Undefined:
+    def __repr__(self):
+        return "undefined"
+
+
+UNDEFINED = _Undefined()
+
+AGGREGATE_FUNCTIONS = ("COUNT", "SUM", "MIN", "MAX", "AVG")
+
+KEYWORDS = (
+    "SELECT DISTINCT TOP VALUE FROM WHERE AND OR NOT ORDER BY ASC DESC OFFSET LIMIT AS IN "
+    "BETWEEN TRUE FALSE NULL UNDEFINED JOIN GROUP"
+).split()
+
+TOKEN_REGEX = re.compile(
+    r"""\s*(?:
+    (?P<number>\d+\.\d*(?:[eE][+-]?\d+)?|\d*\.\d+(?:[eE][+-]?\d+)?|\d+(?:[eE][+-]?\d+)?)
+    |(?P<string>'(?:[^'\\]|\\.)*'|"(?:[^"\\]|\\.)*")
+    |(?P<param>@\w+)
+    |(?P<name>[A-Za-z_]\w*)
+    |(?P<op>!=|<>|<=|>=|\|\||[=<>(),.\[\]*+\-/%])
+    )""",
+    re.VERBOSE,
+)
+
+
+def _tokenize(sql: str) -> tuple:
+    """Return the list of (kind, value) tokens, and the list of their source texts."""
+    tokens, texts, pos = list(), list(), 0
+    sql = sql.rstrip()
+    while pos < len(sql):
+        match = TOKEN_REGEX.match(sql, pos)
+        if match is None or match.end() == pos:
+            raise LocalSqlError("syntax error at position {}: {}".format(pos, sql[pos : pos + 20]))
+        pos = match.end()
+        kind = match.lastgroup
+        text = match.group(kind)
+        texts.append(text)
+        if kind == "name" and text.upper() in KEYWORDS:
+            tokens.append(("keyword", text.upper()))
+        elif kind == "number":
+            value = float(text)
+            tokens.append(("number", int(value) if re.fullmatch(r"\d+", text) else value))
+        elif kind == "string":
+            tokens.append(("string", re.sub(r"\\(.)", r"\1", text[1:-1])))
+        else:
+            tokens.append((kind, text))
+    tokens.append(("end", None))
+    texts.append("")
+    return tokens, texts
+
+
+def _type_rank(value) -> int:
+    """Cosmos DB sorts mixed types as: undefined, null, boolean, number, string."""
+    if value is UNDEFINED:
+        return 0
+    if value is None:
+        return 1
+    if isinstance(value, bool):
+        return 2
+    if isinstance(value, (int, float)):
+        return 3
+    if isinstance(value, str):
+        return 4
+    return 5
+
+
+def _same_type(a, b) -> bool:
+    rank = _type_rank(a)
+    return rank == _type_rank(b) and rank != 0
+
+
+def _compare(op: str, a, b):
+    if op in ("=", "!=", "<>"):
+        # objects and arrays compare by value, but an array never equals an object
+        if not _same_type(a, b) or (_type_rank(a) == 5 and type(a) is not type(b)):
+            return UNDEFINED
+        return (a == b) if op == "=" else (a != b)
+    if not _same_type(a, b) or _type_rank(a) == 5:
+        return UNDEFINED
+    if op == "<":
+        return a < b
+    if op == "<=":
+        return a <= b
+    if op == ">":
+        return a > b
+    return a >= b
+
+
+def _is_number(value) -> bool:
+    return isinstance(value, (int, float)) and not isinstance(value, bool)
+
+
+def _arithmetic(op: str, a, b):
+    if op == "||":
+        if isinstance(a, str) and isinstance(b, str):
+            return a + b
+        return UNDEFINED
+    if not (_is_number(a) and _is_number(b)):
+        return UNDEFINED
+    if op == "+":
+        return a + b
+    if op == "-":
+        return a - b
+    if op == "*":
+        return a * b
+    if b == 0:
+        return UNDEFINED
+    if op == "/":
+        return a / b
+    return a % b
+
+
+def _and(a, b):
+    if a is False or b is False:
+        return False
+    if a is True and b is True:
+        return True
+    return UNDEFINED
+
+
+def _or(a, b):
+    if a is True or b is True:
+        return True
+    if a is False and b is False:
+        return False
+    return UNDEFINED
+
+
+def vector_distance(a, b, distance_function: str = "cosine"):
+    """Return the cosine or dotproduct similarity, or the euclidean distance, of two vectors."""
+    if not isinstance(a, list) or not isinstance(b, list) or len(a) != len(b) or len(a) == 0:
+        return UNDEFINED
+    dot = math.fsum(x * y for x, y in zip(a, b))
+    if distance_function == "dotproduct":
+        return dot
+    if distance_function == "euclidean":
+        return math.sqrt(math.fsum((x - y) * (x - y) for x, y in zip(a, b)))
+    norms = math.sqrt(math.fsum(x * x for x in a)) * math.sqrt(math.fsum(y * y for y in b))
+    return UNDEFINED if norms == 0 else dot / norms
+
+
+def _str_args(*args) -> bool:
+    return all(isinstance(arg, str) for arg in args)
+
+
+def _string_function(func):
+    def wrapper(s, sub, ignore_case=False):
+        if not _str_args(s, sub):
+            return UNDEFINED
+        if ignore_case is True:
+            s, sub = s.lower(), sub.lower()
+        return func(s, sub)
+
+    return wrapper
+
+
+def _array_contains(arr, value, partial=False):
+    if not isinstance(arr, list):
+        return UNDEFINED
+    for item in arr:
+        if item == value:
+            return True
+        if partial is True and isinstance(item, dict) and isinstance(value, dict):
+            if all(item.get(k, UNDEFINED) == v for k, v in value.items()):
+                return True
+    return False
+
+
+SYSTEM_FUNCTIONS = {
+    "CONTAINS": _string_function(lambda s, sub: sub in s),
+    "STARTSWITH": _string_function(lambda s, sub: s.startswith(sub)),
+    "ENDSWITH": _string_function(lambda s, sub: s.endswith(sub)),
+    "LOWER": lambda s: s.lower() if isinstance(s, str) else UNDEFINED,
+    "UPPER": lambda s: s.upper() if isinstance(s, str) else UNDEFINED,
+    "LENGTH": lambda s: len(s) if isinstance(s, str) else UNDEFINED,
+    "CONCAT": lambda *args: "".join(args) if _str_args(*args) else UNDEFINED,
+    "ARRAY_CONTAINS": _array_contains,
+    "ARRAY_LENGTH": lambda a: len(a) if isinstance(a, list) else UNDEFINED,
+    "ABS": lambda n: abs(n) if _is_number(n) else UNDEFINED,
+    "FLOOR": lambda n: math.floor(n) if _is_number(n) else UNDEFINED,
+    "ROUND": lambda n: round(n) if _is_number(n) else UNDEFINED,
+    "IS_DEFINED": lambda v: v is not UNDEFINED,
+    "IS_NULL": lambda v: v is None,
+    "IS_STRING": lambda v: isinstance(v, str),
+    "IS_NUMBER": _is_number,
+    "IS_BOOL": lambda v: isinstance(v, bool),
+    "IS_ARRAY": lambda v: isinstance(v, list),
+    "IS_OBJECT": lambda v: isinstance(v, dict),
+}
+
+
+class LocalCosmosSql:
+    def __init__(self, sql: str):
+        self.sql = sql
+        self._tokens, self._texts = _tokenize(sql)
+        self._pos = 0
+        self.distinct = False
+        self.top = None
+        self.value = False
+        self.select = None  # None for SELECT *, else a list of (node, name)
+        self.alias = None
+        self.where = None
+        self.order_by = list()  # (node, direction), direction is None if not given
+        self.offset = None
+        self.limit = None
+        self._parse_query()
+
+    def execute(self, docs, parameters: dict = None, distance_function: str = "cosine") -> list:
+        """
+        Return the results of this query over the given documents, with the
+        given parameters dict of @name -> value.  The distance_function is
+        that of the container's vector embedding policy, for VectorDistance.
+        """
+        context = dict()
+        context["params"] = parameters or dict()
+        context["distance_function"] = distance_function
+        rows = list()
+        for doc in docs:
+            if self.where is None or self._eval(self.where, doc, context) is True:
+                rows.append(doc)
+
+        if self._is_aggregate():
+            return self._aggregate(rows, context)
+
+        if len(self.order_by) > 0:
+            rows = self._sort(rows, context)
+
+        results = list()
+        for doc in rows:
+            results.append(self._project(doc, context))
+        if self.value:
+            results = [r for r in results if r is not UNDEFINED]
+        if self.distinct:
+            unique, seen = list(), set()
+            for r in results:
+                signature = json.dumps(r, sort_keys=True, default=str)
+                if signature not in seen:
+                    seen.add(signature)
+                    unique.append(r)
+            results = unique
+        if self.offset is not None:
+            offset = self._int_value(self.offset, context, "OFFSET")
+            limit = self._int_value(self.limit, context, "LIMIT")
+            results = results[offset : offset + limit]
+        if self.top is not None:
+            results = results[: self._int_value(self.top, context, "TOP")]
+        return results
+
+    # parsing
+
+    def _peek(self, offset: int = 0) -> tuple:
+        return self._tokens[min(self._pos + offset, len(self._tokens) - 1)]
+
+    def _next(self) -> tuple:
+        token = self._tokens[self._pos]
+        self._pos = self._pos + 1
+        return token
+
+    def _accept(self, kind: str, text=None) -> bool:
+        token = self._peek()
+        if token[0] == kind and (text is None or token[1] == text):
+            self._pos = self._pos + 1
+            return True
+        return False
+
+    def _expect(self, kind: str, text=None) -> tuple:
+        token = self._peek()
+        if token[0] != kind or (text is not None and token[1] != text):
+            raise LocalSqlError(
+                "expected {} but found {} in: {}".format(text or kind, token[1], self.sql)
+            )
+        return self._next()
+
+    def _parse_query(self) -> None:
+        self._expect("keyword", "SELECT")
+        self.distinct = self._accept("keyword", "DISTINCT")
+        if self._accept("keyword", "TOP"):
+            token = self._next()
+            if token[0] == "number":
+                self.top = ("literal", token[1])
+            elif token[0] == "param":
+                self.top = ("param", token[1])
+            else:
+                raise LocalSqlError("invalid TOP value: {}".format(token[1]))
+        self.value = self._accept("keyword", "VALUE")
+        if self._accept("op", "*"):
+            if self.value:
+                raise LocalSqlError("SELECT VALUE * is not valid")
+        else:
+            self.select = list()
+            while True:
+                node = self._parse_expr()
+                name = None
+                if self._accept("keyword", "AS"):
+                    name = self._expect("name")[1]
+                elif self._peek()[0] == "name":
+                    name = self._next()[1]
+                self.select.append((node, name or self._default_name(node)))
+                if not self._accept("op", ","):
+                    break
+            if self.value and len(self.select) != 1:
+                raise LocalSqlError("SELECT VALUE takes exactly one expression")
+        self._expect("keyword", "FROM")
+        self.alias = self._expect("name")[1]
+        if self._accept("keyword", "AS") or self._peek()[0] == "name":
+            self.alias = self._expect("name")[1]
+        if self._peek() in (("keyword", "JOIN"), ("keyword", "GROUP")):
+            raise LocalSqlError("{} is not supported locally".format(self._peek()[1]))
+        if self._accept("keyword", "WHERE"):
+            self.where = self._parse_expr()
+        if self._accept("keyword", "ORDER"):
+            self._expect("keyword", "BY")
+            while True:
+                node = self._parse_expr()
+                direction = None
+                if self._accept("keyword", "ASC"):
+                    direction = "ASC"
+                elif self._accept("keyword", "DESC"):
+                    direction = "DESC"
+                self.order_by.append((node, direction))
+                if not self._accept("op", ","):
+                    break
+        if self._accept("keyword", "OFFSET"):
+            self.offset = self._parse_primary()
+            self._expect("keyword", "LIMIT")
+            self.limit = self._parse_primary()
+        self._expect("end")
+        self._resolve_aliases()
+
+    def _parse_expr(self):
+        return self._parse_or()
+
+    def _parse_or(self):
+        node = self._parse_and()
+        while self._accept("keyword", "OR"):
+            node = ("or", node, self._parse_and())
+        return node
+
+    def _parse_and(self):
+        node = self._parse_not()
+        while self._accept("keyword", "AND"):
+            node = ("and", node, self._parse_not())
+        return node
+
+    def _parse_not(self):
+        if self._accept("keyword", "NOT"):
+            return ("not", self._parse_not())
+        return self._parse_comparison()
+
+    def _parse_comparison(self):
+        node = self._parse_additive()
+        token = self._peek()
+        if token[0] == "op" and token[1] in ("=", "!=", "<>", "<", "<=", ">", ">="):
+            self._next()
+            return ("compare", token[1], node, self._parse_additive())
+        negate = False
+        if token == ("keyword", "NOT") and self._peek(1) in (
+            ("keyword", "IN"),
+            ("keyword", "BETWEEN"),
+        ):
+            self._next()
+            negate = True
+        if self._accept("keyword", "IN"):
+            self._expect("op", "(")
+            items = [self._parse_additive()]
+            while self._accept("op", ","):
+                items.append(self._parse_additive())
+            self._expect("op", ")")
+            node = ("in", node, items)
+        elif self._accept("keyword", "BETWEEN"):
+            low = self._parse_additive()
+            self._expect("keyword", "AND")
+            node = ("between", node, low, self._parse_additive())
+        return ("not", node) if negate else node
+
+    def _parse_additive(self):
+        node = self._parse_multiplicative()
+        while self._peek()[0] == "op" and self._peek()[1] in ("+", "-", "||"):
+            op = self._next()[1]
+            node = ("arith", op, node, self._parse_multiplicative())
+        return node
+
+    def _parse_multiplicative(self):
+        node = self._parse_unary()
+        while self._peek()[0] == "op" and self._peek()[1] in ("*", "/", "%"):
+            op = self._next()[1]
+            node = ("arith", op, node, self._parse_unary())
+        return node
+
+    def _parse_unary(self):
+        if self._accept("op", "-"):
+            return ("arith", "-", ("literal", 0), self._parse_unary())
+        return self._parse_postfix(self._parse_primary())
+
+    def _parse_postfix(self, node):
+        while True:
+            if self._accept("op", "."):
+                node = ("member", node, ("literal", self._next_name()))
+            elif self._peek() == ("op", "["):
+                self._next()
+                node = ("member", node, self._parse_expr())
+                self._expect("op", "]")
+            else:
+                return node
+
+    def _next_name(self) -> str:
+        token = self._next()
+        if token[0] in ("name", "keyword"):
+            return self._texts[self._pos - 1]  # attribute names may be keywords, as in c.value
+        raise LocalSqlError("expected an attribute name in: {}".format(self.sql))
+
+    def _parse_primary(self):
+        token = self._next()
+        kind, text = token
+        if kind in ("number", "string"):
+            return ("literal", text)
+        if kind == "param":
+            return ("param", text)
+        if kind == "keyword" and text in ("TRUE", "FALSE", "NULL", "UNDEFINED"):
+            literals = {"TRUE": True, "FALSE": False, "NULL": None, "UNDEFINED": UNDEFINED}
+            return ("literal", literals[text])
+        if kind == "op" and text == "(":
+            node = self._parse_expr()
+            self._expect("op", ")")
+            return node
+        if kind == "op" and text == "[":
+            items = list()
+            if not self._accept("op", "]"):
+                items.append(self._parse_expr())
+                while self._accept("op", ","):
+                    items.append(self._parse_expr())
+                self._expect("op", "]")
+            return ("array", items)
+        if kind == "name":
+            if self._accept("op", "("):
+                args = list()
+                if not self._accept("op", ")"):
+                    args.append(self._parse_expr())
+                    while self._accept("op", ","):
+                        args.append(self._parse_expr())
+                    self._expect("op", ")")
+                return ("call", text.upper(), args)
+            return ("name", text)
+        raise LocalSqlError("unexpected {} in: {}".format(text, self.sql))
+
+    def _default_name(self, node):
+        if node[0] == "member" and node[2][0] == "literal":
+            return str(node[2][1])
+        return None
+
+    def _resolve_aliases(self) -> None:
+        """Name the unnamed select expressions $1, $2, ... as Cosmos DB does."""
+        if self.select is None:
+            return
+        n, select = 0, list()
+        for node, name in self.select:
+            if name is None:
+                n = n + 1
+                name = "${}".format(n)
+            select.append((node, name))
+        self.select = select
+
+    # evaluation
+
+    def _eval(self, node, doc: dict, context: dict):
+        kind = node[0]
+        if kind == "literal":
+            return node[1]
+        if kind == "param":
+            if node[1] not in context["params"]:
+                raise LocalSqlError("parameter {} is not defined".format(node[1]))
+            return context["params"][node[1]]
+        if kind == "name":
+            if node[1] == self.alias:
+                return doc
+            raise LocalSqlError("identifier {} could not be resolved".format(node[1]))
+        if kind == "member":
+            parent = self._eval(node[1], doc, context)
+            key = self._eval(node[2], doc, context)
+            if isinstance(parent, dict) and isinstance(key, str):
+                return parent.get(key, UNDEFINED)
+            if isinstance(parent, list) and _is_number(key) and 0 <= int(key) < len(parent):
+                return parent[int(key)]
+            return UNDEFINED
+        if kind == "compare":
+            return _compare(
+                node[1], self._eval(node[2], doc, context), self._eval(node[3], doc, context)
+            )
+        if kind == "and":
+            return _and(self._eval(node[1], doc, context), self._eval(node[2], doc, context))
+        if kind == "or":
+            return _or(self._eval(node[1], doc, context), self._eval(node[2], doc, context))
+        if kind == "not":
+            value = self._eval(node[1], doc, context)
+            return (not value) if isinstance(value, bool) else UNDEFINED
+        if kind == "in":
+            value = self._eval(node[1], doc, context)
+            if value is UNDEFINED:
+                return UNDEFINED
+            return any(_compare("=", value, self._eval(n, doc, context)) is True for n in node[2])
+        if kind == "between":
+            value = self._eval(node[1], doc, context)
+            low = _compare(">=", value, self._eval(node[2], doc, context))
+            return _and(low, _compare("<=", value, self._eval(node[3], doc, context)))
+        if kind == "arith":
+            return _arithmetic(
+                node[1], self._eval(node[2], doc, context), self._eval(node[3], doc, context)
+            )
+        if kind == "array":
+            values = [self._eval(n, doc, context) for n in node[1]]
+            return [v for v in values if v is not UNDEFINED]
+        if kind == "call":
+            return self._call(node, doc, context)
+        raise LocalSqlError("unsupported expression: {}".format(kind))
+
+    def _call(self, node, doc: dict, context: dict):
+        name, args = node[1], [self._eval(n, doc, context) for n in node[2]]
+        if name == "VECTORDISTANCE":
+            if len(args) < 2:
+                raise LocalSqlError("VectorDistance requires two vectors")
+            distance_function = context["distance_function"]
+            if len(args) > 3 and isinstance(args[3], dict):
+                distance_function = args[3].get("distanceFunction", distance_function)
+            return vector_distance(args[0], args[1], distance_function)
+        if name in AGGREGATE_FUNCTIONS:
+            raise LocalSqlError("aggregate {} is only supported in the SELECT list".format(name))
+        if name not in SYSTEM_FUNCTIONS:
+            raise LocalSqlError("unsupported function: {}".format(name))
+        try:
+            return SYSTEM_FUNCTIONS[name](*args)
+        except TypeError:
+            raise LocalSqlError("invalid arguments for function: {}".format(name)) from None
+
+    def _int_value(self, node, context: dict, clause: str) -> int:
+        value = self._eval(node, {}, context)
+        if not _is_number(value) or int(value) < 0:
+            raise LocalSqlError("invalid {} value: {}".format(clause, value))
+        return int(value)
+
+    def _project(self, doc: dict, context: dict):
+        if self.select is None:
+            return doc
+        if self.value:
+            return self._eval(self.select[0][0], doc, context)
+        projected = dict()
+        for node, name in self.select:
+            value = self._eval(node, doc, context)
+            if value is not UNDEFINED:
+                projected[name] = value
+        return projected
+
+    def _sort(self, rows: list, context: dict) -> list:
+        # a stable sort on each key, from the last key to the first
+        for node, direction in reversed(self.order_by):
+            if direction is None:
+                direction = "ASC"
+                # as in Cosmos DB, ORDER BY VectorDistance returns the most similar first
+                is_similarity = context["distance_function"] in ("cosine", "dotproduct")
+                if node[0] == "call" and node[1] == "VECTORDISTANCE" and is_similarity:
+                    direction = "DESC"
+            keyed = list()
+            for doc in rows:
+                value = self._eval(node, doc, context)
+                keyed.append(
+                    ((_type_rank(value), value if _type_rank(value) in (2, 3, 4) else 0), doc)
+                )
+            keyed.sort(key=lambda pair: pair[0], reverse=(direction == "DESC"))
+            rows = [doc for _, doc in keyed]
+        return rows
+
+    def _is_aggregate(self) -> bool:
+        if self.select is None:
+            return False
+        flags = [node[0] == "call" and node[1] in AGGREGATE_FUNCTIONS for node, _ in self.select]
+        if any(flags) and not all(flags):
+            raise LocalSqlError(
+                "aggregates cannot be mixed with other expressions without GROUP BY"
+            )
+        return any(flags)
+
+    def _aggregate(self, rows: list, context: dict) -> list:
+        projected = dict()
+        for node, name in self.select:
+            func, args = node[1], node[2]
+            if len(args) != 1:
+                raise LocalSqlError("{} takes one argument".format(func))
+            values = [self._eval(args[0], doc, context) for doc in rows]
+            values = [v for v in values if v is not UNDEFINED]
+            if func == "COUNT":
+                result = len(values)
+            elif len(values) == 0:
+                result = UNDEFINED
+            elif func in ("SUM", "AVG"):
+                if not all(_is_number(v) for v in values):
+                    result = UNDEFINED
+                else:
+                    result = sum(values) if func == "SUM" else sum(values) / len(values)
+            else:
+                ranked = sorted(
+                    values, key=lambda v: (_type_rank(v), v if _type_rank(v) in (2, 3, 4) else 0)
+                )
+                result = ranked[0] if func == "MIN" else ranked[-1]
+            if result is not UNDEFINED:
+                projected[name] = result
+        if self.value:
+            value = projected.get(self.select[0][1], UNDEFINED)
+            return [] if value is UNDEFINED else [value]
+        return [projected]
@@ -0,0 +1,113 @@
+import copy
+import time
+
+from collections import OrderedDict
+
+# This class implements a size-bounded, in-process LRU cache of Cosmos DB
+# point-read results, keyed by (database, container, pk, id).  Entries are
+# fresh for ttl_seconds; after that they are stale, and the caller revalidates
+# them with a conditional (If-None-Match: etag) read, which costs far less
+# than re-reading an unchanged document.  Documents are copied on the way in
+# and out, so callers may mutate them without corrupting the cache.
+# Chris Joakim, 3Cloud/Cognizant, 2026
+
+
+class PointReadCache:
+    def __init__(self, max_entries: int = 1000, ttl_seconds: float = 60.0):
+        self.max_entries = int(max_entries)
+        self.ttl_seconds = float(ttl_seconds)
+        self._entries = OrderedDict()  # key -> dict with doc, etag, ru, expires
+        self._keys_by_id = dict()  # (database, container, id) -> keys; for writes without a pk
+        self.hits = 0
+        self.misses = 0
+        self.stale = 0
+        self.revalidations = 0  # stale entries confirmed unchanged via etag
+        self.evictions = 0
+        self.ru_saved = 0.0
+
+    def key(self, database: str, container: str, pk, id: str) -> tuple:
+        return (database, container, str(pk), id)
+
+    def lookup(self, key: tuple) -> dict | None:
+        """
+        Return the cache entry for the given key, or None.  The entry is a dict
+        with a copy of the 'doc', its 'etag', and 'fresh' (False once the TTL has
+        expired).  Fresh entries count as hits.
+        """
+        entry = self._entries.get(key)
+        if entry is None:
+            self.misses = self.misses + 1
+            return None
+        self._entries.move_to_end(key)
+        fresh = time.monotonic() < entry["expires"]
+        if fresh:
+            self.hits = self.hits + 1
+            self.ru_saved = self.ru_saved + entry["ru"]
+        else:
+            self.stale = self.stale + 1
+        return {"doc": copy.deepcopy(entry["doc"]), "etag": entry["etag"], "fresh": fresh}
+
+    def put(self, key: tuple, doc: dict, ru: float = 0.0) -> None:
+        """Add or replace the given document, evicting the least recently used if full."""
+        entry = dict()
+        entry["doc"] = copy.deepcopy(doc)
+        entry["etag"] = doc.get("_etag")
+        entry["ru"] = float(ru)
+        entry["expires"] = time.monotonic() + self.ttl_seconds
+        self._entries[key] = entry
+        self._entries.move_to_end(key)
+        self._keys_by_id.setdefault(self._id_key(key), set()).add(key)
+        while len(self._entries) > self.max_entries:
+            evicted_key, _ = self._entries.popitem(last=False)
+            self._discard_id_key(evicted_key)
+            self.evictions = self.evictions + 1
+
+    def revalidated(self, key: tuple, revalidation_ru: float = 0.0) -> dict:
+        """The document of the given stale key is unchanged; renew its TTL and return a copy."""
+        entry = self._entries[key]
+        entry["expires"] = time.monotonic() + self.ttl_seconds
+        self.revalidations = self.revalidations + 1
+        self.ru_saved = self.ru_saved + max(0.0, entry["ru"] - revalidation_ru)
+        return copy.deepcopy(entry["doc"])
+
+    def invalidate(self, key: tuple) -> None:
+        if self._entries.pop(key, None) is not None:
+            self._discard_id_key(key)
+
+    def invalidate_id(self, database: str, container: str, id: str) -> None:
+        """Invalidate the given id in all partitions; used when the pk is not known."""
+        for key in list(self._keys_by_id.get((database, container, id), [])):
+            self.invalidate(key)
+
+    def clear(self) -> None:
+        self._entries.clear()
+        self._keys_by_id.clear()
+
+    def size(self) -> int:
+        return len(self._entries)
+
+    def stats(self) -> dict:
+        data = dict()
+        data["size"] = self.size()
+        data["max_entries"] = self.max_entries
+        data["ttl_seconds"] = self.ttl_seconds
+        data["hits"] = self.hits
+        data["misses"] = self.misses
+        data["stale"] = self.stale
+        data["revalidations"] = self.revalidations
+        data["evictions"] = self.evictions
+        data["ru_saved"] = self.ru_saved
+        lookups = self.hits + self.misses + self.stale
+        data["hit_rate"] = 0.0 if lookups == 0 else (self.hits + self.revalidations) / lookups
+        return data
+
+    def _discard_id_key(self, key: tuple) -> None:
+        id_key = self._id_key(key)
+        keys = self._keys_by_id.get(id_key)
+        if keys is not None:
+            keys.discard(key)
+            if len(keys) == 0:
+                del self._keys_by_id[id_key]
+
+    def _id_key(self, key: tuple) -> tuple:
+        return (key[0], key[1], key[3])
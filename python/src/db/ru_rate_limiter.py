@@ -0,0 +1,108 @@
+import logging
+
+from azure.cosmos.exceptions import CosmosHttpResponseError
+
+from src.util.token_bucket import TokenBucket
+
+# This class paces Cosmos DB operations to a Request Unit (RU/s) budget,
+# typically the provisioned throughput of the container.  Each operation
+# first acquires its estimated RU charge from a token bucket, the bucket
+# is then corrected with the actual x-ms-request-charge of the response,
+# and 429 (throttled) responses are retried after x-ms-retry-after-ms.
+# Chris Joakim, 3Cloud/Cognizant, 2026
+
+REQUEST_CHARGE_HEADER = "x-ms-request-charge"
+RETRY_AFTER_MS_HEADER = "x-ms-retry-after-ms"
+THROTTLED_STATUS_CODE = 429
+
+
+class RURateLimiter:
+    def __init__(self, ru_per_second: float, max_retries: int = 9, default_estimate: float = 10.0):
+        self.ru_per_second = float(ru_per_second)
+        self.max_retries = int(max_retries)
+        self.default_estimate = float(default_estimate)
+        self.bucket = TokenBucket(self.ru_per_second)
+        self.estimates = dict()  # operation name -> moving average RU charge
+        self.request_count = 0
+        self.throttled_count = 0
+        self.total_ru = 0.0
+        logging.info("RURateLimiter - constructor, ru_per_second: {}".format(ru_per_second))
+
+    def estimate(self, op_name: str) -> float:
+        """Return the estimated RU charge of the given operation name."""
+        return self.estimates.get(op_name, self.default_estimate)
+
+    async def execute(self, op_name: str, func, **kwargs):
+        """
+        Invoke the given async SDK method, such as ContainerProxy.upsert_item,
+        with the given keyword args under the RU budget.  Any response_hook
+        in kwargs is still invoked.  Throttled requests are retried up to
+        max_retries times; other errors are raised to the caller.
+        """
+        caller_hook = kwargs.pop("response_hook", None)
+        attempt = 0
+        while True:
+            estimate = self.estimate(op_name)
+            await self.bucket.acquire(estimate)
+            headers = dict()
+
+            def hook(h, result):
+                headers.update(h)
+                if caller_hook is not None:
+                    caller_hook(h, result)
+
+            try:
+                result = await func(response_hook=hook, **kwargs)
+                self.record(op_name, estimate, headers)
+                return result
+            except CosmosHttpResponseError as e:
+                self.record(op_name, estimate, e.headers or {})
+                if e.status_code != THROTTLED_STATUS_CODE or attempt >= self.max_retries:
+                    raise
+                attempt = attempt + 1
+                self.throttled_count = self.throttled_count + 1
+                self.bucket.pause(self.retry_after_seconds(e.headers))
+                logging.info("RURateLimiter - {} throttled, retry {}".format(op_name, attempt))
+
+    def paged_hook(self, op_name: str, caller_hook=None):
+        """
+        Return a response_hook for a paged query.  Pages are fetched inside the
+        SDK iterator, so each page's actual charge is debited after the fact.
+        """
+
+        def hook(headers, result):
+            self.record(op_name, 0.0, headers)
+            if caller_hook is not None:
+                caller_hook(headers, result)
+
+        return hook
+
+    def record(self, op_name: str, estimate: float, headers) -> None:
+        """Correct the bucket with the actual charge, and update the estimate."""
+        try:
+            charge = float(headers.get(REQUEST_CHARGE_HEADER, estimate))
+        except:
+            charge = estimate
+        self.bucket.debit(charge - estimate)
+        self.request_count = self.request_count + 1
+        self.total_ru = self.total_ru + charge
+        if charge > 0:
+            # throttled requests are not charged, and say nothing about the cost
+            previous = self.estimates.get(op_name, charge)
+            self.estimates[op_name] = (0.8 * previous) + (0.2 * charge)
+
+    def retry_after_seconds(self, headers) -> float:
+        try:
+            return float(headers.get(RETRY_AFTER_MS_HEADER)) / 1000.0
+        except:
+            return 1.0
+
+    def stats(self) -> dict:
+        data = dict()
+        data["ru_per_second"] = self.ru_per_second
+        data["request_count"] = self.request_count
+        data["throttled_count"] = self.throttled_count
+        data["total_ru"] = self.total_ru
+        data["wait_seconds"] = self.bucket.wait_seconds
+        data["estimates"] = dict(self.estimates)
+        return data
@@ -0,0 +1,188 @@
+import gzip
+import json
+import time
+
+import numpy as np
+
+try:
+    import orjson  # optional; several times faster than json for float arrays
+except ImportError:
+    orjson = None
+
+# This class encodes the JSON request bodies of bulk uploads, which are
+# dominated by embedding float arrays, in fewer bytes and less time:
+#   - with orjson, if installed, rather than the stdlib json module
+#   - with the floats optionally rounded to float_digits decimal places;
+#     lists of floats, such as embeddings, are rounded with NumPy
+#   - optionally gzip-compressed, with a Content-Encoding: gzip header,
+#     for the endpoints that accept compressed request bodies; callers pass
+#     compress=False for the others
+# The bytes of each body after trimming, and on the wire, are accumulated,
+# to report the bandwidth savings with stats(); the bytes before trimming
+# take another serialization pass, so they are measured only if
+# measure_json is set.  The encodings of the documents sized by
+# document_size(), such as by an AdaptiveBatcher, are reused by
+# encode_documents(), so each document is serialized once per upload.
+# Chris Joakim, 3Cloud/Cognizant, 2026
+
+DEFAULT_FLOAT_DIGITS = 7  # about five significant digits of a typical embedding value
+DEFAULT_GZIP_LEVEL = 1  # most of the savings of level 6, in a quarter of the time
+
+MIN_ROUNDED_LIST_LENGTH = 8  # shorter lists of floats are rounded one value at a time
+
+
+class PayloadEncoder:
+    def __init__(
+        self,
+        float_digits: int = None,
+        gzip_body: bool = False,
+        gzip_level: int = DEFAULT_GZIP_LEVEL,
+        use_orjson: bool = True,
+        measure_json: bool = False,
+    ):
+        self.float_digits = float_digits
+        self.gzip_body = gzip_body
+        self.gzip_level = int(gzip_level)
+        self.use_orjson = use_orjson and orjson is not None
+        self.measure_json = measure_json
+        self.body_count = 0
+        self.document_count = 0  # the documents trimmed by trim_document()
+        self.json_bytes = 0  # compact JSON, with the floats as given
+        self.json_measured = True  # False once a json_bytes value was not measured
+        self.encoded_bytes = 0  # compact JSON, with the floats trimmed
+        self.wire_bytes = 0  # the request bodies as sent
+        self.encode_seconds = 0.0
+        self._encoded_documents = dict()  # id(doc) -> (doc, encoding), per document_size()
+
+    @classmethod
+    def from_opts(cls, opts: dict):
+        """
+        Return an encoder per the float_digits, gzip, orjson, and payload_stats values of
+        the given opts; payload_stats measures the bytes before trimming.
+        """
+        return cls(
+            float_digits=opts.get("float_digits"),
+            gzip_body=opts.get("gzip", False),
+            use_orjson=opts.get("orjson", True),
+            measure_json=opts.get("payload_stats", False),
+        )
+
+    def dumps(self, obj) -> bytes:
+        """Return the given object as compact UTF-8 JSON."""
+        if self.use_orjson:
+            return orjson.dumps(obj)
+        return json.dumps(obj, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+    def trim_floats(self, obj):
+        """Return a copy of the given object with its floats rounded to float_digits places."""
+        if self.float_digits is None:
+            return obj
+        if isinstance(obj, float):
+            return round(obj, self.float_digits)
+        if isinstance(obj, dict):
+            return {key: self.trim_floats(value) for key, value in obj.items()}
+        if isinstance(obj, list):
+            if len(obj) >= MIN_ROUNDED_LIST_LENGTH and all(type(v) is float for v in obj):
+                return np.round(np.asarray(obj, dtype=np.float64), self.float_digits).tolist()
+            return [self.trim_floats(value) for value in obj]
+        return obj
+
+    def document_size(self, doc: dict) -> int:
+        """
+        Return the bytes of the given document as encoded, before compression.  The
+        encoding is kept until encode_documents() or clear_documents() is called.
+        """
+        encoding = self.dumps(self.trim_floats(doc))
+        self._encoded_documents[id(doc)] = (doc, encoding)  # doc is kept, so its id is not reused
+        return len(encoding)
+
+    def clear_documents(self) -> None:
+        """Discard the encodings kept by document_size()."""
+        self._encoded_documents = dict()
+
+    def encode(self, obj, compress: bool = True) -> bytes:
+        """
+        Return the request body of the given object, gzip-compressed if gzip_body and
+        compress are set, and add its sizes to the stats.
+        """
+        t1 = time.perf_counter()
+        body = self.dumps(self.trim_floats(obj))
+        return self._add_body(body, obj, t1, compress)
+
+    def encode_documents(self, documents: list) -> bytes:
+        """
+        Return the request body {"value": documents}, with the encoding of each document
+        from document_size() if kept, and add its sizes to the stats.
+        """
+        t1 = time.perf_counter()
+        encodings = list()
+        for doc in documents:
+            _, encoding = self._encoded_documents.pop(id(doc), (None, None))
+            if encoding is None:
+                encoding = self.dumps(self.trim_floats(doc))
+            encodings.append(encoding)
+        body = b'{"value":[' + b",".join(encodings) + b"]}"
+        return self._add_body(body, {"value": documents}, t1)
+
+    def trim_document(self, doc: dict) -> dict:
+        """
+        Return the given document with its floats trimmed, for clients that serialize
+        it themselves, such as the Cosmos DB SDK.  Only its compact JSON sizes, and
+        those only if measure_json is set, are added to the stats; the bytes such a
+        client sends are unknown.
+        """
+        t1 = time.perf_counter()
+        trimmed = self.trim_floats(doc)
+        if self.measure_json:
+            self.json_bytes = self.json_bytes + len(self.dumps(doc))
+            self.encoded_bytes = self.encoded_bytes + len(self.dumps(trimmed))
+        else:
+            self.json_measured = False
+        self.document_count = self.document_count + 1
+        self.encode_seconds = self.encode_seconds + (time.perf_counter() - t1)
+        return trimmed
+
+    def headers(self, compressed: bool = True) -> dict:
+        """Return the content headers of the bodies encoded with the given compress value."""
+        headers = {"Content-Type": "application/json"}
+        if self.gzip_body and compressed:
+            headers["Content-Encoding"] = "gzip"
+        return headers
+
+    def stats(self) -> dict:
+        """
+        Return the counts and bytes; json_bytes and wire_ratio are None unless measured,
+        and the wire values are only present if bodies were encoded.
+        """
+        data = dict()
+        data["encoder"] = "orjson" if self.use_orjson else "json"
+        data["float_digits"] = self.float_digits
+        data["gzip"] = self.gzip_body
+        data["body_count"] = self.body_count
+        data["document_count"] = self.document_count
+        data["json_bytes"] = self.json_bytes if self.json_measured else None
+        measured = self.body_count > 0 or self.measure_json
+        data["encoded_bytes"] = self.encoded_bytes if measured else None
+        if self.body_count > 0:
+            data["wire_bytes"] = self.wire_bytes
+            data["wire_ratio"] = None
+            if self.json_measured and self.json_bytes > 0:
+                data["wire_ratio"] = self.wire_bytes / self.json_bytes
+        data["encode_seconds"] = self.encode_seconds
+        return data
+
+    def _add_body(self, body: bytes, obj, t1: float, compress: bool = True) -> bytes:
+        """Add the sizes of the given encoded body of obj to the stats; return it, compressed."""
+        if self.float_digits is None:
+            self.json_bytes = self.json_bytes + len(body)  # trimming is a no-op
+        elif self.measure_json:
+            self.json_bytes = self.json_bytes + len(self.dumps(obj))
+        else:
+            self.json_measured = False
+        self.encoded_bytes = self.encoded_bytes + len(body)
+        if self.gzip_body and compress:
+            body = gzip.compress(body, compresslevel=self.gzip_level)
+        self.wire_bytes = self.wire_bytes + len(body)
+        self.body_count = self.body_count + 1
+        self.encode_seconds = self.encode_seconds + (time.perf_counter() - t1)
+        return body
@@ -271,6 +271,11 @@ class Env:
     def azure_openai_completions_url(cls) -> str:
         return cls.azure_envvar("AZURE_OPENAI_COMPLETIONS_URL", None)
 
+    @classmethod
+    def azure_openai_completions_tpm(cls) -> str:
+        """Return the tokens-per-minute quota of the completions deployment, if set."""
+        return cls.azure_envvar("AZURE_OPENAI_COMPLETIONS_TPM", None)
+
     @classmethod
     def azure_openai_embeddings_dep(cls) -> str:
         return cls.azure_envvar("AZURE_OPENAI_EMBEDDINGS_DEP", None)
@@ -283,6 +288,11 @@ class Env:
     def azure_openai_embeddings_url(cls) -> str:
         return cls.azure_envvar("AZURE_OPENAI_EMBEDDINGS_URL", None)
 
+    @classmethod
+    def azure_openai_embeddings_tpm(cls) -> str:
+        """Return the tokens-per-minute quota of the embeddings deployment, if set."""
+        return cls.azure_envvar("AZURE_OPENAI_EMBEDDINGS_TPM", None)
+
     @classmethod
     def azure_openai_key(cls) -> str:
         return cls.azure_envvar("AZURE_OPENAI_KEY", None)
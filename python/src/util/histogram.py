@@ -0,0 +1,64 @@
+# This class implements a fixed-bucket histogram, like the OpenTelemetry
+# explicit-bucket histogram, with count, sum, min, max and estimated
+# percentiles.  Memory use is constant regardless of the sample count.
+# Chris Joakim, 3Cloud/Cognizant, 2026
+
+RU_BUCKETS = [1, 2, 5, 10, 20, 50, 100, 200, 500, 1000, 2000, 5000]
+
+LATENCY_MS_BUCKETS = [1, 2, 5, 10, 20, 50, 100, 200, 500, 1000, 2000, 5000, 10000]
+
+
+class Histogram:
+    def __init__(self, bounds: list):
+        self.bounds = sorted(bounds)
+        self.counts = [0] * (len(self.bounds) + 1)  # the last bucket is > the last bound
+        self.count = 0
+        self.sum = 0.0
+        self.min = None
+        self.max = None
+
+    def record(self, value: float) -> None:
+        value = float(value)
+        idx = 0
+        while idx < len(self.bounds) and value > self.bounds[idx]:
+            idx = idx + 1
+        self.counts[idx] = self.counts[idx] + 1
+        self.count = self.count + 1
+        self.sum = self.sum + value
+        self.min = value if self.min is None else min(self.min, value)
+        self.max = value if self.max is None else max(self.max, value)
+
+    def mean(self) -> float:
+        return 0.0 if self.count == 0 else self.sum / self.count
+
+    def percentile(self, p: float) -> float | None:
+        """
+        Return the estimated p-th percentile (0 to 100), interpolated linearly
+        within its bucket, where the bucket edges are clamped to min and max.
+        """
+        if self.count == 0:
+            return None
+        rank = (float(p) / 100.0) * self.count
+        cumulative = 0
+        for idx, bucket_count in enumerate(self.counts):
+            if bucket_count > 0 and cumulative + bucket_count >= rank:
+                low = self.min if idx == 0 else max(self.min, self.bounds[idx - 1])
+                high = self.max if idx == len(self.bounds) else min(self.max, self.bounds[idx])
+                fraction = (rank - cumulative) / bucket_count
+                return low + ((high - low) * fraction)
+            cumulative = cumulative + bucket_count
+        return self.max
+
+    def to_dict(self) -> dict:
+        data = dict()
+        data["count"] = self.count
+        data["sum"] = self.sum
+        data["min"] = self.min
+        data["max"] = self.max
+        data["mean"] = self.mean()
+        data["p50"] = self.percentile(50)
+        data["p95"] = self.percentile(95)
+        data["p99"] = self.percentile(99)
+        data["bounds"] = self.bounds
+        data["counts"] = self.counts
+        return data
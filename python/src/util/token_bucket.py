@@ -0,0 +1,67 @@
+import asyncio
+import time
+
+# This class implements an asyncio token bucket, used to pace requests
+# to a throughput budget such as Cosmos DB RU/s or Azure OpenAI TPM/RPM.
+# Tokens refill continuously at rate_per_second, up to capacity.
+# Chris Joakim, 3Cloud/Cognizant, 2026
+
+
+class TokenBucket:
+    def __init__(self, rate_per_second: float, capacity: float = None):
+        self.rate_per_second = float(rate_per_second)
+        if capacity is None:
+            capacity = self.rate_per_second
+        self.capacity = float(capacity)
+        self.tokens = self.capacity
+        self.paused_until = 0.0
+        self.last_refill = time.monotonic()
+        self.wait_seconds = 0.0
+        self._lock = asyncio.Lock()
+
+    async def acquire(self, amount: float = 1.0) -> float:
+        """
+        Wait until the given amount of tokens is available, then take them.
+        An amount larger than capacity is granted when the bucket is full,
+        leaving a negative balance that later callers wait out.
+        Waiters are served in FIFO order.  Return the seconds waited.
+        """
+        amount = float(amount)
+        required = min(amount, self.capacity)  # a larger amount could never be available
+        waited = 0.0
+        async with self._lock:
+            while True:
+                self._refill()
+                delay = self.paused_until - time.monotonic()
+                if delay <= 0:
+                    if self.tokens >= required:
+                        self.tokens = self.tokens - amount
+                        break
+                    delay = (required - self.tokens) / self.rate_per_second
+                await asyncio.sleep(delay)
+                waited = waited + delay
+        self.wait_seconds = self.wait_seconds + waited
+        return waited
+
+    def debit(self, amount: float) -> None:
+        """
+        Adjust the balance after the fact, for example once the actual cost
+        of a request is known.  A negative amount credits the bucket.
+        """
+        self._refill()
+        self.tokens = min(self.capacity, self.tokens - float(amount))
+
+    def pause(self, seconds: float) -> None:
+        """Block all acquirers for the given number of seconds, such as a retry-after."""
+        self.paused_until = max(self.paused_until, time.monotonic() + float(seconds))
+
+    def available(self) -> float:
+        """Return the current number of available tokens; may be negative."""
+        self._refill()
+        return self.tokens
+
+    def _refill(self) -> None:
+        now = time.monotonic()
+        elapsed = now - self.last_refill
+        self.last_refill = now
+        self.tokens = min(self.capacity, self.tokens + (elapsed * self.rate_per_second))
@@ -0,0 +1,110 @@
+import math
+import re
+
+import numpy as np
+
+# This class is an in-memory inverted index with Okapi BM25 scoring, for
+# local lexical search of documents such as those in data/cosmosdb/.  The
+# searchable fields of a document are tokenized into lowercase alphanumeric
+# terms, and their term frequencies summed with per-field weights (BM25F
+# style), so that a term in the name counts more than one in the
+# description.  Each term's postings are kept as NumPy arrays of rows and
+# weighted frequencies, so a query adds one vectorized update per term
+# to a score array of all the documents.
+# Chris Joakim, 3Cloud/Cognizant, 2026
+
+DEFAULT_FIELD_WEIGHTS = {"name": 3.0, "summary": 2.0, "description": 1.0}
+
+MAX_FIELD_CHARS = 10000  # long descriptions are truncated when indexed
+
+TOKEN_PATTERN = re.compile(r"[a-z0-9]+")
+
+
+class BM25Index:
+    def __init__(self, field_weights: dict = None, k1: float = 1.2, b: float = 0.75):
+        self.field_weights = dict(DEFAULT_FIELD_WEIGHTS if field_weights is None else field_weights)
+        self.k1 = float(k1)
+        self.b = float(b)
+        self.ids = list()  # row number -> id
+        self.docs = list()  # row number -> projected document attributes
+        self._rows_by_id = dict()  # id -> row number
+        self._lengths = list()  # row number -> weighted document length
+        self._postings = dict()  # term -> dict of row number -> weighted frequency
+        self._arrays = dict()  # term -> (rows, frequencies) arrays, built on first use
+        self._norms = None  # row number -> k1 * (1 - b + b * length / mean length)
+
+    @classmethod
+    def tokenize(cls, text: str) -> list:
+        if not isinstance(text, str):
+            return list()
+        return TOKEN_PATTERN.findall(text[:MAX_FIELD_CHARS].lower())
+
+    def add(self, id: str, doc: dict, projected: dict = None) -> None:
+        """Add the searchable fields of the given doc; projected is returned in the results."""
+        if id in self._rows_by_id:
+            raise ValueError("duplicate id: {}".format(id))
+        row = len(self.ids)
+        frequencies, length = dict(), 0.0
+        for field, weight in self.field_weights.items():
+            for term in self.tokenize(doc.get(field)):
+                frequencies[term] = frequencies.get(term, 0.0) + weight
+                length = length + weight
+        for term, frequency in frequencies.items():
+            self._postings.setdefault(term, dict())[row] = frequency
+            self._arrays.pop(term, None)
+        self.ids.append(id)
+        self.docs.append({"id": id} if projected is None else projected)
+        self._rows_by_id[id] = row
+        self._lengths.append(length)
+        self._norms = None
+
+    def size(self) -> int:
+        return len(self.ids)
+
+    def idf(self, term: str) -> float:
+        """Return the BM25 inverse document frequency of the given term; never negative."""
+        df = len(self._postings.get(term, ()))
+        return math.log(1.0 + (self.size() - df + 0.5) / (df + 0.5))
+
+    def scores(self, query: str) -> np.ndarray:
+        """Return the BM25 score of the given query text for every row; 0.0 if no term matches."""
+        scores = np.zeros(self.size(), dtype=np.float32)
+        norms = self._length_norms()
+        for term in set(self.tokenize(query)):
+            if term not in self._postings:
+                continue
+            rows, frequencies = self._term_arrays(term)
+            idf = self.idf(term)
+            scores[rows] += idf * frequencies * (self.k1 + 1.0) / (frequencies + norms[rows])
+        return scores
+
+    def search(self, query: str, top_k: int = 10) -> list:
+        """Return the top_k matching documents, highest BM25Score first."""
+        scores = self.scores(query)
+        matched = np.flatnonzero(scores > 0.0)
+        order = matched[np.argsort(-scores[matched], kind="stable")][:top_k]
+        results = list()
+        for row in order:
+            result = dict(self.docs[row])
+            result["BM25Score"] = float(scores[row])
+            results.append(result)
+        return results
+
+    def _term_arrays(self, term: str) -> tuple:
+        arrays = self._arrays.get(term)
+        if arrays is None:
+            postings = self._postings[term]
+            rows = np.fromiter(postings.keys(), dtype=np.int64, count=len(postings))
+            frequencies = np.fromiter(postings.values(), dtype=np.float32, count=len(postings))
+            arrays = (rows, frequencies)
+            self._arrays[term] = arrays
+        return arrays
+
+    def _length_norms(self) -> np.ndarray:
+        if self._norms is None:
+            lengths = np.asarray(self._lengths, dtype=np.float32)
+            mean = float(lengths.mean()) if len(lengths) > 0 else 0.0
+            if mean == 0.0:
+                mean = 1.0
+            self._norms = self.k1 * (1.0 - self.b + self.b * lengths / mean)
+        return self._norms
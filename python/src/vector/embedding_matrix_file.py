@@ -0,0 +1,163 @@
+import os
+import struct
+
+import numpy as np
+
+from src.io.fs import FS
+
+# This class reads and writes a compact, memory-mappable embedding file.
+# The file is a fixed-size little-endian header followed by the row-major
+# float32 (rows, dimensions) matrix; a sidecar JSON file holds the id and
+# projected document attributes of each row.  open() reads only the header
+# and maps the matrix read-only with np.memmap, in constant time, so any
+# number of processes share one copy of the vectors in the OS page cache.
+# The sidecar is read on first use of the ids or docs.
+#
+# header: magic (8 bytes), version (uint32), dimensions (uint32),
+#         rows (uint64), data offset (uint64), flags (uint32), then padding
+# Chris Joakim, 3Cloud/Cognizant, 2026
+
+MAGIC = b"EMBMTX01"
+VERSION = 1
+HEADER_FORMAT = "<8sIIQQI"
+HEADER_SIZE = 64  # the matrix is 64-byte aligned
+FLAG_NORMALIZED = 1  # the rows have unit length
+
+SIDECAR_SUFFIX = ".ids.json"
+
+
+class EmbeddingMatrixFile:
+    def __init__(self, path: str):
+        """Open the given embedding file; see open()."""
+        self.path = path
+        with open(path, "rb") as f:
+            header = f.read(HEADER_SIZE)
+        if len(header) < HEADER_SIZE:
+            raise ValueError("{} is not an embedding matrix file".format(path))
+        magic, version, dimensions, rows, offset, flags = struct.unpack_from(HEADER_FORMAT, header)
+        if magic != MAGIC or version != VERSION:
+            raise ValueError("{} is not an embedding matrix file".format(path))
+        self.dimensions = dimensions
+        self.rows = rows
+        self.normalized = bool(flags & FLAG_NORMALIZED)
+        if rows == 0:
+            self.matrix = np.zeros((0, dimensions), dtype="<f4")  # an empty file cannot be mapped
+        else:
+            self.matrix = np.memmap(
+                path, dtype="<f4", mode="r", offset=offset, shape=(rows, dimensions)
+            )
+        self._ids = None
+        self._docs = None
+        self._rows_by_id = None
+
+    @classmethod
+    def open(cls, path: str):
+        return cls(path)
+
+    @classmethod
+    def sidecar_path(cls, path: str) -> str:
+        return path + SIDECAR_SUFFIX
+
+    @classmethod
+    def write(cls, path: str, ids: list, embeddings, docs: list = None, normalize: bool = True):
+        """Write the given ids, embeddings, and optional docs; return the opened file."""
+        writer = EmbeddingMatrixFileWriter(path, np.asarray(embeddings).shape[1], normalize)
+        for n, id in enumerate(ids):
+            writer.append(id, embeddings[n], None if docs is None else docs[n])
+        return writer.close()
+
+    @classmethod
+    def write_from_json_dir(
+        cls,
+        path: str,
+        dirname: str,
+        embedding_attr: str = "embedding",
+        projection: list = ("id", "pk", "name"),
+        id_attr: str = "id",
+    ):
+        """
+        Write the embedded JSON documents in the given directory, such as
+        data/cosmosdb/, one at a time; return the opened file.
+        """
+        writer = None
+        for filename in sorted(os.listdir(dirname)):
+            if not filename.endswith(".json"):
+                continue
+            doc = FS.read_json("{}/{}".format(dirname, filename))
+            if not isinstance(doc, dict) or doc.get(embedding_attr) is None:
+                continue
+            if writer is None:
+                writer = EmbeddingMatrixFileWriter(path, len(doc[embedding_attr]))
+            projected = dict()
+            for attr in projection:
+                projected[attr] = doc.get(attr)
+            writer.append(doc[id_attr], doc[embedding_attr], projected)
+        if writer is None:
+            raise ValueError("no embedded documents in {}".format(dirname))
+        return writer.close()
+
+    def ids(self) -> list:
+        self._load_sidecar()
+        return self._ids
+
+    def docs(self) -> list:
+        self._load_sidecar()
+        return self._docs
+
+    def row_of(self, id: str) -> int | None:
+        self._load_sidecar()
+        if self._rows_by_id is None:
+            self._rows_by_id = {id: row for row, id in enumerate(self._ids)}
+        return self._rows_by_id.get(id)
+
+    def vector(self, id: str) -> np.ndarray | None:
+        row = self.row_of(id)
+        return None if row is None else self.matrix[row]
+
+    def _load_sidecar(self) -> None:
+        if self._ids is None:
+            sidecar = FS.read_json(self.sidecar_path(self.path))
+            self._ids = sidecar["ids"]
+            self._docs = sidecar["docs"]
+
+
+class EmbeddingMatrixFileWriter:
+    """Appends rows to a new embedding file; the header is completed by close()."""
+
+    def __init__(self, path: str, dimensions: int, normalize: bool = True):
+        self.path = path
+        self.dimensions = int(dimensions)
+        self.normalize = normalize
+        self.ids = list()
+        self.docs = list()
+        self._file = open(path, "wb")
+        self._file.write(self._header(0))
+
+    def append(self, id: str, embedding, doc: dict = None) -> None:
+        vector = np.asarray(embedding, dtype="<f4")
+        if vector.shape != (self.dimensions,):
+            raise ValueError("expected {} dimensions, got {}".format(self.dimensions, vector.shape))
+        if self.normalize:
+            norm = np.linalg.norm(vector)
+            if norm > 0:
+                vector = (vector / norm).astype("<f4")
+        self._file.write(vector.tobytes())
+        self.ids.append(id)
+        self.docs.append({"id": id} if doc is None else doc)
+
+    def close(self) -> EmbeddingMatrixFile:
+        self._file.seek(0)
+        self._file.write(self._header(len(self.ids)))
+        self._file.close()
+        sidecar = {"ids": self.ids, "docs": self.docs}
+        FS.write_json(
+            sidecar, EmbeddingMatrixFile.sidecar_path(self.path), pretty=False, verbose=False
+        )
+        return EmbeddingMatrixFile(self.path)
+
+    def _header(self, rows: int) -> bytes:
+        flags = FLAG_NORMALIZED if self.normalize else 0
+        header = struct.pack(
+            HEADER_FORMAT, MAGIC, VERSION, self.dimensions, rows, HEADER_SIZE, flags
+        )
+        return header.ljust(HEADER_SIZE, b"\0")
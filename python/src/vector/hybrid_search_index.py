@@ -0,0 +1,209 @@
+import logging
+import os
+
+import numpy as np
+
+from src.io.fs import FS
+from src.vector.bm25_index import BM25Index
+from src.vector.local_vector_index import LocalVectorIndex
+
+# This class is a local hybrid search engine, for offline relevance
+# experiments over the documents that main-search.py direct_load_index
+# loads into Azure AI Search, such as data/cosmosdb/.  The lexical ranking
+# is from a BM25Index of the name, summary, and description; the vector
+# rankings are from a LocalVectorIndex of the embeddings.  The rankings are
+# combined with Reciprocal Rank Fusion (RRF), as Azure AI Search does for
+# hybrid queries: each document scores the sum of 1 / (rrf_k + rank) over
+# the rankings that contain it.  execute() accepts the search parameters
+# of aisearch/libraries_searches.json and returns a response shaped like
+# that of the service.
+# Chris Joakim, 3Cloud/Cognizant, 2026
+
+DEFAULT_PROJECTION = ["id", "pk", "name", "summary"]
+
+DEFAULT_RRF_K = 60
+
+DEFAULT_TOP = 50  # the Azure AI Search default
+
+SUPPORTED_PARAMS = (
+    "count",
+    "orderby",
+    "queryType",
+    "search",
+    "select",
+    "skip",
+    "top",
+    "vectorFilterMode",
+    "vectorQueries",
+)
+
+
+class HybridSearchIndex:
+    def __init__(
+        self,
+        lexical_index: BM25Index,
+        vector_index: LocalVectorIndex = None,
+        rrf_k: int = DEFAULT_RRF_K,
+    ):
+        self.lexical_index = lexical_index
+        self.vector_index = vector_index
+        self.rrf_k = int(rrf_k)
+        self._docs_by_id = dict(zip(lexical_index.ids, lexical_index.docs))
+
+    @classmethod
+    def from_json_dir(
+        cls,
+        dirname: str,
+        field_weights: dict = None,
+        embedding_attr: str = "embedding",
+        projection: list = DEFAULT_PROJECTION,
+        id_attr: str = "id",
+        rrf_k: int = DEFAULT_RRF_K,
+    ):
+        """
+        Return a hybrid index of the JSON document files in the given directory,
+        read once into both the lexical and the vector index.  Documents without
+        an embedding are searchable by text only.
+        """
+        lexical_index, vector_index = BM25Index(field_weights), None
+        for filename in sorted(os.listdir(dirname)):
+            if not filename.endswith(".json"):
+                continue
+            doc = FS.read_json("{}/{}".format(dirname, filename))
+            if not isinstance(doc, dict) or id_attr not in doc:
+                continue
+            projected = dict()
+            for attr in projection:
+                projected[attr] = doc.get(attr)
+            lexical_index.add(doc[id_attr], doc, projected)
+            if doc.get(embedding_attr) is not None:
+                if vector_index is None:
+                    vector_index = LocalVectorIndex(len(doc[embedding_attr]))
+                vector_index.add(doc[id_attr], doc[embedding_attr], projected)
+        logging.info(
+            "HybridSearchIndex - loaded {} documents from {}".format(lexical_index.size(), dirname)
+        )
+        return cls(lexical_index, vector_index, rrf_k)
+
+    @classmethod
+    def reciprocal_rank_fusion(cls, rankings: list, rrf_k: int = DEFAULT_RRF_K) -> list:
+        """Return the (id, score) of every id in the given rankings, highest RRF score first."""
+        fused = dict()
+        for ranking in rankings:
+            for rank, id in enumerate(ranking, start=1):
+                fused[id] = fused.get(id, 0.0) + 1.0 / (rrf_k + rank)
+        return sorted(fused.items(), key=lambda item: -item[1])
+
+    def size(self) -> int:
+        return self.lexical_index.size()
+
+    def lexical_ranking(self, text: str) -> tuple:
+        """Return the ids that match the given text, best first, and their BM25 scores."""
+        scores = self.lexical_index.scores(text)
+        matched = np.flatnonzero(scores > 0.0)
+        rows = matched[np.argsort(-scores[matched], kind="stable")]
+        ids = [self.lexical_index.ids[row] for row in rows]
+        return ids, dict(zip(ids, scores[rows].tolist()))
+
+    def vector_ranking(self, embedding: list, k: int) -> tuple:
+        """Return the ids of the k nearest embeddings, best first, and their similarities."""
+        if self.vector_index is None:
+            return list(), dict()
+        query = LocalVectorIndex.normalize(np.asarray(embedding, dtype=np.float32))
+        scores = self.vector_index.matrix() @ query
+        rows = LocalVectorIndex.top_k(scores, k)
+        ids = [self.vector_index.ids[row] for row in rows]
+        return ids, dict(zip(ids, scores[rows].tolist()))
+
+    def search(
+        self, text: str = None, embeddings: list = None, top_k: int = 10, k: int = 50
+    ) -> list:
+        """
+        Return the top_k documents of the RRF fusion of the BM25 ranking of the given
+        text, and the k nearest neighbors of each of the given query embeddings.
+        Each result has its HybridScore, and its BM25Score and SimilarityScore if ranked
+        by them; the SimilarityScore is that of the most similar query embedding.
+        """
+        return self._fused(text, [(embedding, k) for embedding in embeddings or list()])[:top_k]
+
+    def execute(self, search_params: dict) -> dict:
+        """
+        Return the results of the given Azure AI Search query parameters, such as
+        those in aisearch/libraries_searches.json, shaped like the service response
+        content: an optional @odata.count and the value list, each with @search.score.
+        Only "vector" vectorQueries are supported; filters and facets are ignored.
+        """
+        for name in search_params.keys():
+            if name not in SUPPORTED_PARAMS:
+                logging.warning("HybridSearchIndex - ignored search parameter: {}".format(name))
+        top = int(search_params.get("top", DEFAULT_TOP))
+        vector_queries = list()
+        for vector_query in search_params.get("vectorQueries", list()):
+            if vector_query.get("kind", "vector") != "vector":
+                raise ValueError("unsupported vector query kind: {}".format(vector_query["kind"]))
+            vector_queries.append((vector_query["vector"], int(vector_query.get("k", top))))
+        results = self._fused(search_params.get("search"), vector_queries)
+        lexical = self._is_text_query(search_params.get("search"))
+        for result in results:
+            if lexical and len(vector_queries) > 0:
+                result["@search.score"] = result["HybridScore"]
+            elif lexical:
+                result["@search.score"] = result["BM25Score"]
+            elif len(vector_queries) > 0:
+                result["@search.score"] = result["SimilarityScore"]
+            else:
+                result["@search.score"] = 1.0
+        response = dict()
+        if search_params.get("count", False):
+            response["@odata.count"] = len(results)
+        results = self._ordered(results, search_params.get("orderby"))
+        skip = int(search_params.get("skip", 0))
+        response["value"] = self._selected(results[skip : skip + top], search_params.get("select"))
+        return response
+
+    def _fused(self, text: str, vector_queries: list) -> list:
+        rankings, bm25_scores, similarity_scores = list(), dict(), dict()
+        if self._is_text_query(text):
+            ids, bm25_scores = self.lexical_ranking(text)
+            rankings.append(ids)
+        for embedding, k in vector_queries:
+            ids, scores = self.vector_ranking(embedding, k)
+            rankings.append(ids)
+            for id, score in scores.items():
+                similarity_scores[id] = max(score, similarity_scores.get(id, -1.0))
+        if len(rankings) == 0:
+            rankings.append(list(self.lexical_index.ids))  # "*" or no text matches everything
+        results = list()
+        for id, score in self.reciprocal_rank_fusion(rankings, self.rrf_k):
+            result = dict(self._docs_by_id[id])
+            result["HybridScore"] = score
+            if id in bm25_scores:
+                result["BM25Score"] = bm25_scores[id]
+            if id in similarity_scores:
+                result["SimilarityScore"] = similarity_scores[id]
+            results.append(result)
+        return results
+
+    def _is_text_query(self, text: str) -> bool:
+        return text is not None and text.strip() not in ("", "*")
+
+    def _ordered(self, results: list, orderby: str) -> list:
+        """Return the results sorted by the given OData orderby, such as 'pk, name desc'."""
+        if orderby is None:
+            return results
+        for clause in reversed([c.split() for c in orderby.split(",") if c.strip() != ""]):
+            attr, descending = clause[0], len(clause) > 1 and clause[1].lower() == "desc"
+            if attr == "search.score()":
+                attr = "@search.score"
+            results = sorted(
+                results,
+                key=lambda result, attr=attr: (result.get(attr) is None, result.get(attr)),
+                reverse=descending,
+            )
+        return results
+
+    def _selected(self, results: list, select: str) -> list:
+        if select is None:
+            return results
+        attrs = [attr.strip() for attr in select.split(",")] + ["@search.score"]
+        return [{attr: r[attr] for attr in attrs if attr in r} for r in results]
@@ -0,0 +1,283 @@
+import logging
+import os
+import time
+
+import numpy as np
+
+from src.io.fs import FS
+from src.vector.kmeans import KMeans
+from src.vector.local_vector_index import LocalVectorIndex
+
+# This class is an approximate nearest neighbor (ANN) vector index, an
+# inverted file with product quantization (IVF-PQ), for local embedding
+# sets too large to scan exhaustively with LocalVectorIndex.
+#
+# The normalized vectors are clustered into nlist lists by a k-means
+# coarse quantizer.  Each vector is stored in the list of its nearest
+# centroid, as m one-byte codes of its residual (the vector minus the
+# centroid) from per-subspace k-means codebooks; 1536 float32 dimensions
+# and m=96 is 96 bytes rather than 6144.  A query scans only the nprobe
+# lists with the most similar centroids, scoring each code with a lookup
+# table of the query's inner products with the codebooks, since
+# q.x = q.centroid + q.residual.  nprobe trades recall for latency;
+# recall_at_k() measures it against exact search.  With a refine_factor,
+# the vectors are also kept as float16, and the top_k * refine_factor
+# candidates of the codes are re-ranked by their exact inner products.
+# Chris Joakim, 3Cloud/Cognizant, 2026
+
+KSUB = 256  # centroids per subquantizer, so that each code is one byte
+
+INDEX_ARRAYS_FILENAME = "ivfpq.npz"
+INDEX_DOCS_FILENAME = "ivfpq.json"
+
+
+class IVFPQIndex:
+    def __init__(
+        self,
+        dimensions: int,
+        nlist: int = 256,
+        m: int = 16,
+        nprobe: int = 8,
+        refine_factor: int = 0,
+    ):
+        if dimensions % m != 0:
+            raise ValueError("dimensions {} is not a multiple of m {}".format(dimensions, m))
+        self.dimensions = int(dimensions)
+        self.nlist = int(nlist)
+        self.m = int(m)
+        self.dsub = self.dimensions // self.m
+        self.nprobe = int(nprobe)
+        self.refine_factor = int(refine_factor)
+        self.centroids = None  # (nlist, dimensions)
+        self.codebooks = None  # (m, KSUB, dsub)
+        self.ids = list()  # row number -> id
+        self.docs = list()  # row number -> projected document attributes
+        self._rows_by_id = dict()
+        self._list_rows = list()  # list number -> int64 array of row numbers
+        self._list_codes = list()  # list number -> (n, m) uint8 array of codes
+        self._vectors = None  # row number -> float16 vector, if refine_factor
+
+    @classmethod
+    def from_local_index(
+        cls,
+        local_index: LocalVectorIndex,
+        nlist: int = None,
+        m: int = 16,
+        nprobe: int = 8,
+        refine_factor: int = 0,
+    ):
+        """
+        Return an index trained on, and containing, the embeddings of the given
+        LocalVectorIndex, such as one from LocalVectorIndex.from_json_dir().
+        The nlist defaults to 4 * sqrt(size), a common rule of thumb.
+        """
+        if nlist is None:
+            nlist = max(1, int(4 * np.sqrt(local_index.size())))
+        index = cls(local_index.dimensions, nlist, m, nprobe, refine_factor)
+        index.train(local_index.matrix())
+        index.add_batch(local_index.ids, local_index.matrix(), local_index.docs)
+        return index
+
+    def trained(self) -> bool:
+        return self.centroids is not None
+
+    def train(
+        self, vectors, iterations: int = 20, max_training_vectors: int = 50000, seed: int = 42
+    ) -> None:
+        """Train the coarse quantizer and the codebooks on a sample of the given vectors."""
+        t1 = time.perf_counter()
+        vectors = LocalVectorIndex.normalize(np.asarray(vectors, dtype=np.float32))
+        if vectors.shape[0] > max_training_vectors:
+            rng = np.random.default_rng(seed)
+            vectors = vectors[rng.choice(vectors.shape[0], max_training_vectors, replace=False)]
+        self.centroids = KMeans.fit(vectors, self.nlist, iterations, seed)
+        self.nlist = self.centroids.shape[0]  # at most the number of training vectors
+        residuals = vectors - self.centroids[KMeans.assign(vectors, self.centroids)]
+        self.codebooks = np.zeros((self.m, KSUB, self.dsub), dtype=np.float32)
+        for j in range(self.m):
+            subvectors = residuals[:, j * self.dsub : (j + 1) * self.dsub]
+            codebook = KMeans.fit(subvectors, KSUB, iterations, seed)
+            self.codebooks[j, : codebook.shape[0]] = codebook
+        self._list_rows = [np.zeros(0, dtype=np.int64) for _ in range(self.nlist)]
+        self._list_codes = [np.zeros((0, self.m), dtype=np.uint8) for _ in range(self.nlist)]
+        if self.refine_factor > 0:
+            self._vectors = np.zeros((0, self.dimensions), dtype=np.float16)
+        logging.info(
+            "IVFPQIndex - trained on {} vectors in {:.3f}s".format(
+                vectors.shape[0], time.perf_counter() - t1
+            )
+        )
+
+    def add(self, id: str, embedding: list, doc: dict = None) -> None:
+        self.add_batch([id], [embedding], None if doc is None else [doc])
+
+    def add_batch(self, ids: list, embeddings, docs: list = None) -> None:
+        """Add the given new ids, with their embeddings and optional projected attributes."""
+        if not self.trained():
+            raise ValueError("the index must be trained before adding vectors")
+        vectors = LocalVectorIndex.normalize(np.asarray(embeddings, dtype=np.float32))
+        if vectors.ndim != 2 or vectors.shape[1] != self.dimensions:
+            raise ValueError(
+                "expected {} dimensions, got {}".format(self.dimensions, vectors.shape)
+            )
+        first_row = len(self.ids)
+        for n, id in enumerate(ids):
+            if id in self._rows_by_id:
+                raise ValueError("id {} is already in the index".format(id))
+            self._rows_by_id[id] = first_row + n
+            self.ids.append(id)
+            self.docs.append({"id": id} if docs is None else docs[n])
+        labels = KMeans.assign(vectors, self.centroids)
+        codes = self.encode(vectors - self.centroids[labels])
+        rows = np.arange(first_row, first_row + len(ids), dtype=np.int64)
+        if self._vectors is not None:
+            self._vectors = np.concatenate((self._vectors, vectors.astype(np.float16)))
+        for list_no in np.unique(labels):
+            selected = labels == list_no
+            self._list_rows[list_no] = np.concatenate((self._list_rows[list_no], rows[selected]))
+            self._list_codes[list_no] = np.concatenate((self._list_codes[list_no], codes[selected]))
+
+    def encode(self, residuals: np.ndarray) -> np.ndarray:
+        """Return the (n, m) uint8 product quantizer codes of the given residuals."""
+        codes = np.zeros((residuals.shape[0], self.m), dtype=np.uint8)
+        for j in range(self.m):
+            subvectors = residuals[:, j * self.dsub : (j + 1) * self.dsub]
+            codes[:, j] = KMeans.assign(subvectors, self.codebooks[j])
+        return codes
+
+    def size(self) -> int:
+        return len(self.ids)
+
+    def search(
+        self, embedding: list, top_k: int = 5, nprobe: int = None, refine_factor: int = None
+    ) -> list:
+        """
+        Return the approximate top_k most similar documents, most similar first.
+        The nprobe and refine_factor default to those of the index; a refine_factor
+        requires an index created with one, as only then are the vectors stored.
+        """
+        query = LocalVectorIndex.normalize(np.asarray(embedding, dtype=np.float32))
+        if refine_factor is None:
+            refine_factor = self.refine_factor
+        if refine_factor > 0 and self._vectors is None:
+            raise ValueError(
+                "refine_factor {} requires an index created with a refine_factor".format(
+                    refine_factor
+                )
+            )
+        if refine_factor > 0:
+            rows, _ = self._search_rows(query, top_k * refine_factor, nprobe or self.nprobe)
+            scores = self._vectors[rows].astype(np.float32) @ query
+            selected = LocalVectorIndex.top_k(scores, top_k)
+            rows, scores = rows[selected], scores[selected]
+        else:
+            rows, scores = self._search_rows(query, top_k, nprobe or self.nprobe)
+        results = list()
+        for row, score in zip(rows, scores):
+            result = dict(self.docs[row])
+            result["SimilarityScore"] = float(score)
+            results.append(result)
+        return results
+
+    def search_batch(
+        self, embeddings, top_k: int = 5, nprobe: int = None, refine_factor: int = None
+    ) -> list:
+        return [self.search(e, top_k, nprobe, refine_factor) for e in embeddings]
+
+    def recall_at_k(
+        self,
+        exact_index: LocalVectorIndex,
+        queries,
+        top_k: int = 10,
+        nprobe: int = None,
+        refine_factor: int = None,
+    ) -> dict:
+        """
+        Return the mean recall@k of this index, the fraction of the exact top_k
+        ids that it also returns, for the given queries, and the mean latency
+        of both indexes in milliseconds.
+        """
+        queries = np.asarray(queries, dtype=np.float32)
+        t1 = time.perf_counter()
+        exact = [[r["id"] for r in exact_index.search(q, top_k)] for q in queries]
+        t2 = time.perf_counter()
+        approximate = [
+            [r["id"] for r in self.search(q, top_k, nprobe, refine_factor)] for q in queries
+        ]
+        t3 = time.perf_counter()
+        found = [len(set(e) & set(a)) / len(e) for e, a in zip(exact, approximate) if len(e) > 0]
+        data = dict()
+        data["top_k"] = top_k
+        data["nprobe"] = nprobe or self.nprobe
+        data["refine_factor"] = self.refine_factor if refine_factor is None else refine_factor
+        data["queries"] = len(queries)
+        data["recall"] = float(np.mean(found)) if len(found) > 0 else 0.0
+        data["exact_ms"] = (t2 - t1) * 1000.0 / max(1, len(queries))
+        data["ann_ms"] = (t3 - t2) * 1000.0 / max(1, len(queries))
+        return data
+
+    def save(self, dirname: str) -> None:
+        """Save the index as a NumPy .npz file of its arrays and a JSON file of its ids and docs."""
+        os.makedirs(dirname, exist_ok=True)
+        list_sizes = np.array([len(rows) for rows in self._list_rows], dtype=np.int64)
+        arrays = dict()
+        arrays["centroids"] = self.centroids
+        arrays["codebooks"] = self.codebooks
+        arrays["list_sizes"] = list_sizes
+        arrays["list_rows"] = np.concatenate(self._list_rows)
+        arrays["list_codes"] = np.concatenate(self._list_codes)
+        if self._vectors is not None:
+            arrays["vectors"] = self._vectors
+        np.savez("{}/{}".format(dirname, INDEX_ARRAYS_FILENAME), **arrays)
+        data = dict()
+        data["dimensions"] = self.dimensions
+        data["nlist"] = self.nlist
+        data["m"] = self.m
+        data["nprobe"] = self.nprobe
+        data["refine_factor"] = self.refine_factor
+        data["ids"] = self.ids
+        data["docs"] = self.docs
+        FS.write_json(
+            data, "{}/{}".format(dirname, INDEX_DOCS_FILENAME), pretty=False, verbose=False
+        )
+
+    @classmethod
+    def load(cls, dirname: str):
+        data = FS.read_json("{}/{}".format(dirname, INDEX_DOCS_FILENAME))
+        index = cls(
+            data["dimensions"], data["nlist"], data["m"], data["nprobe"], data["refine_factor"]
+        )
+        with np.load("{}/{}".format(dirname, INDEX_ARRAYS_FILENAME)) as arrays:
+            index.centroids = arrays["centroids"]
+            index.codebooks = arrays["codebooks"]
+            offsets = np.concatenate(([0], np.cumsum(arrays["list_sizes"])))
+            list_rows, list_codes = arrays["list_rows"], arrays["list_codes"]
+            for start, end in zip(offsets[:-1], offsets[1:]):
+                index._list_rows.append(list_rows[start:end])
+                index._list_codes.append(list_codes[start:end])
+            if "vectors" in arrays:
+                index._vectors = arrays["vectors"]
+        index.ids = data["ids"]
+        index.docs = data["docs"]
+        index._rows_by_id = {id: row for row, id in enumerate(index.ids)}
+        return index
+
+    def _search_rows(self, query: np.ndarray, top_k: int, nprobe: int) -> tuple:
+        """Return the row numbers and approximate scores of the top_k rows, highest first."""
+        coarse_scores = self.centroids @ query
+        nprobe = min(nprobe, self.nlist)
+        probes = np.argpartition(-coarse_scores, nprobe - 1)[:nprobe]
+        # the inner products of each query subvector with each codebook entry: (m, KSUB)
+        lut = np.einsum("jd,jkd->jk", query.reshape(self.m, self.dsub), self.codebooks)
+        subspaces = np.arange(self.m)
+        rows, scores = list(), list()
+        for list_no in probes:
+            codes = self._list_codes[list_no]
+            if len(codes) > 0:
+                rows.append(self._list_rows[list_no])
+                scores.append(coarse_scores[list_no] + lut[subspaces, codes].sum(axis=1))
+        if len(rows) == 0:
+            return np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.float32)
+        rows, scores = np.concatenate(rows), np.concatenate(scores)
+        selected = LocalVectorIndex.top_k(scores, top_k)
+        return rows[selected], scores[selected]
@@ -0,0 +1,48 @@
+import numpy as np
+
+# This class implements k-means clustering (Lloyd's algorithm) with NumPy,
+# for training the coarse quantizer and the product quantizer codebooks of
+# IVFPQIndex.  Distances are squared L2, computed in batches of rows as
+# ||c||^2 - 2 x.c, which ranks the centroids the same as ||x - c||^2.
+# Chris Joakim, 3Cloud/Cognizant, 2026
+
+ASSIGN_BATCH_SIZE = 8192
+
+
+class KMeans:
+    @classmethod
+    def fit(cls, vectors: np.ndarray, k: int, iterations: int = 20, seed: int = 42) -> np.ndarray:
+        """Return the (k, dimensions) float32 centroids of the given (n, dimensions) vectors."""
+        vectors = np.asarray(vectors, dtype=np.float32)
+        rng = np.random.default_rng(seed)
+        k = min(int(k), vectors.shape[0])
+        centroids = vectors[rng.choice(vectors.shape[0], k, replace=False)].copy()
+        for _ in range(iterations):
+            labels = cls.assign(vectors, centroids)
+            counts = np.bincount(labels, minlength=k)
+            order = np.argsort(labels, kind="stable")
+            starts = np.concatenate(([0], np.cumsum(counts)[:-1]))
+            nonempty = counts > 0
+            sums = np.add.reduceat(vectors[order], starts[nonempty], axis=0)
+            previous = centroids.copy()
+            centroids[nonempty] = sums / counts[nonempty, None]
+            # empty clusters are restarted at random vectors
+            empty = np.flatnonzero(~nonempty)
+            if len(empty) > 0:
+                centroids[empty] = vectors[rng.choice(vectors.shape[0], len(empty))]
+            elif np.allclose(previous, centroids):
+                break
+        return centroids
+
+    @classmethod
+    def assign(cls, vectors: np.ndarray, centroids: np.ndarray) -> np.ndarray:
+        """Return the row number of the nearest centroid of each of the given vectors."""
+        norms = (centroids * centroids).sum(axis=1)
+        labels = np.empty(vectors.shape[0], dtype=np.int64)
+        for start in range(0, vectors.shape[0], ASSIGN_BATCH_SIZE):
+            batch = vectors[start : start + ASSIGN_BATCH_SIZE]
+            distances = batch @ centroids.T
+            distances *= -2.0
+            distances += norms
+            labels[start : start + len(batch)] = np.argmin(distances, axis=1)
+        return labels
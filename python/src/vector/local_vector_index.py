@@ -0,0 +1,171 @@
+import logging
+import os
+
+import numpy as np
+
+from src.io.fs import FS
+from src.vector.embedding_matrix_file import EmbeddingMatrixFile
+
+# This class is an in-memory, brute-force (exact) vector index for local
+# development and small corpora, such as the embedded documents in
+# data/cosmosdb/.  The embeddings are rows of one contiguous float32 matrix,
+# normalized to unit length when added, so that the cosine similarity of a
+# query to every row is a single matrix-vector product.  The top-k rows
+# are then selected with argpartition, and only those k are sorted.
+# Search results are shaped like the CosmosNoSqlUtil.vector_search results:
+# the projected document attributes plus a SimilarityScore.
+# Chris Joakim, 3Cloud/Cognizant, 2026
+
+DEFAULT_PROJECTION = ["id", "pk", "name"]
+
+INITIAL_CAPACITY = 1024
+
+
+class LocalVectorIndex:
+    def __init__(self, dimensions: int):
+        self.dimensions = int(dimensions)
+        self.ids = list()  # row number -> id
+        self.docs = list()  # row number -> projected document attributes
+        self._rows_by_id = dict()  # id -> row number
+        self._matrix = np.zeros((INITIAL_CAPACITY, self.dimensions), dtype=np.float32)
+        self._size = 0
+
+    @classmethod
+    def from_json_dir(
+        cls,
+        dirname: str,
+        embedding_attr: str = "embedding",
+        projection: list = DEFAULT_PROJECTION,
+        id_attr: str = "id",
+    ):
+        """
+        Return an index of the JSON document files in the given directory that
+        have an embedding, such as data/cosmosdb/.  The given projection is the
+        list of document attributes to keep and return in the search results.
+        """
+        index = None
+        for filename in sorted(os.listdir(dirname)):
+            if not filename.endswith(".json"):
+                continue
+            doc = FS.read_json("{}/{}".format(dirname, filename))
+            if not isinstance(doc, dict) or doc.get(embedding_attr) is None:
+                continue
+            if index is None:
+                index = cls(len(doc[embedding_attr]))
+            projected = dict()
+            for attr in projection:
+                projected[attr] = doc.get(attr)
+            index.add(doc[id_attr], doc[embedding_attr], projected)
+        if index is not None:
+            logging.info(
+                "LocalVectorIndex - loaded {} embeddings from {}".format(index.size(), dirname)
+            )
+        return index
+
+    @classmethod
+    def from_matrix_file(cls, path: str):
+        """
+        Return an index of the given EmbeddingMatrixFile, such as one written by
+        EmbeddingMatrixFile.write_from_json_dir(); far faster than parsing JSON.
+        A normalized float32 file is searched in place, through its read-only
+        memmap, so its pages are loaded on demand and shared via the page cache;
+        the matrix is copied into memory only when embeddings are added.
+        """
+        matrix_file = EmbeddingMatrixFile.open(path)
+        index = cls(matrix_file.dimensions)
+        index._matrix = matrix_file.matrix
+        if index._matrix.dtype != np.float32:
+            index._matrix = np.asarray(index._matrix, dtype=np.float32)
+        if not matrix_file.normalized:
+            index._matrix = cls.normalize(index._matrix)
+        index._size = matrix_file.rows
+        index.ids = list(matrix_file.ids())
+        index.docs = list(matrix_file.docs())
+        index._rows_by_id = {id: row for row, id in enumerate(index.ids)}
+        return index
+
+    def add(self, id: str, embedding: list, doc: dict = None) -> None:
+        """Add, or replace, the embedding of the given id; doc is its projected attributes."""
+        vector = self.normalize(np.asarray(embedding, dtype=np.float32))
+        if vector.shape != (self.dimensions,):
+            raise ValueError("expected {} dimensions, got {}".format(self.dimensions, vector.shape))
+        if doc is None:
+            doc = {"id": id}
+        row = self._rows_by_id.get(id)
+        if row is None:
+            if self._size == self._matrix.shape[0]:
+                self._grow()
+            row = self._size
+            self._size = self._size + 1
+            self.ids.append(id)
+            self.docs.append(doc)
+            self._rows_by_id[id] = row
+        else:
+            self.docs[row] = doc
+            if not self._matrix.flags.writeable:
+                self._matrix = np.array(self._matrix, dtype=np.float32)  # copy on write
+        self._matrix[row] = vector
+
+    def size(self) -> int:
+        return self._size
+
+    def matrix(self) -> np.ndarray:
+        """Return the (size, dimensions) matrix of normalized embeddings; a view, not a copy."""
+        return self._matrix[: self._size]
+
+    def embedding(self, id: str) -> np.ndarray | None:
+        """Return the normalized embedding of the given id, or None."""
+        row = self._rows_by_id.get(id)
+        return None if row is None else self._matrix[row]
+
+    def find(self, attr: str, value) -> str | None:
+        """Return the id of the first document with the given projected attribute value."""
+        for id, doc in zip(self.ids, self.docs):
+            if doc.get(attr) == value:
+                return id
+        return None
+
+    def search(self, embedding: list, top_k: int = 5) -> list:
+        """Return the top_k most similar documents, by cosine similarity, most similar first."""
+        query = self.normalize(np.asarray(embedding, dtype=np.float32))
+        scores = self.matrix() @ query
+        return self._results(scores, top_k)
+
+    def search_batch(self, embeddings, top_k: int = 5) -> list:
+        """Return the search results of each of the given query embeddings, in one product."""
+        queries = self.normalize(np.asarray(embeddings, dtype=np.float32))
+        scores = queries @ self.matrix().T  # (queries, size)
+        return [self._results(row_scores, top_k) for row_scores in scores]
+
+    @classmethod
+    def top_k(cls, scores: np.ndarray, top_k: int) -> np.ndarray:
+        """Return the row numbers of the top_k scores, highest first."""
+        top_k = min(int(top_k), scores.shape[0])
+        if top_k <= 0:
+            return np.zeros(0, dtype=np.int64)
+        if top_k < scores.shape[0]:
+            rows = np.argpartition(-scores, top_k - 1)[:top_k]
+        else:
+            rows = np.arange(scores.shape[0])
+        return rows[np.argsort(-scores[rows], kind="stable")]
+
+    @classmethod
+    def normalize(cls, vectors: np.ndarray) -> np.ndarray:
+        """Return the given vector, or rows of a matrix, scaled to unit length."""
+        norms = np.linalg.norm(vectors, axis=-1, keepdims=True)
+        norms[norms == 0] = 1.0
+        return vectors / norms
+
+    def _results(self, scores: np.ndarray, top_k: int) -> list:
+        results = list()
+        for row in self.top_k(scores, top_k):
+            result = dict(self.docs[row])
+            result["SimilarityScore"] = float(scores[row])
+            results.append(result)
+        return results
+
+    def _grow(self) -> None:
+        capacity = max(self._matrix.shape[0] * 2, INITIAL_CAPACITY)
+        matrix = np.zeros((capacity, self.dimensions), dtype=np.float32)
+        matrix[: self._size] = self._matrix[: self._size]
+        self._matrix = matrix
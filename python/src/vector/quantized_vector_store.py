@@ -0,0 +1,201 @@
+import time
+
+import numpy as np
+
+from src.vector.embedding_matrix_file import EmbeddingMatrixFile
+from src.vector.local_vector_index import LocalVectorIndex
+
+# This class stores embeddings as quantized codes, to shrink their memory
+# footprint for exhaustive search:
+#   int8   - each dimension as a signed byte, with a per-vector float32
+#            scale (max |x| / 127); 4x smaller than float32.
+#   binary - each dimension as its sign bit, packed eight per byte, with a
+#            per-vector scale (mean |x|); 32x smaller.  Candidates are ranked
+#            by the Hamming distance of the packed bits to the query's.
+# Searches score every code, then optionally rescore the top
+# top_k * rescore_factor candidates at full precision, from a float32 matrix.
+# Use from_matrix_file() to rescore from the read-only np.memmap of an
+# EmbeddingMatrixFile, so that only the codes are resident in memory;
+# full precision rows in memory are reported by resident_nbytes().
+# recall_report() measures the search quality against exact search.
+# Chris Joakim, 3Cloud/Cognizant, 2026
+
+MODES = ("int8", "binary")
+
+SCORE_BATCH_ROWS = 16384  # int8 codes are widened to float32 in batches of rows
+
+
+class QuantizedVectorStore:
+    def __init__(self, dimensions: int, mode: str = "int8"):
+        if mode not in MODES:
+            raise ValueError("mode must be one of {}".format(MODES))
+        self.dimensions = int(dimensions)
+        self.mode = mode
+        self.ids = list()  # row number -> id
+        self.docs = list()  # row number -> projected document attributes
+        self.codes = None  # (n, dimensions) int8, or (n, dimensions / 8) uint8 packed bits
+        self.scales = None  # (n,) float32
+        self.full_precision = None  # optional (n, dimensions) float32 rows, for rescoring
+
+    @classmethod
+    def from_local_index(
+        cls, local_index: LocalVectorIndex, mode: str = "int8", rescore: bool = True
+    ):
+        """
+        Return a store of the embeddings of the given LocalVectorIndex.  If rescore
+        is True its matrix is kept as the full precision vectors for rescoring, and
+        stays in memory unless the index is from LocalVectorIndex.from_matrix_file().
+        """
+        store = cls(local_index.dimensions, mode)
+        full_precision = local_index.matrix() if rescore else None
+        store.add_batch(local_index.ids, local_index.matrix(), local_index.docs, full_precision)
+        return store
+
+    @classmethod
+    def from_matrix_file(cls, path: str, mode: str = "int8", rescore: bool = True):
+        """
+        Return a store of the embeddings of the given EmbeddingMatrixFile, quantized
+        SCORE_BATCH_ROWS rows at a time.  If rescore is True the file's read-only
+        memmap is kept for rescoring, so its pages are read on demand, not resident.
+        """
+        matrix_file = EmbeddingMatrixFile.open(path)
+        store = cls(matrix_file.dimensions, mode)
+        ids, docs = matrix_file.ids(), matrix_file.docs()
+        for start in range(0, matrix_file.rows, SCORE_BATCH_ROWS):
+            end = start + SCORE_BATCH_ROWS
+            store.add_batch(ids[start:end], matrix_file.matrix[start:end], docs[start:end])
+        store.full_precision = matrix_file.matrix if rescore else None
+        return store
+
+    def add_batch(self, ids: list, embeddings, docs: list = None, full_precision=None) -> None:
+        """
+        Add the given ids, with their embeddings and optional projected attributes.
+        The optional full_precision is the normalized float32 matrix of all of the
+        rows of the store, including these, such as a np.memmap of an embedding file.
+        """
+        vectors = LocalVectorIndex.normalize(np.asarray(embeddings, dtype=np.float32))
+        if vectors.ndim != 2 or vectors.shape[1] != self.dimensions:
+            raise ValueError(
+                "expected {} dimensions, got {}".format(self.dimensions, vectors.shape)
+            )
+        codes, scales = self.quantize(vectors)
+        if self.codes is None:
+            self.codes, self.scales = codes, scales
+        else:
+            self.codes = np.concatenate((self.codes, codes))
+            self.scales = np.concatenate((self.scales, scales))
+        for n, id in enumerate(ids):
+            self.ids.append(id)
+            self.docs.append({"id": id} if docs is None else docs[n])
+        self.full_precision = full_precision
+
+    def quantize(self, vectors: np.ndarray) -> tuple:
+        """Return the codes and per-vector scales of the given (n, dimensions) vectors."""
+        if self.mode == "int8":
+            scales = np.abs(vectors).max(axis=1) / 127.0
+            scales[scales == 0] = 1.0
+            codes = np.rint(vectors / scales[:, None]).astype(np.int8)
+        else:
+            scales = np.abs(vectors).mean(axis=1)
+            codes = np.packbits(vectors > 0, axis=1)
+        return codes, scales.astype(np.float32)
+
+    def dequantize(self, rows) -> np.ndarray:
+        """Return the approximate float32 vectors of the given row numbers."""
+        if self.mode == "int8":
+            return self.codes[rows].astype(np.float32) * self.scales[rows, None]
+        bits = np.unpackbits(self.codes[rows], axis=-1, count=self.dimensions)
+        return (bits.astype(np.float32) * 2.0 - 1.0) * self.scales[rows, None]
+
+    def size(self) -> int:
+        return len(self.ids)
+
+    def nbytes(self) -> int:
+        """Return the bytes of the codes and scales, excluding any full precision vectors."""
+        if self.codes is None:
+            return 0
+        return self.codes.nbytes + self.scales.nbytes
+
+    def full_precision_nbytes(self) -> int:
+        """Return the bytes of the full precision vectors in memory; 0 if memory-mapped."""
+        if self.full_precision is None or isinstance(self.full_precision, np.memmap):
+            return 0
+        return self.full_precision.nbytes
+
+    def resident_nbytes(self) -> int:
+        """Return the bytes of the codes and scales, and of any in-memory full precision rows."""
+        return self.nbytes() + self.full_precision_nbytes()
+
+    def scores(self, query: np.ndarray) -> np.ndarray:
+        """Return the approximate similarity of the given normalized query to every row."""
+        if self.mode == "int8":
+            scores = np.empty(self.size(), dtype=np.float32)
+            for start in range(0, self.size(), SCORE_BATCH_ROWS):
+                batch = self.codes[start : start + SCORE_BATCH_ROWS]
+                scores[start : start + len(batch)] = batch.astype(np.float32) @ query
+            return scores * self.scales
+        # binary: the fraction of matching sign bits, mapped to [-1.0, 1.0]
+        query_bits = np.packbits(query > 0)
+        distances = np.bitwise_count(np.bitwise_xor(self.codes, query_bits)).sum(axis=1)
+        return 1.0 - (2.0 * distances.astype(np.float32) / self.dimensions)
+
+    def search(self, embedding: list, top_k: int = 5, rescore_factor: int = 4) -> list:
+        """
+        Return the top_k most similar documents, most similar first.  With a
+        rescore_factor, and full precision vectors, the top_k * rescore_factor
+        candidates are rescored exactly; otherwise the scores are approximate.
+        """
+        query = LocalVectorIndex.normalize(np.asarray(embedding, dtype=np.float32))
+        scores = self.scores(query)
+        if rescore_factor > 0 and self.full_precision is not None:
+            rows = LocalVectorIndex.top_k(scores, top_k * rescore_factor)
+            rows = np.sort(rows)  # sequential reads, if the vectors are memory-mapped
+            candidates = np.asarray(self.full_precision[rows], dtype=np.float32)
+            exact = LocalVectorIndex.normalize(candidates) @ query
+            selected = LocalVectorIndex.top_k(exact, top_k)
+            rows, scores = rows[selected], exact[selected]
+        else:
+            rows = LocalVectorIndex.top_k(scores, top_k)
+            scores = scores[rows]
+        results = list()
+        for row, score in zip(rows, scores):
+            result = dict(self.docs[row])
+            result["SimilarityScore"] = float(score)
+            results.append(result)
+        return results
+
+    def recall_report(self, queries, top_k: int = 10, rescore_factors: list = (0, 4)) -> list:
+        """
+        Return a list of dicts with the recall@k, vs exact search of the full precision
+        vectors, and mean latency of the given queries for each rescore_factor.
+        """
+        if self.full_precision is None:
+            raise ValueError("the recall report requires the full precision vectors")
+        queries = LocalVectorIndex.normalize(np.asarray(queries, dtype=np.float32))
+        full_precision = LocalVectorIndex.normalize(
+            np.asarray(self.full_precision, dtype=np.float32)
+        )
+        exact = list()
+        for query in queries:
+            rows = LocalVectorIndex.top_k(full_precision @ query, top_k)
+            exact.append(set([self.ids[row] for row in rows]))
+        report = list()
+        for rescore_factor in rescore_factors:
+            t1 = time.perf_counter()
+            found = list()
+            for query, expected in zip(queries, exact):
+                results = self.search(query, top_k, rescore_factor)
+                found.append(len(expected & set([r["id"] for r in results])) / len(expected))
+            elapsed = time.perf_counter() - t1
+            data = dict()
+            data["mode"] = self.mode
+            data["top_k"] = top_k
+            data["rescore_factor"] = rescore_factor
+            data["queries"] = len(queries)
+            data["recall"] = float(np.mean(found)) if len(found) > 0 else 0.0
+            data["ms"] = elapsed * 1000.0 / max(1, len(queries))
+            data["code_bytes_per_vector"] = self.nbytes() / max(1, self.size())
+            data["bytes_per_vector"] = self.resident_nbytes() / max(1, self.size())
+            data["compression"] = (self.dimensions * 4) / data["bytes_per_vector"]
+            report.append(data)
+        return report
@@ -0,0 +1,64 @@
+import json
+
+from src.ai.adaptive_batcher import MAX_DOCUMENTS, MIN_SCALE, AdaptiveBatcher
+
+# pytest -v tests/test_adaptive_batcher.py
+# Chris Joakim, 3Cloud/Cognizant, 2026
+
+
+def test_document_size():
+    doc = {"id": "1", "name": "café", "values": [1.5, 2.0]}
+    body = json.dumps(doc, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+    assert AdaptiveBatcher.document_size(doc) == len(body)
+
+
+def test_batches_fill_to_the_byte_and_document_limits():
+    small = [{"id": str(n)} for n in range(2500)]
+    batcher = AdaptiveBatcher()
+    assert [len(b) for b in batcher.batches(small)] == [1000, 1000, 500]
+    assert AdaptiveBatcher(max_documents=5000).max_documents == MAX_DOCUMENTS
+
+    large = [{"id": str(n), "embedding": [0.5] * 1000} for n in range(25)]
+    size = AdaptiveBatcher.document_size(large[0])
+    batcher = AdaptiveBatcher(max_bytes=size * 10 + 100)
+    batches = list(batcher.batches(large))
+    assert [len(b) for b in batches] == [10, 10, 5]
+    assert [doc for b in batches for doc in b] == large
+    for batch in batches:
+        body = json.dumps({"value": batch}, separators=(",", ":"))
+        assert len(body) <= batcher.max_bytes
+
+    # an oversized document is still uploaded, in its own batch
+    batcher = AdaptiveBatcher(max_bytes=size // 2)
+    assert [len(b) for b in batcher.batches(large[0:3])] == [1, 1, 1]
+    assert batcher.oversized_count == 3
+
+
+def test_limits_shrink_on_throttling_and_regrow():
+    batcher = AdaptiveBatcher(max_bytes=1000000, max_documents=100)
+    batcher.record_throttle()
+    assert batcher.documents_limit() == 50
+    assert batcher.bytes_limit() == 500000
+    batcher.record_throttle()
+    assert batcher.documents_limit() == 25
+    for _ in range(20):
+        batcher.record_throttle()
+    assert batcher.scale == MIN_SCALE
+    assert batcher.documents_limit() == 2
+    small_batcher = AdaptiveBatcher(max_documents=10)
+    for _ in range(10):
+        small_batcher.record_throttle()
+    assert small_batcher.documents_limit() == 1  # never below one document
+    for _ in range(20):
+        batcher.record_success()
+    assert batcher.documents_limit() == 100
+    assert batcher.stats()["throttled_count"] == 22
+
+
+def test_limits_apply_while_consuming_batches():
+    batcher = AdaptiveBatcher(max_documents=10)
+    batches = batcher.batches([{"id": str(n)} for n in range(30)])
+    assert len(next(batches)) == 10
+    batcher.record_throttle()
+    assert len(next(batches)) == 5
+    assert len(next(batches)) == 5
@@ -0,0 +1,175 @@
+import asyncio
+import gzip
+import json
+
+import httpx
+import pytest
+
+from src.ai.adaptive_batcher import AdaptiveBatcher
+from src.ai.ai_search_async_util import AISearchAsyncUtil
+
+# pytest -v tests/test_ai_search_async_util.py
+# Chris Joakim, 3Cloud/Cognizant, 2026
+
+
+@pytest.fixture(autouse=True)
+def search_envvars(monkeypatch):
+    monkeypatch.setenv("AZURE_AI_SEARCH_URL", "https://example.search.windows.net")
+    monkeypatch.setenv("AZURE_AI_SEARCH_VERSION", "2025-09-01")
+    monkeypatch.setenv("AZURE_AI_SEARCH_KEY", "secret")
+
+
+class SearchServiceTransport:
+    """
+    A stand-in for the index documents API.  Documents whose id is in flaky fail
+    with a retryable 503 status once, in a 207 response; those in invalid always
+    fail with a 400 status; and the first request fails with a 503 response.
+    """
+
+    def __init__(self, flaky: set = set(), invalid: set = set(), throttle_first: bool = False):
+        self.flaky = set(flaky)
+        self.invalid = set(invalid)
+        self.throttle_first = throttle_first
+        self.requests = list()  # the ids of each request
+        self.bodies = list()
+        self.active = 0
+        self.max_active = 0
+
+    async def handle(self, request: httpx.Request) -> httpx.Response:
+        content = request.content
+        if request.headers.get("Content-Encoding") == "gzip":
+            content = gzip.decompress(content)
+        self.bodies.append(json.loads(content))
+        ids = [doc["id"] for doc in self.bodies[-1]["value"]]
+        self.requests.append(ids)
+        self.active = self.active + 1
+        self.max_active = max(self.max_active, self.active)
+        await asyncio.sleep(0.01)
+        self.active = self.active - 1
+        if self.throttle_first and len(self.requests) == 1:
+            return httpx.Response(503, headers={"retry-after-ms": "10"}, text="busy")
+        statuses = list()
+        for id in ids:
+            if id in self.flaky:
+                self.flaky.remove(id)
+                statuses.append({"key": id, "status": False, "statusCode": 503})
+            elif id in self.invalid:
+                statuses.append(
+                    {"key": id, "status": False, "statusCode": 400, "errorMessage": "invalid"}
+                )
+            else:
+                statuses.append({"key": id, "status": True, "statusCode": 201})
+        status_code = 200 if all([s["status"] for s in statuses]) else 207
+        return httpx.Response(status_code, json={"value": statuses})
+
+
+def search_util(transport: SearchServiceTransport, opts: dict = {}):
+    util = AISearchAsyncUtil({"backoff_seconds": 0.01, **opts})
+    util._http_client = httpx.AsyncClient(transport=httpx.MockTransport(transport.handle))
+    return util
+
+
+def documents(count: int) -> list:
+    return [{"id": str(n), "name": "lib{}".format(n)} for n in range(count)]
+
+
+async def test_load_documents_concurrently():
+    transport = SearchServiceTransport()
+    async with search_util(transport, {"max_concurrency": 3}) as util:
+        stats = await util.load_documents("libraries", documents(1000), batch_size=100)
+    assert stats["documents"] == 1000
+    assert stats["batches"] == 10
+    assert stats["requests"] == 10
+    assert stats["succeeded"] == 1000
+    assert stats["retried"] == 0
+    assert stats["failed"] == list()
+    assert transport.max_active == 3
+    assert sorted([int(id) for ids in transport.requests for id in ids]) == list(range(1000))
+
+
+async def test_only_failed_documents_are_retried():
+    transport = SearchServiceTransport(flaky={"3", "42", "77"}, invalid={"50"})
+    async with search_util(transport) as util:
+        stats = await util.load_documents("libraries", documents(100), batch_size=50)
+    assert stats["requests"] == 4
+    assert sorted(transport.requests[2:]) == [["3", "42"], ["77"]]
+    assert stats["succeeded"] == 99
+    assert stats["retried"] == 3
+    assert stats["failed"][0]["key"] == "50"
+    assert stats["failed"][0]["statusCode"] == 400
+    assert util.retry_count == 2
+
+
+async def test_throttled_batches_are_retried_in_smaller_batches():
+    transport = SearchServiceTransport(throttle_first=True)
+    async with search_util(transport, {"max_concurrency": 1}) as util:
+        stats = await util.load_documents("libraries", documents(30), batch_size=10)
+    ids = [str(n) for n in range(10)]
+    assert transport.requests[0] == ids
+    assert transport.requests[1:3] == [ids[0:5], ids[5:10]]  # the batch limit was halved
+    assert [len(ids) for ids in transport.requests[3:]] == [7, 8, 5]  # and regrows
+    assert stats["requests"] == 6
+    assert stats["batches"] == 4
+    assert stats["succeeded"] == 30
+    assert stats["retried"] == 10
+    assert stats["batcher"]["throttled_count"] == 1
+    assert stats["batcher"]["documents_limit"] == 10
+
+
+async def test_batches_are_limited_by_bytes():
+    transport = SearchServiceTransport()
+    docs = [{"id": str(n), "embedding": [0.123456789] * 1536} for n in range(100)]
+    size = AdaptiveBatcher.document_size(docs[0])
+    async with search_util(transport) as util:
+        stats = await util.load_documents("libraries", docs, max_bytes=size * 10 + 100)
+    assert [len(ids) for ids in transport.requests] == [10] * 10
+    assert stats["succeeded"] == 100
+
+
+async def test_retries_are_limited():
+    transport = SearchServiceTransport(flaky={"1"})
+    async with search_util(transport, {"max_retries": 0}) as util:
+        stats = await util.load_documents("libraries", documents(5))
+    assert stats["succeeded"] == 4
+    assert stats["failed"] == [{"key": "1", "status": False, "statusCode": 503}]
+
+
+async def test_unmatched_status_keys_fail():
+    transport = SearchServiceTransport(flaky={"1"})
+    async with search_util(transport) as util:
+        stats = await util.load_documents("libraries", documents(5), key_attr="key")
+    assert stats["succeeded"] == 4
+    assert stats["retried"] == 0
+    assert stats["failed"] == [{"key": "1", "status": False, "statusCode": 503}]
+
+
+async def test_trimmed_and_compressed_bodies():
+    transport = SearchServiceTransport()
+    docs = [{"id": str(n), "embedding": [0.123456789] * 1536} for n in range(20)]
+    opts = {"float_digits": 3, "gzip": True, "payload_stats": True}
+    async with search_util(transport, opts) as util:
+        stats = await util.load_documents("libraries", docs, batch_size=10)
+    assert stats["succeeded"] == 20
+    assert transport.bodies[0]["value"][0]["embedding"] == [0.123] * 1536
+    payload = stats["payload"]
+    assert payload["body_count"] == 2
+    assert payload["encoded_bytes"] < payload["json_bytes"] * 0.6
+    assert payload["wire_bytes"] < payload["encoded_bytes"] * 0.1
+    assert payload["wire_ratio"] == payload["wire_bytes"] / payload["json_bytes"]
+    assert util.encoder._encoded_documents == dict()
+
+
+async def test_search_requests_are_not_compressed():
+    requests = list()
+
+    async def handle(request: httpx.Request) -> httpx.Response:
+        requests.append(request)
+        return httpx.Response(200, json={"value": [{"id": "1"}]})
+
+    util = AISearchAsyncUtil({"gzip": True})
+    util._http_client = httpx.AsyncClient(transport=httpx.MockTransport(handle))
+    async with util:
+        result = await util.search_index("libraries", {"search": "fastapi"})
+    assert result["value"][0]["id"] == "1"
+    assert "Content-Encoding" not in requests[0].headers
+    assert json.loads(requests[0].content) == {"search": "fastapi"}
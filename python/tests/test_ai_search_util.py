@@ -0,0 +1,110 @@
+import gzip
+import json
+import threading
+
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import httpx
+import pytest
+
+from src.ai.ai_search_util import AISearchUtil
+
+# pytest -v tests/test_ai_search_util.py
+# Chris Joakim, 3Cloud/Cognizant, 2026
+
+
+class SearchServiceHandler(BaseHTTPRequestHandler):
+    """A stand-in for the search service; counts the connections it accepts."""
+
+    protocol_version = "HTTP/1.1"  # keep-alive
+    connections = 0
+    content_encodings = list()  # the (path, Content-Encoding) of each request
+
+    def setup(self):
+        super().setup()
+        SearchServiceHandler.connections = SearchServiceHandler.connections + 1
+
+    def do_GET(self):
+        self.read_body()  # AISearchUtil sends an empty JSON body with every request
+        self.reply(200, {"value": [{"name": "nosql-libraries"}]})
+
+    def do_POST(self):
+        docs = self.read_body().get("value", list())  # search requests have no value
+        statuses = [{"key": doc["id"], "status": True, "statusCode": 201} for doc in docs]
+        self.reply(200, {"value": statuses})
+
+    def read_body(self) -> dict:
+        content = self.rfile.read(int(self.headers.get("Content-Length", 0)))
+        encoding = self.headers.get("Content-Encoding")
+        SearchServiceHandler.content_encodings.append((self.path.split("?")[0], encoding))
+        if encoding == "gzip":
+            content = gzip.decompress(content)
+        return json.loads(content or "{}")
+
+    def reply(self, status_code: int, content: dict):
+        data = json.dumps(content).encode("utf-8")
+        self.send_response(status_code)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, format, *args):
+        pass
+
+
+@pytest.fixture
+def search_service(monkeypatch):
+    server = ThreadingHTTPServer(("127.0.0.1", 0), SearchServiceHandler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    SearchServiceHandler.connections = 0
+    SearchServiceHandler.content_encodings = list()
+    monkeypatch.setenv("AZURE_AI_SEARCH_URL", "http://127.0.0.1:{}".format(server.server_port))
+    monkeypatch.setenv("AZURE_AI_SEARCH_VERSION", "2025-09-01")
+    monkeypatch.setenv("AZURE_AI_SEARCH_KEY", "secret")
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+def test_requests_share_pooled_connections(search_service):
+    with AISearchUtil() as util:
+        for n in range(10):
+            result = util.list_indexes()
+            assert result["status_code"] == 200
+            assert result["content"]["value"][0]["name"] == "nosql-libraries"
+            docs = [{"id": str(n)}, {"id": "x{}".format(n)}]
+            result = util.add_documents_to_index("nosql-libraries", docs)
+            assert result["content"]["value"][1]["key"] == "x{}".format(n)
+        assert util.request_count == 20
+        assert util.payload_stats()["body_count"] == 10  # the GET requests have no body
+        assert result["http_version"] == "HTTP/1.1"
+        client = util.get_http_client()
+        assert util.get_http_client() is client
+    assert SearchServiceHandler.connections == 1
+    assert util._http_client is None
+    assert client.is_closed
+
+
+def test_http_client_opts():
+    util = AISearchUtil(opts={"max_connections": 4, "timeout": 5.0, "connect_timeout": 2.0})
+    client = util.get_http_client()
+    assert isinstance(client, httpx.Client)
+    assert client.timeout.read == 5.0
+    assert client.timeout.connect == 2.0
+    util.close()
+    util.close()  # closing twice is harmless
+
+
+def test_only_document_uploads_are_compressed(search_service):
+    with AISearchUtil(opts={"gzip": True}) as util:
+        util.search_index("nosql-libraries", "fastapi", {"search": "fastapi"})
+        result = util.add_documents_to_index("nosql-libraries", [{"id": "1"}])
+        assert result["headers"]["Content-Encoding"] == "gzip"
+        util.add_document_to_index("nosql-libraries", {"id": "2"})
+    assert SearchServiceHandler.content_encodings == [
+        ("/indexes/nosql-libraries/docs/search", None),
+        ("/indexes/nosql-libraries/docs/index", "gzip"),
+        ("/indexes/nosql-libraries/docs/index", "gzip"),
+    ]
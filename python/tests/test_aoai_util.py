@@ -0,0 +1,307 @@
+import asyncio
+import time
+
+from types import SimpleNamespace
+
+import httpx
+import openai
+
+from openai.types.chat import ChatCompletionChunk
+from openai.types.chat.chat_completion_chunk import Choice as ChunkChoice
+from openai.types.chat.chat_completion_chunk import ChoiceDelta
+from openai.types.completion_usage import CompletionUsage
+
+from src.ai.aoai_util import AOAIUtil
+from src.ai.token_counter import TokenCounter
+
+# pytest -v tests/test_aoai_util.py
+# Chris Joakim, 3Cloud/Cognizant, 2026
+
+
+class FakeEmbeddings:
+    # each embedding is [len(text), position in its request]; "BAD" inputs are rejected
+    def __init__(self):
+        self.requests = list()
+        self.in_flight = 0
+        self.max_in_flight = 0
+
+    async def create(self, input, model):
+        self.in_flight = self.in_flight + 1
+        self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        await asyncio.sleep(0.01)
+        self.in_flight = self.in_flight - 1
+        if isinstance(input, str):
+            input = [input]
+        self.requests.append(list(input))
+        if any("BAD" in text for text in input):
+            request = httpx.Request("POST", "https://localhost/embeddings")
+            response = httpx.Response(400, request=request)
+            raise openai.BadRequestError("invalid input", response=response, body=None)
+        data = list()
+        for idx, text in enumerate(input):
+            data.append(SimpleNamespace(index=idx, embedding=[float(len(text)), float(idx)]))
+        usage = SimpleNamespace(total_tokens=sum([len(text) for text in input]))
+        return SimpleNamespace(data=data, usage=usage)
+
+
+def aoai_util_with_fake(opts={}):
+    util = AOAIUtil(opts)
+    util.embeddings_client = SimpleNamespace(embeddings=FakeEmbeddings())
+    return util
+
+
+def test_token_counter():
+    assert TokenCounter.count("") == 0
+    assert TokenCounter.count("hello world") > 0
+    long_text = "hello world " * 1000
+    assert TokenCounter.count(TokenCounter.truncate(long_text, 100)) <= 100
+
+
+async def test_generate_embeddings_batch_chunking():
+    util = aoai_util_with_fake()
+    texts = ["text number {}".format(n) for n in range(25)]
+    results = await util.generate_embeddings_batch(texts, max_inputs=10)
+    assert results["success_count"] == 25
+    assert results["failure_count"] == 0
+    assert results["request_count"] == 3
+    assert sorted([len(r) for r in util.embeddings_client.embeddings.requests]) == [5, 10, 10]
+    # in input order
+    assert [e[0] for e in results["embeddings"]] == [float(len(t)) for t in texts]
+    assert results["errors"] == [None] * 25
+
+    # the token limit also splits requests
+    util = aoai_util_with_fake()
+    max_tokens = TokenCounter.count(texts[0]) * 4
+    results = await util.generate_embeddings_batch(texts[:8], max_tokens=max_tokens)
+    assert results["request_count"] >= 2
+    assert results["success_count"] == 8
+
+
+async def test_generate_embeddings_batch_partial_failures():
+    util = aoai_util_with_fake()
+    texts = ["alpha", "BAD input", "", "gamma", "delta", "x " * 20000]
+    results = await util.generate_embeddings_batch(texts)
+    assert results["success_count"] == 3
+    assert results["failure_count"] == 3
+    assert results["embeddings"][0] is not None
+    assert results["embeddings"][1] is None
+    assert "invalid input" in results["errors"][1]
+    assert results["errors"][2] == "empty input"
+    assert "tokens" in results["errors"][5]
+    assert results["embeddings"][4] is not None
+
+    results = await util.generate_embeddings_batch(["x " * 20000], truncate=True)
+    assert results["success_count"] == 1
+
+
+async def test_concurrency_is_bounded():
+    util = aoai_util_with_fake({"max_concurrency": 3})
+    texts = ["text {}".format(n) for n in range(40)]
+    results = await util.generate_embeddings_batch(texts, max_inputs=2)
+    assert results["request_count"] == 20
+    assert util.embeddings_client.embeddings.max_in_flight == 3
+
+    embeddings = await asyncio.gather(*[util.generate_embeddings(t) for t in texts[:10]])
+    assert [e[0] for e in embeddings] == [float(len(t)) for t in texts[:10]]
+    assert util.embeddings_client.embeddings.max_in_flight == 3
+    await util.close()
+
+
+async def test_clients_share_one_connection_pool(monkeypatch):
+    monkeypatch.setenv("AZURE_OPENAI_EMBEDDINGS_URL", "https://localhost/")
+    monkeypatch.setenv("AZURE_OPENAI_EMBEDDINGS_KEY", "key")
+    monkeypatch.setenv("AZURE_OPENAI_EMBEDDINGS_VERSION", "2024-10-21")
+    async with AOAIUtil({"max_connections": 8}) as util:
+        client = util.get_embeddings_client()
+        assert client._client is util.get_http_client()
+    assert util.embeddings_client is None
+
+
+async def test_embedding_cache(tmp_path):
+    opts = {"embedding_cache_dir": str(tmp_path), "embedding_dimensions": 2}
+    util = aoai_util_with_fake(opts)
+    texts = ["alpha", "beta", "gamma"]
+    results = await util.generate_embeddings_batch(texts)
+    assert results["cache_hits"] == 0
+    assert results["request_count"] == 1
+    await util.close()
+
+    # a new instance reads the persisted embeddings
+    util = aoai_util_with_fake(opts)
+    results = await util.generate_embeddings_batch(texts + ["delta"])
+    assert results["cache_hits"] == 3
+    assert results["success_count"] == 4
+    assert util.embeddings_client.embeddings.requests == [["delta"]]
+    assert await util.generate_embeddings(" alpha ") == results["embeddings"][0]
+    assert util.embedding_cache_stats()["hits"] == 4
+    await util.close()
+
+
+class ThrottlingEmbeddings(FakeEmbeddings):
+    # the first `throttle` requests are rate limited, with a retry-after-ms header
+    def __init__(self, throttle: int):
+        super().__init__()
+        self.throttle = throttle
+
+    async def create(self, input, model):
+        if self.throttle > 0:
+            self.throttle = self.throttle - 1
+            request = httpx.Request("POST", "https://localhost/embeddings")
+            headers = {"retry-after-ms": "50"}
+            response = httpx.Response(429, request=request, headers=headers)
+            raise openai.RateLimitError("rate limited", response=response, body=None)
+        return await super().create(input, model)
+
+
+async def test_rate_limiter_paces_tokens():
+    util = aoai_util_with_fake()
+    # 360000 TPM is 6000 tokens per second, with a burst of 60000 tokens
+    limiter = util.enable_rate_limiter("embeddings", 360000)
+    assert limiter.requests_per_minute == 2160.0
+    texts = ["x" * 3000 for _ in range(21)]  # 3000 tokens each, per the fake's usage
+    results = await util.generate_embeddings_batch(texts, max_inputs=1)
+    assert results["success_count"] == 21
+    stats = util.rate_limiter_stats("embeddings")
+    assert stats["request_count"] == 21
+    assert stats["estimated_tokens"] == sum([TokenCounter.count(t) for t in texts])
+    assert stats["total_tokens"] == 63000
+
+    # the actual usage exceeded the burst, so the next request waits for the refill
+    t1 = time.monotonic()
+    assert await util.generate_embeddings("hello") is not None
+    assert time.monotonic() - t1 >= 0.4
+    assert util.rate_limiter_stats("embeddings")["wait_seconds"] >= 0.4
+    assert util.rate_limiter_stats("completions") is None
+
+
+async def test_rate_limiter_retries_after_429():
+    util = AOAIUtil()
+    util.embeddings_client = SimpleNamespace(embeddings=ThrottlingEmbeddings(2))
+    util.enable_rate_limiter("embeddings", 600000, max_retries=3)
+    t1 = time.monotonic()
+    embedding = await util.generate_embeddings("hello")
+    assert embedding == [5.0, 0.0]
+    assert time.monotonic() - t1 >= 0.09  # two retry-after-ms pauses
+    stats = util.rate_limiter_stats("embeddings")
+    assert stats["throttled_count"] == 2
+    assert stats["request_count"] == 3
+
+    util.embeddings_client = SimpleNamespace(embeddings=ThrottlingEmbeddings(5))
+    assert await util.generate_embeddings("hello") is None  # gives up after max_retries
+
+
+class FakeCompletions:
+    # streams the words of the reply, then a final usage-only chunk
+    def __init__(self, reply: str):
+        self.reply = reply
+        self.requests = list()
+
+    async def create(self, model, messages, stream=False, stream_options=None, **params):
+        self.requests.append({"messages": messages, "stream": stream, "params": params})
+        usage = CompletionUsage(prompt_tokens=10, completion_tokens=5, total_tokens=15)
+        if not stream:
+            return SimpleNamespace(reply=self.reply, usage=usage)
+        return self._chunks(model, usage)
+
+    async def _chunks(self, model, usage):
+        words = self.reply.split(" ")
+        for idx, word in enumerate(words):
+            await asyncio.sleep(0.01)
+            content = word if idx == 0 else " " + word
+            finish_reason = "stop" if idx == len(words) - 1 else None
+            choice = ChunkChoice(
+                index=0, delta=ChoiceDelta(content=content), finish_reason=finish_reason
+            )
+            yield ChatCompletionChunk(
+                id="c1", choices=[choice], created=1, model=model, object="chat.completion.chunk"
+            )
+        yield ChatCompletionChunk(
+            id="c1", choices=[], created=1, model=model, object="chat.completion.chunk", usage=usage
+        )
+
+
+def aoai_util_with_fake_completions(reply: str, monkeypatch, opts={}):
+    monkeypatch.setenv("AZURE_OPENAI_COMPLETIONS_DEP", "gpt-4o")
+    util = AOAIUtil(opts)
+    util.completions_client = SimpleNamespace(
+        chat=SimpleNamespace(completions=FakeCompletions(reply))
+    )
+    return util
+
+
+async def test_generate_completion_returns_the_completion(monkeypatch):
+    util = aoai_util_with_fake_completions("number 7", monkeypatch)
+    completion = await util.generate_completion("You know baseball.", "Mantle's number?")
+    assert completion.reply == "number 7"
+    request = util.completions_client.chat.completions.requests[0]
+    assert request["messages"][1] == {"role": "user", "content": "Mantle's number?"}
+
+
+async def test_stream_completion(monkeypatch):
+    util = aoai_util_with_fake_completions("Mickey Mantle wore number 7", monkeypatch)
+    util.enable_rate_limiter("completions", 600000)
+    stream = util.stream_completion("You know baseball.", "Mantle's number?")
+    deltas = [delta async for delta in stream]
+    assert deltas == ["Mickey", " Mantle", " wore", " number", " 7"]
+    assert stream.content() == "Mickey Mantle wore number 7"
+    assert stream.completion.choices[0].finish_reason == "stop"
+    assert stream.completion.usage.total_tokens == 15
+    assert stream.completion.model == "gpt-4o"
+
+    metrics = stream.metrics()
+    assert metrics["chunk_count"] == 6
+    assert metrics["total_tokens"] == 15
+    assert 0 < metrics["ttft_ms"] < metrics["latency_ms"]
+    assert metrics["latency_ms"] >= 40
+    assert util.completions_client.chat.completions.requests[0]["stream"] is True
+    assert util.rate_limiter_stats("completions")["total_tokens"] == 15
+
+
+async def test_rate_limiters_from_tpm_envvars(monkeypatch):
+    monkeypatch.setenv("AZURE_ENV_PREFIX", "")
+    monkeypatch.delenv("AZURE_OPENAI_EMBEDDINGS_TPM", raising=False)
+    monkeypatch.setenv("AZURE_OPENAI_COMPLETIONS_TPM", "600000")
+    util = aoai_util_with_fake_completions("number 7", monkeypatch)
+    assert util.rate_limiter_stats("embeddings") is None
+    completion = await util.generate_completion("You know baseball.", "Mantle's number?")
+    assert completion.reply == "number 7"
+    assert util.rate_limiter_stats("completions")["request_count"] == 1
+    assert util._client_max_retries("completions") == 0
+
+
+async def test_completion_cache(monkeypatch):
+    util = aoai_util_with_fake_completions("number 7", monkeypatch, {"completion_cache": True})
+    requests = util.completions_client.chat.completions.requests
+    for _ in range(3):
+        completion = await util.generate_completion("system", "user", temperature=0.0)
+        assert completion.reply == "number 7"
+    assert len(requests) == 1
+    assert requests[0]["params"] == {"temperature": 0.0}
+    await util.generate_completion("system", "user", temperature=1.0)
+    assert len(requests) == 2
+    stats = util.completion_cache_stats()
+    assert stats["hits"] == 2
+    assert stats["misses"] == 2
+
+
+async def test_semantic_completion_cache_embeds_only_on_an_exact_miss(monkeypatch):
+    opts = {"completion_cache": True, "completion_cache_similarity": 0.99}
+    util = aoai_util_with_fake_completions("number 7", monkeypatch, opts)
+    util.embeddings_client = SimpleNamespace(embeddings=FakeEmbeddings())
+    embedding_requests = util.embeddings_client.embeddings.requests
+    completion_requests = util.completions_client.chat.completions.requests
+
+    await util.generate_completion("system", "Mantle's number?")
+    assert len(embedding_requests) == 1
+    completion = await util.generate_completion("system", "Mantle's number?")
+    assert completion.reply == "number 7"
+    assert len(embedding_requests) == 1  # the exact hit made no embeddings call
+    # same length, so the fake embedding is identical and the semantic lookup hits
+    completion = await util.generate_completion("system", "Ruth's number?!!")
+    assert completion.reply == "number 7"
+    assert len(embedding_requests) == 2
+    assert len(completion_requests) == 1
+    stats = util.completion_cache_stats()
+    assert stats["hits"] == 2
+    assert stats["semantic_hits"] == 1
+    assert stats["misses"] == 1
@@ -0,0 +1,62 @@
+import pytest
+
+from src.vector.bm25_index import BM25Index
+
+# pytest -v tests/test_bm25_index.py
+# Chris Joakim, 3Cloud/Cognizant, 2026
+
+
+def library_index():
+    index = BM25Index()
+    docs = [
+        {"id": "1", "name": "fastapi", "summary": "Fast web framework", "description": "APIs"},
+        {"id": "2", "name": "flask", "summary": "A simple web framework", "description": "web"},
+        {"id": "3", "name": "numpy", "summary": "Arrays for Python", "description": "fast math"},
+        {"id": "4", "name": "m26", "summary": "Calculations for running", "description": None},
+    ]
+    for doc in docs:
+        index.add(doc["id"], doc, {"id": doc["id"], "name": doc["name"]})
+    return index
+
+
+def test_tokenize():
+    assert BM25Index.tokenize("FastAPI: a Web-Framework, v0.115") == [
+        "fastapi",
+        "a",
+        "web",
+        "framework",
+        "v0",
+        "115",
+    ]
+    assert BM25Index.tokenize(None) == list()
+
+
+def test_search_ranks_by_bm25():
+    index = library_index()
+    assert index.size() == 4
+
+    results = index.search("web framework")
+    assert [r["id"] for r in results] == ["2", "1"]  # web is also in the flask description
+    assert results[0]["BM25Score"] > results[1]["BM25Score"] > 0.0
+    assert results[0]["name"] == "flask"
+
+    # the name field is weighted more than the description
+    assert [r["id"] for r in index.search("fast")] == ["1", "3"]
+    assert [r["id"] for r in index.search("M26")] == ["4"]
+    assert index.search("unknown terms") == list()
+    assert len(index.search("web framework fast", top_k=1)) == 1
+
+    # rarer terms have a higher inverse document frequency
+    assert index.idf("m26") > index.idf("web") > 0.0
+    assert index.idf("unknown") > index.idf("m26")
+
+
+def test_add_after_search_and_duplicates():
+    index = library_index()
+    assert len(index.search("python")) == 1
+    index.add("5", {"name": "python-dateutil", "summary": "Extensions for python datetime"})
+    results = index.search("python")
+    assert sorted([r["id"] for r in results]) == ["3", "5"]
+    assert list(index.search("dateutil")[0].keys()) == ["id", "BM25Score"]
+    with pytest.raises(ValueError):
+        index.add("1", {"name": "duplicate"})
@@ -0,0 +1,101 @@
+import os
+
+import polars as pl
+
+from src.db.change_feed_snapshot import ChangeFeedSnapshot
+from src.io.fs import FS
+
+# pytest -v tests/test_change_feed_snapshot.py
+# Chris Joakim, 3Cloud/Cognizant, 2026
+
+
+class FakeChangeFeedCosmosUtil:
+    """Simulates CosmosNoSqlUtil.change_feed_pages(); tokens are str list offsets."""
+
+    def __init__(self):
+        self.changes = list()
+        self.tokens_received = list()
+
+    def change(self, id, name, pk="pypi"):
+        self.changes.append({"id": id, "pk": pk, "name": name, "_rid": "x", "_ts": 1})
+
+    async def change_feed_pages(self, continuation_token=None, max_item_count=100):
+        self.tokens_received.append(continuation_token)
+        offset = int(continuation_token or 0)
+        while offset < len(self.changes):
+            items = self.changes[offset : offset + max_item_count]
+            offset = offset + len(items)
+            yield {"items": items, "continuation_token": str(offset)}
+
+
+async def test_json_snapshot_sync(tmp_path):
+    cosmos_util = FakeChangeFeedCosmosUtil()
+    for n in range(5):
+        cosmos_util.change("id{}".format(n), "lib{}".format(n))
+    snapshot = ChangeFeedSnapshot(str(tmp_path))
+
+    delta = await snapshot.sync(cosmos_util, max_item_count=2)
+    assert delta["sync_count"] == 1
+    assert delta["ids"] == ["id0", "id1", "id2", "id3", "id4"]
+    assert delta["keys"][0] == ("pypi", "id0")
+    assert delta["files"][0] == "pypi@id0.json"
+    doc = FS.read_json("{}/pypi@id3.json".format(tmp_path))
+    assert doc == {"id": "id3", "pk": "pypi", "name": "lib3"}  # no system attributes
+    assert snapshot.read_state()["continuation_token"] == "5"
+
+    # only the new and updated documents are applied on the next sync
+    cosmos_util.change("id1", "lib1-updated")
+    cosmos_util.change("id5", "lib5")
+    delta = await snapshot.sync(cosmos_util)
+    assert cosmos_util.tokens_received == [None, "5"]
+    assert delta["sync_count"] == 2
+    assert delta["ids"] == ["id1", "id5"]
+    assert snapshot.read_delta()["files"] == ["pypi@id1.json", "pypi@id5.json"]
+    assert FS.read_json("{}/pypi@id1.json".format(tmp_path))["name"] == "lib1-updated"
+    docs = snapshot.read_delta_documents()
+    assert [doc["name"] for doc in docs] == ["lib1-updated", "lib5"]
+
+    # no changes
+    delta = await snapshot.sync(cosmos_util)
+    assert delta["ids"] == []
+    assert snapshot.read_state()["continuation_token"] == "7"
+
+
+async def test_parquet_snapshot_sync(tmp_path):
+    cosmos_util = FakeChangeFeedCosmosUtil()
+    for n in range(4):
+        cosmos_util.change("id{}".format(n), "lib{}".format(n))
+    snapshot = ChangeFeedSnapshot(str(tmp_path), format="parquet")
+    await snapshot.sync(cosmos_util)
+    cosmos_util.change("id2", "lib2-updated")
+    delta = await snapshot.sync(cosmos_util)
+    assert delta["ids"] == ["id2"]
+    assert delta["files"] == ["snapshot.parquet"]
+
+    df = pl.read_parquet(os.path.join(str(tmp_path), "snapshot.parquet"))
+    assert df.shape[0] == 4
+    assert "_rid" not in df.columns
+    names = dict(zip(df["id"].to_list(), df["name"].to_list()))
+    assert names["id2"] == "lib2-updated"
+    assert snapshot.read_delta_documents() == [{"id": "id2", "pk": "pypi", "name": "lib2-updated"}]
+
+
+async def test_same_id_in_different_partitions(tmp_path):
+    for format in ("json", "parquet"):
+        cosmos_util = FakeChangeFeedCosmosUtil()
+        cosmos_util.change("fastapi", "fastapi-pypi", pk="pypi")
+        cosmos_util.change("fastapi", "fastapi-npm", pk="npm")
+        snapshot = ChangeFeedSnapshot(str(tmp_path / format), format=format)
+        delta = await snapshot.sync(cosmos_util)
+        assert delta["keys"] == [("npm", "fastapi"), ("pypi", "fastapi")]
+
+        cosmos_util.change("fastapi", "fastapi-npm-updated", pk="npm")
+        delta = await snapshot.sync(cosmos_util)
+        assert delta["keys"] == [("npm", "fastapi")]
+        docs = snapshot.read_delta_documents()
+        assert docs == [{"id": "fastapi", "pk": "npm", "name": "fastapi-npm-updated"}]
+        if format == "parquet":
+            df = pl.read_parquet(snapshot.parquet_file).sort("pk")
+            assert df["name"].to_list() == ["fastapi-npm-updated", "fastapi-pypi"]
+        else:
+            assert FS.read_json(snapshot.document_filename("fastapi", "pypi"))["pk"] == "pypi"
@@ -0,0 +1,102 @@
+import time
+
+from openai.types.chat import ChatCompletion
+
+from src.ai.completion_cache import CompletionCache
+
+# pytest -v tests/test_completion_cache.py
+# Chris Joakim, 3Cloud/Cognizant, 2026
+
+
+def completion(content: str) -> ChatCompletion:
+    data = {
+        "id": "c1",
+        "object": "chat.completion",
+        "created": 1,
+        "model": "gpt-4o",
+        "choices": [
+            {
+                "index": 0,
+                "finish_reason": "stop",
+                "message": {"role": "assistant", "content": content},
+            }
+        ],
+        "usage": {"prompt_tokens": 10, "completion_tokens": 5, "total_tokens": 15},
+    }
+    return ChatCompletion.model_validate(data)
+
+
+def test_exact_lookup_and_ttl():
+    cache = CompletionCache(max_entries=10, ttl_seconds=0.05)
+    params = {"temperature": 0.0}
+    assert cache.lookup("dep", "system", "user", params) is None
+    cache.put("dep", "system", "user", params, completion("answer"))
+    assert cache.lookup("dep", "system", "user", params).choices[0].message.content == "answer"
+
+    # every part of the key matters
+    assert cache.lookup("dep2", "system", "user", params) is None
+    assert cache.lookup("dep", "system2", "user", params) is None
+    assert cache.lookup("dep", "system", "user2", params) is None
+    assert cache.lookup("dep", "system", "user", {"temperature": 1.0}) is None
+
+    time.sleep(0.06)
+    assert cache.lookup("dep", "system", "user", params) is None
+    stats = cache.stats()
+    assert stats["hits"] == 1
+    assert stats["misses"] == 6
+    assert stats["expired"] == 1
+    assert stats["tokens_saved"] == 15
+    assert stats["size"] == 0
+
+
+def test_lru_eviction():
+    cache = CompletionCache(max_entries=2)
+    for n in range(2):
+        cache.put("dep", "system", str(n), {}, completion(str(n)))
+    assert cache.lookup("dep", "system", "0", {}) is not None  # "1" is now least recently used
+    cache.put("dep", "system", "2", {}, completion("2"))
+    assert cache.lookup("dep", "system", "1", {}) is None
+    assert cache.lookup("dep", "system", "0", {}) is not None
+    assert cache.stats()["evictions"] == 1
+
+
+def test_semantic_lookup():
+    cache = CompletionCache(similarity_threshold=0.95)
+    assert cache.semantic()
+    cache.put("dep", "system", "Mantle's number?", {}, completion("7"), [1.0, 0.0, 0.0])
+    cache.put("dep", "system", "Ruth's number?", {}, completion("3"), [0.0, 1.0, 0.0])
+
+    hit = cache.lookup("dep", "system", "What was Mantle's number?", {}, [0.99, 0.05, 0.0])
+    assert hit.choices[0].message.content == "7"
+    assert cache.lookup("dep", "system", "Gehrig?", {}, [0.6, 0.6, 0.5]) is None
+    # only entries with the same deployment, system context, and params match
+    assert cache.lookup("dep", "other", "Mantle?", {}, [1.0, 0.0, 0.0]) is None
+    assert cache.stats()["semantic_hits"] == 1
+
+
+def test_semantic_lookup_skips_expired_entries():
+    cache = CompletionCache(ttl_seconds=0.05, similarity_threshold=0.9)
+    cache.put("dep", "system", "Mantle's number?", {}, completion("expired"), [1.0, 0.0])
+    time.sleep(0.06)
+    cache.put("dep", "system", "Mantle's uniform number?", {}, completion("7"), [0.98, 0.2])
+
+    # the expired entry is the most similar, but the fresh one is above the threshold
+    hit = cache.lookup("dep", "system", "What was Mantle's number?", {}, [1.0, 0.0])
+    assert hit.choices[0].message.content == "7"
+    assert cache.stats()["expired"] == 1
+    assert cache.stats()["size"] == 1
+
+
+def test_save_and_load(tmp_path):
+    outfile = "{}/completion_cache.json".format(tmp_path)
+    cache = CompletionCache(similarity_threshold=0.9)
+    cache.put("dep", "system", "user", {"max_tokens": 100}, completion("answer"), [0.0, 2.0])
+    cache.save(outfile)
+
+    cache = CompletionCache(similarity_threshold=0.9)
+    cache.load(outfile)
+    assert cache.size() == 1
+    hit = cache.lookup("dep", "system", "user", {"max_tokens": 100})
+    assert isinstance(hit, ChatCompletion)
+    assert hit.choices[0].message.content == "answer"
+    assert cache.lookup("dep", "system", "similar", {"max_tokens": 100}, [0.0, 1.0]) is not None
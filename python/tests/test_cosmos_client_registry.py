@@ -0,0 +1,47 @@
+import pytest
+
+from src.db.cosmos_client_registry import CosmosClientRegistry
+from src.db.cosmos_nosql_util import CosmosNoSqlUtil
+
+# pytest -v tests/test_cosmos_client_registry.py
+# Chris Joakim, 3Cloud/Cognizant, 2026
+
+
+@pytest.fixture
+def key_envvars(monkeypatch):
+    # the aio CosmosClient does no I/O until its first request
+    monkeypatch.setenv("AZURE_COSMOSDB_NOSQL_AUTHTYPE", "key")
+    monkeypatch.setenv("AZURE_COSMOSDB_NOSQL_URI", "https://localhost:8081/")
+    monkeypatch.setenv("AZURE_COSMOSDB_NOSQL_KEY", "QUJDREVGR0hJSktMTU5PUFFSU1RVVldYWVo=")
+
+
+async def test_shared_clients_and_proxies(key_envvars):
+    async with CosmosClientRegistry.session():
+        async with CosmosNoSqlUtil({"shared_client": True}) as util1:
+            async with CosmosNoSqlUtil({"shared_client": True}) as util2:
+                assert util1._client is util2._client
+                assert CosmosClientRegistry.size() == 1
+                assert CosmosClientRegistry.is_registered(util1._client)
+
+                await util1.set_db("dev")
+                await util2.set_db("dev")
+                assert util1._dbproxy is util2._dbproxy
+                await util1.set_container("libraries")
+                await util2.set_container("libraries")
+                assert util1._ctrproxy is util2._ctrproxy
+                await util2.set_container("airports")
+                assert util1._ctrproxy is not util2._ctrproxy
+
+            # closing a util leaves the shared client open for the others
+            assert util2._client is None
+            assert CosmosClientRegistry.size() == 1
+    assert CosmosClientRegistry.size() == 0
+
+
+async def test_unshared_client(key_envvars):
+    async with CosmosNoSqlUtil() as util:
+        client = util._client
+        assert CosmosClientRegistry.is_registered(client) is False
+        with pytest.raises(ValueError):
+            CosmosClientRegistry.get_database_proxy(client, "dev")
+    assert util._client is None
@@ -0,0 +1,345 @@
+import asyncio
+import pytest
+
+from azure.cosmos.exceptions import CosmosHttpResponseError
+
+from src.db.cosmos_nosql_util import CosmosNoSqlUtil
+
+# Offline unit tests of CosmosNoSqlUtil, using an in-process fake
+# in place of the azure.cosmos.aio ContainerProxy.
+# pytest -v tests/test_cosmos_nosql_util.py
+# Chris Joakim, 3Cloud/Cognizant, 2026
+
+
+class FakeThrottledResponse:
+    status_code = 429
+    reason = "Too Many Requests"
+    headers = {"x-ms-retry-after-ms": "50", "x-ms-request-charge": "0.0"}
+
+    def text(self):
+        return "throttled"
+
+
+class FakePage:
+    def __init__(self, items):
+        self.items = items
+
+    def __aiter__(self):
+        return self._iterate()
+
+    async def _iterate(self):
+        for item in self.items:
+            yield item
+
+
+class FakePageIterator:
+    # continuation tokens are the str offset of the next page
+    def __init__(self, items, page_size, continuation_token):
+        self.items = items
+        self.page_size = page_size
+        self.continuation_token = continuation_token
+        self.done = False
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self):
+        if self.done:
+            raise StopAsyncIteration
+        offset = int(self.continuation_token or 0)
+        next_offset = offset + self.page_size
+        if next_offset < len(self.items):
+            self.continuation_token = str(next_offset)
+        else:
+            self.continuation_token = None
+            self.done = True
+        return FakePage(self.items[offset:next_offset])
+
+
+class FakeItemPaged:
+    def __init__(self, items, page_size):
+        self.items = items
+        self.page_size = page_size
+
+    def by_page(self, continuation_token=None):
+        return FakePageIterator(self.items, self.page_size, continuation_token)
+
+    def __aiter__(self):
+        return FakePage(self.items).__aiter__()
+
+
+class FakeContainerProxy:
+    def __init__(self, fail_ids=[], throttle_count=0):
+        self.fail_ids = fail_ids
+        self.throttle_count = throttle_count
+        self.items = dict()
+        self.in_flight = 0
+        self.max_in_flight = 0
+
+    async def upsert_item(self, body, response_hook=None, **kwargs):
+        self.in_flight = self.in_flight + 1
+        self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        await asyncio.sleep(0.01)
+        self.in_flight = self.in_flight - 1
+        if self.throttle_count > 0:
+            self.throttle_count = self.throttle_count - 1
+            raise CosmosHttpResponseError(status_code=429, response=FakeThrottledResponse())
+        if body["id"] in self.fail_ids:
+            raise CosmosHttpResponseError(status_code=400, message="bad doc")
+        self.items[body["id"]] = body
+        if response_hook is not None:
+            response_hook({"x-ms-request-charge": "5.5"}, body)
+        return body
+
+    async def execute_item_batch(self, batch_operations, partition_key, response_hook=None):
+        assert len(batch_operations) <= 100
+        await asyncio.sleep(0.01)
+        for op, (doc,) in batch_operations:
+            assert op == "upsert"
+            assert doc["pk"] == partition_key
+        if partition_key in self.fail_ids:
+            raise CosmosHttpResponseError(status_code=409, message="batch failed")
+        for op, (doc,) in batch_operations:
+            self.items[doc["id"]] = doc
+        if response_hook is not None:
+            response_hook({"x-ms-request-charge": "10.0"}, None)
+        return [{"statusCode": 200} for _ in batch_operations]
+
+    async def read_item(self, item, partition_key, response_hook=None, initial_headers=None):
+        self.read_count = getattr(self, "read_count", 0) + 1
+        doc = self.items[item]
+        etag = '"etag-{}"'.format(doc.get("version", 0))
+        if initial_headers is not None and initial_headers["If-None-Match"] == etag:
+            response_hook({"x-ms-request-charge": "0.5", "etag": etag}, None)
+            return {}  # 304 Not Modified
+        response_hook({"x-ms-request-charge": "1.0", "etag": etag}, doc)
+        return dict(doc, _etag=etag)
+
+    def query_items(self, query, parameters, max_item_count=100, **kwargs):
+        self.last_query = query
+        self.last_query_parameters = parameters
+        self.last_query_kwargs = kwargs
+        docs = sorted(self.items.values(), key=lambda d: d["id"])
+        return FakeItemPaged(docs, max_item_count)
+
+
+def cosmos_util_with_fake(proxy, opts={}) -> CosmosNoSqlUtil:
+    cosmos_util = CosmosNoSqlUtil(opts)
+    cosmos_util._ctrproxy = proxy
+    return cosmos_util
+
+
+async def test_bulk_upsert():
+    proxy = FakeContainerProxy(fail_ids=["3"])
+    cosmos_util = cosmos_util_with_fake(proxy)
+    docs = [{"id": str(n), "pk": "test"} for n in range(20)]
+
+    summary = await cosmos_util.bulk_upsert(docs, concurrency=4)
+    assert summary["success_count"] == 19
+    assert summary["failure_count"] == 1
+    assert summary["total_ru"] == pytest.approx(19 * 5.5)
+    assert summary["elapsed"] > 0
+    assert proxy.max_in_flight == 4
+    assert len(proxy.items) == 19
+
+    results = summary["results"]
+    assert [r["id"] for r in results] == [d["id"] for d in docs]
+    assert results[3]["success"] is False
+    assert results[3]["status_code"] == 400
+    assert "bad doc" in results[3]["error"]
+
+
+async def test_bulk_upsert_empty():
+    cosmos_util = cosmos_util_with_fake(FakeContainerProxy())
+    summary = await cosmos_util.bulk_upsert(iter([]), concurrency=8)
+    assert summary["results"] == []
+    assert summary["success_count"] == 0
+    assert summary["total_ru"] == 0
+
+
+async def test_bulk_upsert_trims_floats():
+    proxy = FakeContainerProxy()
+    cosmos_util = cosmos_util_with_fake(proxy, {"float_digits": 4, "payload_stats": True})
+    docs = [{"id": str(n), "pk": "test", "embedding": [0.123456789] * 16} for n in range(5)]
+
+    summary = await cosmos_util.bulk_upsert(docs, concurrency=2)
+    assert summary["success_count"] == 5
+    assert proxy.items["3"]["embedding"] == [0.1235] * 16
+    assert docs[3]["embedding"][0] == 0.123456789  # the given documents are not modified
+    payload = summary["payload"]
+    assert payload["document_count"] == 5
+    assert payload["encoded_bytes"] < payload["json_bytes"]
+    assert "wire_bytes" not in payload  # the SDK serializes the documents
+
+    summary = await cosmos_util.bulk_batch_upsert(docs, "/pk")
+    assert summary["payload"]["document_count"] == 10
+    cosmos_util = cosmos_util_with_fake(proxy, {"float_digits": 4})
+    await cosmos_util.bulk_upsert(docs)
+    assert cosmos_util.payload_stats()["json_bytes"] is None
+    assert cosmos_util_with_fake(proxy).payload_stats() is None
+
+
+def test_partition_key_value():
+    doc = {"pk": "pypi", "address": {"state": "NC"}}
+    assert CosmosNoSqlUtil.partition_key_value(doc, "/pk") == "pypi"
+    assert CosmosNoSqlUtil.partition_key_value(doc, "/address/state") == "NC"
+    assert CosmosNoSqlUtil.partition_key_value(doc, "/country") is None
+    assert CosmosNoSqlUtil.partition_key_value(doc, "/pk/nested") is None
+
+
+async def test_bulk_batch_upsert():
+    proxy = FakeContainerProxy(fail_ids=["BE"])
+    cosmos_util = cosmos_util_with_fake(proxy)
+    docs = list()
+    for n in range(250):
+        docs.append({"id": "us-{}".format(n), "pk": "US"})
+    for n in range(30):
+        docs.append({"id": "fr-{}".format(n), "pk": "FR"})
+    for n in range(5):
+        docs.append({"id": "be-{}".format(n), "pk": "BE"})
+
+    groups = CosmosNoSqlUtil.group_by_partition_key(docs, "/pk")
+    assert sorted(groups.keys()) == ["BE", "FR", "US"]
+    assert len(groups["US"]) == 250
+
+    summary = await cosmos_util.bulk_batch_upsert(docs, "/pk", concurrency=3)
+    assert summary["batch_count"] == 5  # US: 100, 100, 50; FR: 30; BE: 5
+    assert [r["count"] for r in summary["results"]] == [100, 100, 50, 30, 5]
+    assert summary["success_count"] == 280
+    assert summary["failure_count"] == 5
+    assert summary["total_ru"] == pytest.approx(40.0)
+    assert summary["results"][4]["pk"] == "BE"
+    assert summary["results"][4]["status_code"] == 409
+    assert len(proxy.items) == 280
+
+
+async def test_rate_limiter_retries_throttled_requests():
+    proxy = FakeContainerProxy(throttle_count=2)
+    cosmos_util = cosmos_util_with_fake(proxy)
+    limiter = await cosmos_util.enable_rate_limiter(ru_per_second=1000)
+    assert limiter is not None
+
+    doc = await cosmos_util.upsert_item({"id": "1", "pk": "test"})
+    assert doc["id"] == "1"
+    stats = cosmos_util.rate_limiter_stats()
+    assert stats["throttled_count"] == 2
+    assert stats["request_count"] == 3
+    assert stats["total_ru"] == pytest.approx(5.5)
+    assert stats["wait_seconds"] >= 0.09  # two x-ms-retry-after-ms pauses
+    assert stats["estimates"]["upsert_item"] < 10.0
+
+    # the bulk path runs through the same limiter
+    docs = [{"id": str(n), "pk": "test"} for n in range(10)]
+    summary = await cosmos_util.bulk_upsert(docs, concurrency=4)
+    assert summary["success_count"] == 10
+    assert cosmos_util.rate_limiter_stats()["request_count"] == 13
+
+
+async def test_rate_limiter_gives_up_after_max_retries():
+    proxy = FakeContainerProxy(throttle_count=5)
+    cosmos_util = cosmos_util_with_fake(proxy)
+    await cosmos_util.enable_rate_limiter(ru_per_second=1000, max_retries=1)
+    with pytest.raises(CosmosHttpResponseError) as excinfo:
+        await cosmos_util.upsert_item({"id": "1", "pk": "test"})
+    assert excinfo.value.status_code == 429
+
+
+async def test_cancelled_call_is_recorded_and_propagated():
+    proxy = FakeContainerProxy()
+    cosmos_util = cosmos_util_with_fake(proxy)
+    with pytest.raises(asyncio.TimeoutError):
+        await asyncio.wait_for(cosmos_util.upsert_item({"id": "1", "pk": "test"}), 0.001)
+    task = asyncio.create_task(cosmos_util.upsert_item({"id": "2", "pk": "test"}))
+    await asyncio.sleep(0)
+    task.cancel()
+    with pytest.raises(asyncio.CancelledError):
+        await task
+    operations = cosmos_util.telemetry().to_dict()["operations"]
+    assert operations["upsert_item"]["status_codes"] == {"None": 2}
+    assert len(proxy.items) == 0
+
+
+async def test_query_pages_and_resume():
+    proxy = FakeContainerProxy()
+    cosmos_util = cosmos_util_with_fake(proxy)
+    for n in range(25):
+        proxy.items["{:02d}".format(n)] = {"id": "{:02d}".format(n), "pk": "test"}
+
+    pages = [p async for p in cosmos_util.query_pages("SELECT * FROM c", max_item_count=10)]
+    assert [len(p["items"]) for p in pages] == [10, 10, 5]
+    assert pages[0]["continuation_token"] == "10"
+    assert pages[2]["continuation_token"] is None
+    assert "partition_key" not in proxy.last_query_kwargs
+
+    # resume the scan from the token saved after the first page
+    resumed = [
+        item["id"]
+        async for item in cosmos_util.iter_query_items(
+            "SELECT * FROM c", pk="test", max_item_count=10, continuation_token="10"
+        )
+    ]
+    assert resumed[0] == "10"
+    assert len(resumed) == 15
+    assert proxy.last_query_kwargs["partition_key"] == "test"
+
+    docs = await cosmos_util.query_items("SELECT * FROM c", max_items=7)
+    assert len(docs) == 25
+
+
+async def test_vector_search_is_parameterized():
+    proxy = FakeContainerProxy()
+    cosmos_util = cosmos_util_with_fake(proxy)
+    embedding = [0.125] * 1536
+    for n in range(3):
+        proxy.items[str(n)] = {"id": str(n), "pk": "pypi", "SimilarityScore": 0.9}
+
+    results = [
+        r
+        async for r in cosmos_util.vector_search(
+            embedding,
+            top_n=3,
+            filter="c.pk = @pk",
+            filter_parameters=[{"name": "@pk", "value": "pypi"}],
+        )
+    ]
+    assert len(results) == 3
+    assert "0.125" not in proxy.last_query
+    assert len(proxy.last_query) < 200
+    assert proxy.last_query.startswith("SELECT TOP @top_n c.id, c.pk, c.name,")
+    assert " WHERE c.pk = @pk ORDER BY VectorDistance(c.embedding, @embedding)" in proxy.last_query
+    params = {p["name"]: p["value"] for p in proxy.last_query_parameters}
+    assert params["@top_n"] == 3
+    assert params["@embedding"] is embedding
+    assert params["@pk"] == "pypi"
+
+
+async def test_point_read_cache():
+    proxy = FakeContainerProxy()
+    opts = {"point_read_cache_size": 100, "point_read_cache_ttl": 0.05}
+    cosmos_util = cosmos_util_with_fake(proxy, opts)
+    await cosmos_util.upsert_item({"id": "fastapi", "pk": "pypi", "version": 1})
+
+    doc = await cosmos_util.point_read("fastapi", "pypi")
+    assert doc["_etag"] == '"etag-1"'
+    doc["version"] = 99  # mutating a returned document leaves the cached one unchanged
+    doc = await cosmos_util.point_read("fastapi", "pypi")
+    assert proxy.read_count == 1  # served from the cache
+    assert doc["version"] == 1
+
+    await asyncio.sleep(0.06)
+    doc = await cosmos_util.point_read("fastapi", "pypi")  # revalidated, unchanged
+    assert doc["version"] == 1
+    assert proxy.read_count == 2
+
+    # an upsert through the util invalidates the cached document
+    await cosmos_util.upsert_item({"id": "fastapi", "pk": "pypi", "version": 2})
+    doc = await cosmos_util.point_read("fastapi", "pypi")
+    assert doc["version"] == 2
+    assert proxy.read_count == 3
+
+    stats = cosmos_util.point_read_cache_stats()
+    assert stats["hits"] == 1
+    assert stats["misses"] == 2
+    assert stats["revalidations"] == 1
+    assert stats["ru_saved"] == pytest.approx(1.5)
+    assert cosmos_util_with_fake(proxy).point_read_cache_stats() is None
@@ -0,0 +1,91 @@
+import pytest
+
+from opentelemetry.sdk.metrics import MeterProvider
+from opentelemetry.sdk.metrics.export import InMemoryMetricReader
+
+from src.db.cosmos_nosql_util import CosmosNoSqlUtil
+from src.db.cosmos_telemetry import CosmosTelemetry
+from src.db.local_cosmos import LocalCosmosClient
+from src.util.histogram import Histogram
+
+# pytest -v tests/test_cosmos_telemetry.py
+# Chris Joakim, 3Cloud/Cognizant, 2026
+
+
+@pytest.fixture
+def local_envvars(monkeypatch):
+    monkeypatch.setenv("AZURE_COSMOSDB_NOSQL_AUTHTYPE", "local")
+    LocalCosmosClient.reset()
+    yield
+    LocalCosmosClient.reset()
+
+
+def test_histogram():
+    h = Histogram([1, 10, 100])
+    assert h.percentile(50) is None
+    for value in [0.5, 2, 3, 4, 5, 20, 30, 40, 50, 500]:
+        h.record(value)
+    assert h.count == 10
+    assert h.counts == [1, 4, 4, 1]
+    assert h.min == 0.5
+    assert h.max == 500
+    assert h.mean() == pytest.approx(65.45)
+    assert 1 < h.percentile(50) <= 10
+    assert 10 < h.percentile(90) <= 100
+    assert h.percentile(100) == 500
+    assert h.to_dict()["p50"] == h.percentile(50)
+
+
+def test_record_and_top_queries():
+    telemetry = CosmosTelemetry()
+    headers = {"x-ms-request-charge": "5.5", "x-ms-documentdb-partitionkeyrangeid": "0"}
+    telemetry.record("upsert_item", 12.0, 200, headers)
+    telemetry.record("upsert_item", 8.0, 429, {"x-ms-request-charge": "0.0"})
+    telemetry.record("query_pages", 3.0, 200, {"x-ms-request-charge": "40"}, "SELECT * FROM c")
+    telemetry.record("query_pages", 3.0, 200, {"x-ms-request-charge": "2.5"}, "SELECT c.id FROM c")
+
+    data = telemetry.to_dict()
+    upserts = data["operations"]["upsert_item"]
+    assert upserts["ru"]["count"] == 2
+    assert upserts["ru"]["sum"] == 5.5
+    assert upserts["status_codes"] == {"200": 1, "429": 1}
+    assert upserts["pk_range_ids"] == {"0": 1, "unknown": 1}
+    assert data["total_ru"] == 48.0
+    assert [q["sql"] for q in data["top_queries"]] == ["SELECT * FROM c", "SELECT c.id FROM c"]
+
+
+async def test_cosmos_nosql_util_telemetry(local_envvars):
+    reader = InMemoryMetricReader()
+    meter = MeterProvider(metric_readers=[reader]).get_meter("test")
+    util = CosmosNoSqlUtil()
+    await util.initialize()
+    await util.create_database("dev")
+    await util.create_container("airports", "/pk", 0)
+    await util.set_container("airports")
+    util.enable_otel_metrics(meter)
+
+    docs = [{"id": str(n), "pk": "US", "n": n} for n in range(10)]
+    await util.bulk_upsert(docs)
+    await util.point_read("3", "US")
+    assert await util.last_request_charge() >= 1.0
+    assert "x-ms-request-charge" in await util.last_response_headers()
+    with pytest.raises(Exception):
+        await util.point_read("missing", "US")
+    await util.query_items("SELECT * FROM c WHERE c.n > 2", max_items=3)
+
+    stats = util.telemetry_stats()
+    assert stats["operations"]["upsert_item"]["ru"]["count"] == 10
+    assert stats["operations"]["point_read"]["status_codes"] == {"200": 1, "404": 1}
+    assert stats["operations"]["query_items"]["ru"]["count"] == 3  # pages
+    assert stats["top_queries"][0]["sql"] == "SELECT * FROM c WHERE c.n > 2"
+
+    exported = dict()
+    for resource_metrics in reader.get_metrics_data().resource_metrics:
+        for scope_metrics in resource_metrics.scope_metrics:
+            for metric in scope_metrics.metrics:
+                exported[metric.name] = metric
+    assert sorted(exported.keys()) == ["cosmos.latency", "cosmos.request_charge"]
+    points = exported["cosmos.request_charge"].data.data_points
+    operations = [point.attributes["db.operation.name"] for point in points]
+    assert "upsert_item" in operations
+    await util.close()
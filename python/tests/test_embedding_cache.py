@@ -0,0 +1,94 @@
+import os
+
+from src.ai.embedding_cache import EmbeddingCache
+
+# pytest -v tests/test_embedding_cache.py
+# Chris Joakim, 3Cloud/Cognizant, 2026
+
+
+def test_put_and_get(tmp_path):
+    cache = EmbeddingCache(str(tmp_path), dimensions=3)
+    assert cache.get("dep", "hello world") is None
+    cache.put("dep", "hello world", [0.5, 0.25, 0.125])
+    assert cache.get("dep", "hello world") == [0.5, 0.25, 0.125]
+    # the key is the normalized text, per deployment
+    assert cache.get("dep", "  hello \n world ") is not None
+    assert cache.get("other-dep", "hello world") is None
+
+    # embeddings with the wrong dimensions are not cached
+    cache.put("dep", "wrong", [1.0, 2.0])
+    assert cache.get("dep", "wrong") is None
+
+    stats = cache.stats()
+    assert stats["size"] == 1
+    assert stats["hits"] == 2
+    assert stats["misses"] == 3
+    assert stats["puts"] == 1
+
+
+def test_persistence(tmp_path):
+    cache = EmbeddingCache(str(tmp_path), dimensions=2)
+    for n in range(10):
+        cache.put("dep", "text {}".format(n), [float(n), 1.0])
+    cache.close()
+    assert os.path.isfile("{}/embeddings.f32".format(tmp_path))
+    assert os.path.isfile("{}/embeddings_index.json".format(tmp_path))
+
+    cache = EmbeddingCache(str(tmp_path), dimensions=2)
+    assert cache.size() == 10
+    assert cache.get("dep", "text 7") == [7.0, 1.0]
+
+    # the cache is reset if the dimensions change
+    cache.close()
+    cache = EmbeddingCache(str(tmp_path), dimensions=4)
+    assert cache.size() == 0
+
+
+def test_lru_eviction(tmp_path):
+    cache = EmbeddingCache(str(tmp_path), dimensions=2, max_entries=3)
+    for n in range(3):
+        cache.put("dep", "text {}".format(n), [float(n), 0.0])
+    assert cache.get("dep", "text 0") is not None  # text 1 is now the least recently used
+    cache.put("dep", "text 3", [3.0, 0.0])
+    assert cache.size() == 3
+    assert cache.get("dep", "text 1") is None
+    assert cache.get("dep", "text 0") == [0.0, 0.0]
+    assert cache.get("dep", "text 3") == [3.0, 0.0]
+    assert cache.stats()["evictions"] == 1
+    assert cache.stats()["slots"] == 3
+
+
+def test_growth(tmp_path):
+    cache = EmbeddingCache(str(tmp_path), dimensions=2)
+    count = 2500
+    for n in range(count):
+        cache.put("dep", "text {}".format(n), [float(n), 0.0])
+    assert cache.size() == count
+    assert cache.stats()["slots"] == 4096
+    assert cache.get("dep", "text 0") == [0.0, 0.0]
+    assert cache.get("dep", "text 2499") == [2499.0, 0.0]
+
+    cache.clear()
+    assert cache.size() == 0
+    cache.put("dep", "text 0", [1.0, 1.0])
+    assert cache.stats()["slots"] == 4096
+
+
+def test_stale_index_after_crash(tmp_path):
+    cache = EmbeddingCache(str(tmp_path), dimensions=2, max_entries=2)
+    cache.put("dep", "text 0", [0.0, 0.0])
+    cache.put("dep", "text 1", [1.0, 0.0])
+    cache.flush()
+    # text 0 is evicted and its row reused, then the process crashes before a flush
+    cache.put("dep", "text 2", [2.0, 0.0])
+    cache._matrix.flush()
+    cache._key_tags.flush()
+
+    cache = EmbeddingCache(str(tmp_path), dimensions=2, max_entries=2)
+    assert cache.size() == 2  # the stale index still maps text 0 to the reused row
+    assert cache.get("dep", "text 0") is None
+    assert cache.get("dep", "text 1") == [1.0, 0.0]
+    assert cache.size() == 1
+    assert cache.stats()["stale"] == 1
+    cache.put("dep", "text 3", [3.0, 0.0])
+    assert cache.get("dep", "text 3") == [3.0, 0.0]
@@ -0,0 +1,109 @@
+import json
+
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+from src.vector.embedding_matrix_file import EmbeddingMatrixFile
+from src.vector.local_vector_index import LocalVectorIndex
+
+# pytest -v tests/test_embedding_matrix_file.py
+# Chris Joakim, 3Cloud/Cognizant, 2026
+
+
+def test_write_and_open(tmp_path):
+    rng = np.random.default_rng(42)
+    vectors = rng.standard_normal((100, 32)).astype(np.float32)
+    ids = [str(n) for n in range(100)]
+    docs = [{"id": str(n), "n": n} for n in range(100)]
+    path = str(tmp_path / "vectors.emb")
+
+    written = EmbeddingMatrixFile.write(path, ids, vectors, docs)
+    assert written.rows == 100
+    assert written.dimensions == 32
+    assert written.normalized
+
+    matrix_file = EmbeddingMatrixFile.open(path)
+    assert isinstance(matrix_file.matrix, np.memmap)
+    assert matrix_file.matrix.shape == (100, 32)
+    normalized = vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+    assert np.allclose(matrix_file.matrix, normalized, atol=1e-6)
+    assert matrix_file.ids() == ids
+    assert matrix_file.docs()[7] == {"id": "7", "n": 7}
+    assert matrix_file.row_of("42") == 42
+    assert matrix_file.row_of("missing") is None
+    assert np.allclose(matrix_file.vector("3"), normalized[3], atol=1e-6)
+
+    raw = EmbeddingMatrixFile.write(path, ids, vectors, normalize=False)
+    assert not raw.normalized
+    assert np.array_equal(raw.matrix, vectors)
+    assert raw.docs()[0] == {"id": "0"}
+
+
+def test_open_rejects_other_files(tmp_path):
+    path = tmp_path / "not.emb"
+    path.write_bytes(b"NOTEMBED" + bytes(56))
+    with pytest.raises(ValueError):
+        EmbeddingMatrixFile.open(str(path))
+    path.write_bytes(b"short")
+    with pytest.raises(ValueError):
+        EmbeddingMatrixFile.open(str(path))
+
+
+def test_write_rejects_wrong_dimensions(tmp_path):
+    with pytest.raises(ValueError):
+        EmbeddingMatrixFile.write(str(tmp_path / "bad.emb"), ["a", "b"], [[1.0, 2.0], [1.0]])
+
+
+def test_write_from_json_dir(tmp_path):
+    docs_dir = tmp_path / "docs"
+    docs_dir.mkdir()
+    for n in range(5):
+        doc = {"id": str(n), "pk": "p", "name": "lib{}".format(n), "embedding": [n, 1.0, 0.0]}
+        (docs_dir / "{}.json".format(n)).write_text(json.dumps(doc))
+    (docs_dir / "unembedded.json").write_text(json.dumps({"id": "x"}))
+    (docs_dir / "notes.txt").write_text("ignored")
+
+    path = str(tmp_path / "docs.emb")
+    matrix_file = EmbeddingMatrixFile.write_from_json_dir(path, str(docs_dir))
+    assert matrix_file.rows == 5
+    assert matrix_file.dimensions == 3
+    assert matrix_file.docs()[2] == {"id": "2", "pk": "p", "name": "lib2"}
+
+    index = LocalVectorIndex.from_matrix_file(path)
+    assert index.size() == 5
+    assert index.find("name", "lib4") == "4"
+    assert index.search([4.0, 1.0, 0.0], top_k=1)[0]["id"] == "4"
+    assert isinstance(index._matrix, np.memmap)  # searched in place, not copied
+    assert index._matrix.filename == str(Path(path).resolve())
+    assert not index._matrix.flags.writeable
+
+    # adding or replacing embeddings copies the matrix; the file is unchanged
+    index.add("1", [0.0, 0.0, 1.0])
+    index.add("5", [0.0, 1.0, 1.0])
+    assert not isinstance(index._matrix, np.memmap)
+    assert index.search([0.0, 0.0, 1.0], top_k=1)[0]["id"] == "1"
+    assert index.size() == 6
+    assert EmbeddingMatrixFile.open(path).vector("1")[2] == 0.0
+
+    empty_dir = tmp_path / "empty"
+    empty_dir.mkdir()
+    with pytest.raises(ValueError):
+        EmbeddingMatrixFile.write_from_json_dir(path, str(empty_dir))
+
+
+def test_from_matrix_file_matches_json_dir(tmp_path):
+    json_index = LocalVectorIndex.from_json_dir("data/cosmosdb")
+    path = str(tmp_path / "libraries.emb")
+    EmbeddingMatrixFile.write_from_json_dir(path, "data/cosmosdb")
+    file_index = LocalVectorIndex.from_matrix_file(path)
+    assert file_index.size() == json_index.size()
+    assert sorted(file_index.ids) == sorted(json_index.ids)
+
+    id = json_index.find("name", "fastapi")
+    embedding = json_index.embedding(id)
+    expected = json_index.search(embedding, top_k=10)
+    results = file_index.search(embedding, top_k=10)
+    assert [r["id"] for r in results] == [r["id"] for r in expected]
+    assert results[0]["SimilarityScore"] == pytest.approx(expected[0]["SimilarityScore"], abs=1e-5)
@@ -153,7 +153,7 @@ def test_walk():
     print(json.dumps(entries, sort_keys=True, indent=2))
     FS.write_json(entries, "tmp/test_walk.json")
     assert len(entries) > 10
-    assert len(entries) < 30
+    assert len(entries) < 60
     fs_found = False
     for e in entries:
         if e["base"] == "fs.py":
@@ -163,7 +163,7 @@ def test_walk():
     entries = FS.walk("src", include_dirs=[], include_types=["py"])
     print(json.dumps(entries, sort_keys=True, indent=2))
     assert len(entries) > 20
-    assert len(entries) < 30
+    assert len(entries) < 60
     bytes_found = False
     for e in entries:
         if e["base"] == "bytes.py":
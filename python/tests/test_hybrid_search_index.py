@@ -0,0 +1,80 @@
+import pytest
+
+from src.io.fs import FS
+from src.vector.hybrid_search_index import HybridSearchIndex
+
+# pytest -v tests/test_hybrid_search_index.py
+# Chris Joakim, 3Cloud/Cognizant, 2026
+
+
+@pytest.fixture(scope="module")
+def index():
+    return HybridSearchIndex.from_json_dir("data/cosmosdb")
+
+
+@pytest.fixture(scope="module")
+def searches():
+    return FS.read_json("aisearch/libraries_searches.json")
+
+
+def test_reciprocal_rank_fusion():
+    fused = HybridSearchIndex.reciprocal_rank_fusion([["a", "b", "c"], ["c", "a"]], rrf_k=60)
+    assert [id for id, _ in fused] == ["a", "c", "b"]
+    assert fused[0][1] == pytest.approx(1.0 / 61 + 1.0 / 62)
+    assert fused[2][1] == pytest.approx(1.0 / 62)
+    assert HybridSearchIndex.reciprocal_rank_fusion([]) == list()
+
+
+def test_text_search(index, searches):
+    response = index.execute(searches["m26"])
+    assert response["@odata.count"] == 1
+    assert response["value"][0]["name"] == "m26"
+    assert response["value"][0]["@search.score"] == response["value"][0]["BM25Score"]
+
+    response = index.execute(searches["all_libraries"])
+    assert response["@odata.count"] == index.size() == 288
+    assert len(response["value"]) == 50
+    assert response["value"][0]["@search.score"] == 1.0
+
+
+def test_vector_search(index, searches):
+    response = index.execute(searches["vector_search_fastapi_vector"])
+    assert response["@odata.count"] == 5
+    assert response["value"][0]["name"] == "fastapi"
+    scores = [doc["@search.score"] for doc in response["value"]]
+    assert scores == sorted(scores, reverse=True)
+    assert "BM25Score" not in response["value"][0]
+
+
+def test_hybrid_search(index, searches):
+    params = searches["hybrid_search_fastapi_web_framework"]
+    response = index.execute(params)
+    names = [doc["name"] for doc in response["value"]]
+    assert len(names) == 10
+    assert names[0] == "fastapi"
+    assert response["@odata.count"] > 10  # the union of the lexical and vector matches
+    first = response["value"][0]
+    assert first["@search.score"] == first["HybridScore"]
+    assert first["BM25Score"] > 0.0 and first["SimilarityScore"] > 0.8
+
+    embeddings = [params["vectorQueries"][0]["vector"]]
+    results = index.search(params["search"], embeddings, top_k=10, k=10)
+    assert [r["name"] for r in results] == names
+
+
+def test_orderby_select_skip(index):
+    params = {"search": "azure", "orderby": "name desc", "select": "name", "top": 3, "skip": 1}
+    response = index.execute(params)
+    assert "@odata.count" not in response
+    names = [doc["name"] for doc in response["value"]]
+    assert len(names) == 3
+    assert names == sorted(names, reverse=True)
+    assert set(response["value"][0].keys()) == {"name", "@search.score"}
+
+    all_names = [
+        d["name"] for d in index.execute({"search": "azure", "orderby": "name desc"})["value"]
+    ]
+    assert all_names[1:4] == names
+
+    with pytest.raises(ValueError):
+        index.execute({"vectorQueries": [{"kind": "text", "text": "web framework"}]})
@@ -0,0 +1,84 @@
+import numpy as np
+import pytest
+
+from src.vector.ivf_pq_index import IVFPQIndex
+from src.vector.kmeans import KMeans
+from src.vector.local_vector_index import LocalVectorIndex
+
+# pytest -v tests/test_ivf_pq_index.py
+# Chris Joakim, 3Cloud/Cognizant, 2026
+
+
+def clustered_vectors(count: int, dimensions: int, clusters: int = 20, seed: int = 7):
+    rng = np.random.default_rng(seed)
+    centers = rng.standard_normal((clusters, dimensions)).astype(np.float32)
+    noise = rng.standard_normal((count, dimensions)).astype(np.float32)
+    return centers[rng.integers(0, clusters, count)] + 0.3 * noise
+
+
+def exact_index(vectors: np.ndarray) -> LocalVectorIndex:
+    index = LocalVectorIndex(vectors.shape[1])
+    for n, vector in enumerate(vectors):
+        index.add(str(n), vector)
+    return index
+
+
+def test_kmeans():
+    vectors = clustered_vectors(1000, 8, clusters=4)
+    centroids = KMeans.fit(vectors, 4)
+    assert centroids.shape == (4, 8)
+    labels = KMeans.assign(vectors, centroids)
+    assert sorted(np.unique(labels).tolist()) == [0, 1, 2, 3]
+    assert KMeans.fit(vectors[:3], 10).shape == (3, 8)  # k is at most the vector count
+
+
+def test_recall_improves_with_nprobe_and_refine():
+    vectors = clustered_vectors(3000, 32)
+    exact = exact_index(vectors)
+    ann = IVFPQIndex.from_local_index(exact, nlist=32, m=8, refine_factor=4)
+    assert ann.size() == 3000
+    queries = vectors[:50] + 0.05
+    low = ann.recall_at_k(exact, queries, top_k=10, nprobe=1, refine_factor=0)
+    high = ann.recall_at_k(exact, queries, top_k=10, nprobe=16, refine_factor=0)
+    refined = ann.recall_at_k(exact, queries, top_k=10, nprobe=16)
+    assert low["recall"] <= high["recall"] <= refined["recall"]
+    assert refined["refine_factor"] == 4
+    assert refined["recall"] >= 0.9
+
+    results = ann.search(vectors[5], top_k=3)
+    assert results[0]["id"] == "5"
+    assert results[0]["SimilarityScore"] == pytest.approx(1.0, abs=0.01)
+
+
+def test_refine_requires_stored_vectors():
+    vectors = clustered_vectors(500, 16)
+    ann = IVFPQIndex.from_local_index(exact_index(vectors), nlist=8, m=4)
+    assert len(ann.search(vectors[5], top_k=3, refine_factor=0)) == 3
+    with pytest.raises(ValueError):
+        ann.search(vectors[5], top_k=3, refine_factor=4)  # no vectors to rescore
+
+
+def test_incremental_inserts_and_save_load(tmp_path):
+    vectors = clustered_vectors(1200, 16)
+    ann = IVFPQIndex(16, nlist=16, m=4, nprobe=4, refine_factor=2)
+    with pytest.raises(ValueError):
+        ann.add("0", vectors[0])  # not trained
+    ann.train(vectors[:1000])
+    ann.add_batch([str(n) for n in range(1000)], vectors[:1000])
+    for n in range(1000, 1200):
+        ann.add(str(n), vectors[n], {"id": str(n), "late": True})
+    assert ann.size() == 1200
+    assert ann.search(vectors[1100], top_k=1)[0] == {
+        "id": "1100",
+        "late": True,
+        "SimilarityScore": pytest.approx(1.0, abs=0.01),
+    }
+    with pytest.raises(ValueError):
+        ann.add("5", vectors[5])  # duplicate id
+
+    ann.save(str(tmp_path))
+    loaded = IVFPQIndex.load(str(tmp_path))
+    assert loaded.size() == 1200
+    assert loaded.refine_factor == 2
+    for query in vectors[::100]:
+        assert loaded.search(query, top_k=5) == ann.search(query, top_k=5)
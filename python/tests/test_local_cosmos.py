@@ -0,0 +1,151 @@
+import pytest
+
+from azure.cosmos.exceptions import CosmosBatchOperationError
+
+from src.db.cosmos_nosql_util import CosmosNoSqlUtil
+from src.db.local_cosmos import LocalCosmosClient
+from src.db.local_cosmos_sql import LocalCosmosSql, LocalSqlError
+
+# pytest -v tests/test_local_cosmos.py
+# Chris Joakim, 3Cloud/Cognizant, 2026
+
+
+@pytest.fixture
+def local_envvars(monkeypatch):
+    monkeypatch.setenv("AZURE_COSMOSDB_NOSQL_AUTHTYPE", "local")
+    LocalCosmosClient.reset()
+    yield
+    LocalCosmosClient.reset()
+
+
+def airport_docs(count: int) -> list:
+    docs = list()
+    for n in range(count):
+        doc = dict()
+        doc["id"] = "airport-{}".format(n)
+        doc["pk"] = ["US", "CA", "MX"][n % 3]
+        doc["name"] = "Airport {}".format(n)
+        doc["elevation"] = n * 10
+        doc["embedding"] = [1.0, float(n)]
+        docs.append(doc)
+    return docs
+
+
+async def local_util(c_ru: int = 0) -> CosmosNoSqlUtil:
+    util = CosmosNoSqlUtil()
+    await util.initialize()
+    await util.create_database("dev")
+    await util.set_db("dev")
+    await util.create_container("airports", "/pk", c_ru)
+    await util.set_container("airports")
+    return util
+
+
+async def test_crud_and_queries(local_envvars):
+    async with await local_util() as util:
+        assert isinstance(util._client, LocalCosmosClient)
+        assert await util.list_databases() == ["dev"]
+        assert await util.list_containers() == ["airports"]
+
+        summary = await util.bulk_upsert(airport_docs(30))
+        assert summary["success_count"] == 30
+        assert summary["total_ru"] > 0
+        assert await util.count_documents() == [30]
+
+        doc = await util.point_read("airport-4", "CA")
+        assert doc["name"] == "Airport 4"
+        assert "_etag" in doc
+        assert await util.last_request_charge() >= 1.0
+
+        sql = "SELECT c.id, c.elevation FROM c WHERE c.pk = @pk AND c.elevation >= @min"
+        params = [{"name": "@pk", "value": "US"}, {"name": "@min", "value": 100}]
+        results = await util.parameterized_query(sql, params)
+        assert [r["id"] for r in results] == ["airport-12", "airport-15", "airport-18"] + [
+            "airport-21",
+            "airport-24",
+            "airport-27",
+        ]
+
+        sql = "SELECT TOP 2 VALUE c.id FROM c ORDER BY c.elevation DESC"
+        assert await util.query_items(sql) == ["airport-29", "airport-28"]
+
+        pages = [page async for page in util.query_pages("SELECT * FROM c", max_item_count=8)]
+        assert [len(page["items"]) for page in pages] == [8, 8, 8, 6]
+        assert pages[0]["continuation_token"] == "8"
+        assert pages[-1]["continuation_token"] is None
+        resumed = [p async for p in util.query_pages("SELECT * FROM c", continuation_token="24")]
+        assert len(resumed[0]["items"]) == 6
+
+        hits = [d async for d in util.vector_search([1.0, 2.0], top_n=3, projection="c.id")]
+        assert hits[0]["id"] == "airport-2"
+        assert hits[0]["SimilarityScore"] > hits[2]["SimilarityScore"]
+
+        await util.delete_item("airport-0", "US")
+        assert await util.count_documents() == [29]
+
+
+async def test_transactional_batch(local_envvars):
+    async with await local_util() as util:
+        summary = await util.bulk_batch_upsert(airport_docs(250), "/pk", batch_size=50)
+        assert summary["batch_count"] == 6
+        assert summary["success_count"] == 250
+        assert await util.count_documents() == [250]
+
+        # a failed operation rolls back the whole batch
+        docs = airport_docs(2)
+        operations = [("upsert", ({"id": "new", "pk": "US"},)), ("create", (docs[0],))]
+        with pytest.raises(CosmosBatchOperationError) as excinfo:
+            await util.execute_item_batch(operations, "US")
+        assert excinfo.value.error_index == 1
+        assert excinfo.value.status_code == 409
+        assert await util.query_items("SELECT VALUE c.id FROM c WHERE c.id = 'new'") == []
+
+
+async def test_change_feed(local_envvars):
+    async with await local_util() as util:
+        await util.bulk_upsert(airport_docs(5))
+        pages = [page async for page in util.change_feed_pages(max_item_count=2)]
+        assert sum([len(page["items"]) for page in pages]) == 5
+        token = pages[-1]["continuation_token"]
+
+        await util.upsert_item({"id": "airport-1", "pk": "CA", "name": "Renamed"})
+        pages = [page async for page in util.change_feed_pages(token)]
+        assert [page["items"][0]["name"] for page in pages] == ["Renamed"]
+        token = pages[-1]["continuation_token"]
+        assert [page async for page in util.change_feed_pages(token)] == []
+
+
+async def test_throttling_and_rate_limiter(local_envvars):
+    async with await local_util(c_ru=400) as util:
+        # 400 RU/s allows only a few 1.5KB upserts per second without pacing
+        docs = airport_docs(60)
+        for doc in docs:
+            doc["padding"] = "x" * 1500
+        summary = await util.bulk_upsert(docs)
+        assert summary["failure_count"] > 0
+        assert 429 in [r["status_code"] for r in summary["results"]]
+        assert await util.provisioned_throughput() == 400
+
+        await util.enable_rate_limiter(max_retries=20)
+        summary = await util.bulk_upsert(docs[:20], concurrency=4)
+        assert summary["failure_count"] == 0
+        assert util.rate_limiter_stats()["total_ru"] > 0
+
+
+def test_sql_subset():
+    docs = airport_docs(6)
+    sql = "SELECT COUNT(1) AS n, MAX(c.elevation) AS highest FROM c WHERE c.pk IN ('US', 'MX')"
+    assert LocalCosmosSql(sql).execute(docs) == [{"n": 4, "highest": 50}]
+    sql = "SELECT VALUE c.id FROM c WHERE CONTAINS(c.name, '3') OR c.missing = 1"
+    assert LocalCosmosSql(sql).execute(docs) == ["airport-3"]
+    # comparisons of different types are undefined, so match no documents
+    sql = "SELECT VALUE c.id FROM c WHERE c.name != 5"
+    assert LocalCosmosSql(sql).execute(docs) == []
+    sql = "SELECT VALUE c.id FROM c WHERE c.name <> true OR c.missing != 'x'"
+    assert LocalCosmosSql(sql).execute(docs) == []
+    sql = "SELECT VALUE c.id FROM c WHERE c.name != 'Airport 0' AND c.elevation < 30"
+    assert LocalCosmosSql(sql).execute(docs) == ["airport-1", "airport-2"]
+    sql = "SELECT DISTINCT VALUE c.pk FROM c ORDER BY c.pk OFFSET 1 LIMIT 5"
+    assert LocalCosmosSql(sql).execute(docs) == ["MX", "US"]
+    with pytest.raises(LocalSqlError):
+        LocalCosmosSql("SELECT * FROM c JOIN t IN c.tags")
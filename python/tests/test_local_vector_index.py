@@ -0,0 +1,76 @@
+import time
+
+import numpy as np
+import pytest
+
+from src.vector.local_vector_index import LocalVectorIndex
+
+# pytest -v tests/test_local_vector_index.py
+# Chris Joakim, 3Cloud/Cognizant, 2026
+
+
+def random_index(count: int, dimensions: int, seed: int = 42):
+    rng = np.random.default_rng(seed)
+    vectors = rng.standard_normal((count, dimensions)).astype(np.float32)
+    index = LocalVectorIndex(dimensions)
+    for n in range(count):
+        index.add(str(n), vectors[n], {"id": str(n), "n": n})
+    return index, vectors, rng
+
+
+def test_search_matches_exhaustive_sort():
+    index, vectors, rng = random_index(2000, 64)  # grows past the initial capacity
+    assert index.size() == 2000
+    query = rng.standard_normal(64).astype(np.float32)
+    normalized = vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+    scores = normalized @ (query / np.linalg.norm(query))
+    expected = [str(n) for n in np.argsort(-scores)[:10]]
+
+    results = index.search(query, top_k=10)
+    assert [r["id"] for r in results] == expected
+    assert results[0]["SimilarityScore"] == pytest.approx(float(scores.max()), abs=1e-5)
+    assert results[0]["n"] == int(expected[0])
+
+    # a vector is most similar to itself, regardless of its scale
+    assert index.search(vectors[7] * 3.0, top_k=1)[0]["id"] == "7"
+    assert len(index.search(query, top_k=5000)) == 2000
+
+
+def test_search_batch_and_replace():
+    index, vectors, rng = random_index(500, 32)
+    queries = rng.standard_normal((8, 32)).astype(np.float32)
+    batch = index.search_batch(queries, top_k=5)
+    assert len(batch) == 8
+    for query, results in zip(queries, batch):
+        assert [r["id"] for r in results] == [r["id"] for r in index.search(query, top_k=5)]
+
+    index.add("3", vectors[9], {"id": "3", "replaced": True})
+    assert index.size() == 500
+    assert np.allclose(index.embedding("3"), index.embedding("9"))
+    assert index.embedding("missing") is None
+    with pytest.raises(ValueError):
+        index.add("x", [1.0, 2.0])
+
+
+def test_search_is_fast():
+    index, _, rng = random_index(3000, 1536)
+    query = rng.standard_normal(1536).astype(np.float32)
+    index.search(query)
+    iterations = 100
+    t1 = time.perf_counter()
+    for _ in range(iterations):
+        index.search(query, top_k=10)
+    ms = (time.perf_counter() - t1) * 1000.0 / iterations
+    assert ms < 2.0
+
+
+def test_from_json_dir():
+    index = LocalVectorIndex.from_json_dir("data/cosmosdb")
+    assert index.size() > 100
+    assert index.dimensions == 1536
+    id = index.find("name", "fastapi")
+    results = index.search(index.embedding(id), top_k=3)
+    assert results[0]["name"] == "fastapi"
+    assert results[0]["pk"] == "pypi"
+    assert results[0]["SimilarityScore"] == pytest.approx(1.0, abs=1e-5)
+    assert sorted(results[0].keys()) == ["SimilarityScore", "id", "name", "pk"]
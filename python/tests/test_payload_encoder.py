@@ -0,0 +1,102 @@
+import gzip
+import json
+
+from src.io import payload_encoder
+from src.io.payload_encoder import PayloadEncoder
+
+# pytest -v tests/test_payload_encoder.py
+# Chris Joakim, 3Cloud/Cognizant, 2026
+
+
+def test_trim_floats():
+    encoder = PayloadEncoder(float_digits=3)
+    doc = {
+        "id": "1",
+        "count": 7,
+        "score": 0.98765,
+        "embedding": [0.0041768644, -0.0249696196, 0.5] * 4,
+        "tags": ["a", 1, 2.71828],
+        "nested": {"values": [1.23456, 2]},
+        "flag": True,
+    }
+    trimmed = encoder.trim_floats(doc)
+    assert trimmed["embedding"] == [0.004, -0.025, 0.5] * 4
+    assert trimmed["score"] == 0.988
+    assert trimmed["tags"] == ["a", 1, 2.718]
+    assert trimmed["nested"] == {"values": [1.235, 2]}
+    assert trimmed["count"] == 7 and isinstance(trimmed["count"], int)
+    assert trimmed["flag"] is True
+    assert doc["score"] == 0.98765  # the given object is not modified
+    assert PayloadEncoder().trim_floats(doc) is doc
+
+
+def test_encode_and_stats():
+    doc = {"value": [{"id": str(n), "embedding": [0.123456789] * 100} for n in range(10)]}
+    compact = json.dumps(doc, separators=(",", ":")).encode("utf-8")
+
+    encoder = PayloadEncoder()
+    assert encoder.encode(doc) == compact
+    assert encoder.headers() == {"Content-Type": "application/json"}
+
+    encoder = PayloadEncoder(float_digits=4, gzip_body=True, measure_json=True)
+    body = encoder.encode(doc)
+    assert encoder.headers()["Content-Encoding"] == "gzip"
+    assert json.loads(gzip.decompress(body))["value"][0]["embedding"][0] == 0.1235
+    stats = encoder.stats()
+    assert stats["body_count"] == 1
+    assert stats["json_bytes"] == len(compact)
+    assert stats["encoded_bytes"] < stats["json_bytes"]
+    assert stats["wire_bytes"] == len(body) < stats["encoded_bytes"]
+    assert stats["wire_ratio"] == len(body) / len(compact)
+
+    # the bytes before trimming take another pass, so are not measured by default
+    encoder = PayloadEncoder(float_digits=4)
+    encoder.encode(doc)
+    stats = encoder.stats()
+    assert stats["json_bytes"] is None
+    assert stats["wire_ratio"] is None
+    assert stats["wire_bytes"] == stats["encoded_bytes"]
+
+
+def test_documents_are_encoded_once():
+    docs = [{"id": str(n), "embedding": [0.123456789] * 100} for n in range(10)]
+    encoder = PayloadEncoder(float_digits=4)
+    expected = encoder.dumps(encoder.trim_floats({"value": docs}))
+    sizes = [encoder.document_size(doc) for doc in docs]
+
+    dumped = list()
+    dumps = encoder.dumps
+    encoder.dumps = lambda obj: dumped.append(obj) or dumps(obj)
+    body = encoder.encode_documents(docs[:5])
+    assert dumped == list()  # the encodings of document_size() are reused
+    assert len(body) == sum(sizes[:5]) + 4 + len('{"value":[]}')
+    encoder.clear_documents()
+    body = encoder.encode_documents(docs)
+    assert len(dumped) == 10
+    assert body == expected
+    assert encoder.stats()["encoded_bytes"] == len(expected) + sum(sizes[:5]) + 16
+
+
+def test_trim_document():
+    doc = {"id": "1", "embedding": [0.123456789] * 100}
+    encoder = PayloadEncoder(float_digits=4)
+    assert encoder.trim_document(doc)["embedding"][0] == 0.1235
+    stats = encoder.stats()
+    assert stats["document_count"] == 1
+    assert stats["json_bytes"] is None
+    assert stats["encoded_bytes"] is None
+    assert "wire_bytes" not in stats  # the bytes the client sends are unknown
+
+    encoder = PayloadEncoder(float_digits=4, measure_json=True)
+    encoder.trim_document(doc)
+    stats = encoder.stats()
+    assert stats["encoded_bytes"] < stats["json_bytes"] == len(encoder.dumps(doc))
+
+
+def test_stdlib_json_fallback(monkeypatch):
+    monkeypatch.setattr(payload_encoder, "orjson", None)
+    encoder = PayloadEncoder.from_opts({"float_digits": 2})
+    assert encoder.use_orjson is False
+    assert encoder.stats()["encoder"] == "json"
+    assert encoder.encode({"name": "café", "x": 1.005001}) == '{"name":"café","x":1.01}'.encode()
+    assert encoder.document_size({"x": 0.123456}) == len('{"x":0.12}')
@@ -0,0 +1,69 @@
+import time
+
+from src.db.point_read_cache import PointReadCache
+
+# pytest -v tests/test_point_read_cache.py
+# Chris Joakim, 3Cloud/Cognizant, 2026
+
+
+def test_lookup_put_and_ttl():
+    cache = PointReadCache(max_entries=10, ttl_seconds=0.05)
+    key = cache.key("dev", "libraries", "pypi", "fastapi")
+    assert key == ("dev", "libraries", "pypi", "fastapi")
+    assert cache.key("test", "libraries", "pypi", "fastapi") != key
+    assert cache.lookup(key) is None
+
+    cache.put(key, {"id": "fastapi", "pk": "pypi", "_etag": '"e1"'}, ru=2.0)
+    entry = cache.lookup(key)
+    assert entry["fresh"] is True
+    assert entry["etag"] == '"e1"'
+    assert entry["doc"]["id"] == "fastapi"
+
+    time.sleep(0.06)
+    entry = cache.lookup(key)
+    assert entry["fresh"] is False
+    doc = cache.revalidated(key, revalidation_ru=0.5)
+    assert doc["id"] == "fastapi"
+    assert cache.lookup(key)["fresh"] is True
+
+    stats = cache.stats()
+    assert stats["hits"] == 2
+    assert stats["misses"] == 1
+    assert stats["stale"] == 1
+    assert stats["revalidations"] == 1
+    assert stats["ru_saved"] == 2.0 + 1.5 + 2.0
+    assert stats["hit_rate"] == 0.75
+
+
+def test_lru_eviction_and_invalidation():
+    cache = PointReadCache(max_entries=3, ttl_seconds=60)
+    for n in range(3):
+        cache.put(cache.key("db", "c", "pk", str(n)), {"id": str(n)})
+    cache.lookup(cache.key("db", "c", "pk", "0"))  # 0 is now the most recently used
+    cache.put(cache.key("db", "c", "pk", "3"), {"id": "3"})
+    assert cache.size() == 3
+    assert cache.stats()["evictions"] == 1
+    assert cache.lookup(cache.key("db", "c", "pk", "1")) is None  # evicted
+
+    cache.put(cache.key("db", "c", "other", "0"), {"id": "0"})  # evicts 2
+    cache.invalidate_id("db", "c", "0")  # in all partitions
+    assert cache.lookup(cache.key("db", "c", "pk", "0")) is None
+    assert cache.lookup(cache.key("db", "c", "other", "0")) is None
+    assert cache.size() == 1
+    cache.invalidate(cache.key("db", "c", "pk", "3"))
+    assert cache.size() == 0
+
+
+def test_returned_documents_are_copies():
+    cache = PointReadCache(ttl_seconds=0.05)
+    key = cache.key("db", "c", "pypi", "fastapi")
+    doc = {"id": "fastapi", "pk": "pypi", "tags": ["web"]}
+    cache.put(key, doc)
+    doc["tags"].append("put")
+    cache.lookup(key)["doc"]["tags"].append("hit")
+    assert cache.lookup(key)["doc"]["tags"] == ["web"]
+
+    time.sleep(0.06)
+    cache.lookup(key)
+    cache.revalidated(key)["tags"].append("revalidated")
+    assert cache.lookup(key)["doc"]["tags"] == ["web"]
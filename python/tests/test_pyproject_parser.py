@@ -19,7 +19,7 @@ def test_all():
     dep_names = pp.get_dependency_names()
     # for name in sorted(dep_names):
     #     print(f"assert '{name}' in dep_names")
-    assert len(dep_names) == 67
+    assert len(dep_names) == 68
     assert "Faker" in dep_names
     assert "Jinja2" in dep_names
     assert "SQLAlchemy" in dep_names
@@ -55,6 +55,7 @@ def test_all():
     assert "markdown" in dep_names
     assert "matplotlib" in dep_names
     assert "openai" in dep_names
+    assert "orjson" in dep_names
     assert "opentelemetry-api" in dep_names
     assert "opentelemetry-exporter-otlp-proto-grpc" in dep_names
     assert "opentelemetry-instrumentation-httpx" in dep_names
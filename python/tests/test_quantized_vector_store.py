@@ -0,0 +1,77 @@
+import numpy as np
+import pytest
+
+from src.vector.embedding_matrix_file import EmbeddingMatrixFile
+from src.vector.local_vector_index import LocalVectorIndex
+from src.vector.quantized_vector_store import QuantizedVectorStore
+
+# pytest -v tests/test_quantized_vector_store.py
+# Chris Joakim, 3Cloud/Cognizant, 2026
+
+
+def local_index(count: int = 2000, dimensions: int = 256, seed: int = 3) -> LocalVectorIndex:
+    rng = np.random.default_rng(seed)
+    centers = rng.standard_normal((20, dimensions)).astype(np.float32)
+    vectors = centers[rng.integers(0, 20, count)]
+    vectors = vectors + 0.5 * rng.standard_normal((count, dimensions)).astype(np.float32)
+    index = LocalVectorIndex(dimensions)
+    for n, vector in enumerate(vectors):
+        index.add(str(n), vector)
+    return index
+
+
+def test_int8():
+    index = local_index()
+    store = QuantizedVectorStore.from_local_index(index, "int8")
+    assert store.codes.dtype == np.int8
+    assert store.nbytes() == 2000 * (256 + 4)
+    assert np.abs(store.dequantize(np.arange(10)) - index.matrix()[:10]).max() < 0.01
+
+    query = index.matrix()[42]
+    assert store.search(query, top_k=1, rescore_factor=0)[0]["id"] == "42"
+    assert store.search(query, top_k=1)[0]["SimilarityScore"] == pytest.approx(1.0, abs=1e-5)
+
+    report = store.recall_report(index.matrix()[:40], top_k=10, rescore_factors=[0, 4])
+    assert report[0]["code_bytes_per_vector"] == 260
+    assert report[0]["bytes_per_vector"] == 260 + 256 * 4  # the in-memory float32 matrix
+    assert store.full_precision_nbytes() == index.matrix().nbytes
+    assert report[0]["recall"] >= 0.9
+    assert report[1]["recall"] >= report[0]["recall"]
+
+
+def test_binary():
+    index = local_index()
+    store = QuantizedVectorStore.from_local_index(index, "binary")
+    assert store.codes.shape == (2000, 32)
+    assert store.nbytes() == 2000 * (32 + 4)
+
+    report = store.recall_report(index.matrix()[:40], top_k=10, rescore_factors=[0, 10])
+    assert report[0]["code_bytes_per_vector"] == 36
+    assert report[0]["compression"] < 1.0  # the float32 matrix is still in memory
+    assert report[1]["recall"] > report[0]["recall"]
+    assert report[1]["recall"] >= 0.9
+    assert report[1]["mode"] == "binary"
+
+    # without the full precision vectors, scores are approximate and there is no report
+    store = QuantizedVectorStore.from_local_index(index, "binary", rescore=False)
+    assert store.search(index.matrix()[7], top_k=1)[0]["id"] == "7"
+    with pytest.raises(ValueError):
+        store.recall_report(index.matrix()[:5])
+    with pytest.raises(ValueError):
+        QuantizedVectorStore(256, "int4")
+
+
+def test_from_matrix_file(tmp_path):
+    index = local_index()
+    path = str(tmp_path / "vectors.emb")
+    EmbeddingMatrixFile.write(path, index.ids, index.matrix())
+    store = QuantizedVectorStore.from_matrix_file(path, "int8")
+    assert store.size() == 2000
+    assert isinstance(store.full_precision, np.memmap)  # rescored from the file
+    assert store.full_precision_nbytes() == 0
+    assert store.resident_nbytes() == store.nbytes() == 2000 * (256 + 4)
+
+    report = store.recall_report(index.matrix()[:40], top_k=10, rescore_factors=[0, 4])
+    assert report[0]["compression"] == pytest.approx(256 * 4 / 260)
+    assert report[1]["recall"] == 1.0
+    assert store.search(index.matrix()[42], top_k=1)[0]["id"] == "42"
@@ -0,0 +1,56 @@
+import asyncio
+import time
+
+from src.util.token_bucket import TokenBucket
+
+# pytest -v tests/test_token_bucket.py
+# Chris Joakim, 3Cloud/Cognizant, 2026
+
+
+async def test_acquire_within_capacity():
+    bucket = TokenBucket(100.0)
+    assert bucket.capacity == 100.0
+    waited = await bucket.acquire(60)
+    assert waited == 0.0
+    assert bucket.available() < 41.0
+
+
+async def test_acquire_waits_for_refill():
+    bucket = TokenBucket(100.0, capacity=10.0)
+    await bucket.acquire(10)
+    t1 = time.monotonic()
+    await bucket.acquire(5)  # needs ~0.05 seconds of refill
+    elapsed = time.monotonic() - t1
+    assert elapsed >= 0.04
+    assert bucket.wait_seconds >= 0.04
+
+
+async def test_debit_and_pause():
+    bucket = TokenBucket(1000.0, capacity=100.0)
+    bucket.debit(150)  # actual cost exceeded the estimate
+    assert bucket.available() < 0
+    bucket.debit(-1000)  # credits are capped at capacity
+    assert bucket.available() == 100.0
+
+    bucket.pause(0.05)
+    t1 = time.monotonic()
+    await bucket.acquire(1)
+    assert time.monotonic() - t1 >= 0.04
+
+
+async def test_concurrent_acquirers_share_the_rate():
+    bucket = TokenBucket(200.0, capacity=20.0)
+    t1 = time.monotonic()
+    await asyncio.gather(*[bucket.acquire(10) for _ in range(6)])
+    # 60 tokens at 200/s, less the initial 20 in the bucket
+    assert time.monotonic() - t1 >= 0.18
+
+
+async def test_acquire_more_than_capacity():
+    bucket = TokenBucket(100.0, capacity=10.0)
+    waited = await bucket.acquire(25)  # granted when full, and debited in full
+    assert waited == 0.0
+    assert bucket.available() < -14.0
+    t1 = time.monotonic()
+    await bucket.acquire(10)  # waits out the negative balance
+    assert time.monotonic() - t1 >= 0.22